@@ -1,11 +1,120 @@
+from typing import Dict
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
-    APIFY_TOKEN: str
+    APIFY_TOKEN: str = ""  # required only once the Apify fallback is used
     REDIS_HOST: str = "localhost"  # Changed from "redis" to "localhost" for local dev
     REDIS_PORT: int = 6379
     GLOBAL_RATE_LIMIT: int = 500
+    
+    # Redis Cluster: a keyword's keys share the hash tag {keyword} and live on one shard
+    REDIS_CLUSTER_ENABLED: bool = False
+    REDIS_CLUSTER_NODES: str = ""  # "host:port,host:port" (defaults to REDIS_HOST:REDIS_PORT)
+    
+    # Replica reads for cache lookups and job polls (writes and locks stay on primaries)
+    REDIS_READ_FROM_REPLICAS: bool = False
+    REDIS_REPLICA_HOST: str = ""  # standalone replica; cluster mode reads from the cluster's replicas
+    REDIS_REPLICA_PORT: int = 6379
+    REDIS_REPLICA_MAX_LAG_SECONDS: int = 10  # replica reads stop beyond this lag
+    REDIS_REPLICA_CHECK_INTERVAL: float = 1.0  # seconds between replication health checks
+    
+    # Per-client sliding-window limits: tier -> {"limit": requests, "window": seconds}
+    CLIENT_RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_TIERS: Dict[str, Dict[str, int]] = {
+        "anonymous": {"limit": 30, "window": 60},
+        "standard": {"limit": 120, "window": 60},
+        "premium": {"limit": 600, "window": 60},
+    }
+    DEFAULT_RATE_LIMIT_TIER: str = "anonymous"  # used for requests without a known API key
+    API_KEYS: Dict[str, str] = {}  # API key -> tier, e.g. {"k-123": "premium"}
+    
+    # Fetch lock: short TTL renewed in the background while the holder is fetching
+    LOCK_TTL_SECONDS: int = 30
+    LOCK_RENEW_INTERVAL: float = 10.0
+    
+    # /health/ready: probe results are cached; thresholds that take a worker out of rotation
+    HEALTH_CACHE_SECONDS: float = 2.0
+    HEALTH_MAX_REDIS_LATENCY_MS: float = 250.0
+    HEALTH_MAX_POOL_UTILIZATION: float = 0.9
+    HEALTH_MAX_JOB_BACKLOG: int = 100
+    
+    # Logging: JSON lines written by a background thread; per-request INFO logs sampled
+    LOG_LEVEL: str = "INFO"
+    LOG_SAMPLE_RATE: float = 1.0  # share of requests whose INFO/DEBUG logs are kept
+    LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped, never blocking requests
+    
+    # Tracing: request ID accepted from/echoed in this header, stored on jobs and Apify runs
+    TRACE_HEADER: str = "X-Request-ID"
+    APIFY_TRACE_INPUT_FIELD: str = "traceId"  # run input field carrying the trace ID ("" to omit)
+    
+    # Startup warmup: import heavy deps and open Redis connections in the background
+    WARMUP_ON_STARTUP: bool = True
+    REDIS_WARMUP_CONNECTIONS: int = 4
+    
+    # Admission control for upstream fetches (per worker process)
+    UPSTREAM_MAX_CONCURRENCY: int = 4  # concurrent pytrends/Apify fetches
+    UPSTREAM_MAX_QUEUE: int = 8  # misses waiting for a slot before shedding
+    UPSTREAM_QUEUE_TIMEOUT: float = 30.0  # max seconds a miss waits for a slot
+    OVERLOAD_CONVERT_TO_ASYNC: bool = False  # shed misses become async jobs (202) instead of 503
+    
+    # Incremental refresh: merge only new hours into stored per-keyword profiles
+    INCREMENTAL_REFRESH_ENABLED: bool = True
+    INCREMENTAL_MAX_SPAN_RATIO: float = 1.5  # full rebuild once a profile spans 1.5x the window
+    
+    # Apify run registry: share recent datasets and in-flight runs of the same fetch across workers
+    APIFY_RUN_REUSE_ENABLED: bool = True
+    APIFY_DATASET_REUSE_SECONDS: int = 900  # finished runs' datasets are reused this long
+    APIFY_RUN_TIMEOUT_SECS: int = 600  # actor run timeout (and max wait for a joined run)
+    APIFY_JOIN_START_TIMEOUT: float = 30.0  # max wait for another caller to start its run
+    
+    # Async jobs poll Apify runs without holding a thread and report run status as progress
+    APIFY_POLL_INTERVAL: int = 10  # seconds per status long-poll
+    APIFY_EXPECTED_RUN_SECONDS: float = 120.0  # progress scale for RUNNING runs
+    
+    # Source selection: order pytrends/Apify by rolling success, latency and cost
+    SOURCE_POLICY_ENABLED: bool = True  # False keeps the fixed pytrends -> Apify order
+    SOURCE_POLICY_TIERS: bool = False  # separate statistics for new vs known keywords
+    SOURCE_STATS_ALPHA: float = 0.2  # weight of the newest observation
+    SOURCE_EXPLORE_RATE: float = 0.05  # share of fetches that still try pytrends first
+    SOURCE_COST_WEIGHT_MS: float = 60000.0  # latency (ms) one compute unit is worth
+    APIFY_DAILY_CU_BUDGET: float = 0.0  # compute units per day across workers (0 = unlimited)
+    
+    # Summaries: T5 summarizer on a pool of preloaded inference worker processes
+    SUMMARY_WORKERS: int = 1  # worker processes per API worker (each holds a copy of the model)
+    SUMMARY_QUEUE_DEPTH: int = 8  # requests waiting for a worker before 503
+    SUMMARY_TIMEOUT: float = 60.0  # max seconds a request waits for its summaries
+    SUMMARY_MAX_BATCH: int = 12  # hourly_summary entries per batched generate (3 per request)
+    SUMMARY_BATCH_WAIT_MS: float = 20.0  # max wait for more requests before dispatching a batch
+    SUMMARY_PRELOAD: bool = False  # spawn workers and load the model at startup (else on first use)
+    SUMMARY_TORCH_THREADS: int = 0  # torch threads per worker (0 = torch default)
+    SUMMARY_NUM_BEAMS: int = 4
+    SUMMARY_MAX_LENGTH: int = 512
+    SUMMARY_INFERENCE_DIR: str = ""  # defaults to Summarization/inference
+    SUMMARY_MODEL_PATH: str = ""  # local dir or Hub ID (default: the loader's Hub model)
+    SUMMARY_MODEL_SUBFOLDER: str = "stage2"
+    SUMMARY_BACKEND: str = "pytorch"  # "onnx" runs an export_onnx.py export on ONNX Runtime
+    SUMMARY_ONNX_PATH: str = ""  # export directory for the onnx backend
+    HF_TOKEN: str = ""
+    SUMMARY_MODEL_VERSION: str = ""  # part of summary cache keys; bump when the model or its input format changes
+    
+    # Summary cache: content-addressed (model version + decoding options + model input)
+    SUMMARY_CACHE_ENABLED: bool = True
+    SUMMARY_CACHE_SIZE: int = 1024  # in-process LRU entries per worker
+    SUMMARY_CACHE_REDIS: bool = True  # shared Redis tier behind the LRU
+    SUMMARY_CACHE_TTL: int = 604800  # 7 days
+    
+    # Negative cache: remember keywords with no trend data for a short time
+    NEGATIVE_CACHE_ENABLED: bool = True
+    NEGATIVE_CACHE_TTL: int = 3600  # 1 hour
+    NEGATIVE_FILTER_CAPACITY: int = 10000
+    NEGATIVE_FILTER_ERROR_RATE: float = 0.01
+    
+    # Probabilistic early refresh (XFetch) of hot entries before the 24h boundary
+    XFETCH_ENABLED: bool = True
+    XFETCH_BETA: float = 1.0  # >1 refreshes earlier, <1 later
+    XFETCH_DEFAULT_DELTA: float = 15.0  # assumed fetch seconds for entries without a recorded duration
 
     class Config:
         env_file = ".env"
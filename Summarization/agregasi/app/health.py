@@ -0,0 +1,113 @@
+"""
+Liveness and readiness probes.
+
+Readiness checks Redis round-trip latency, connection pool utilization,
+upstream fetch capacity, the global quota and the async job backlog. The
+result is cached for HEALTH_CACHE_SECONDS and computed by one caller at a
+time, so load balancer checks add at most one Redis PING per interval.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from redis import RedisError, ConnectionError as RedisConnectionError
+
+from app import services
+from app.config import settings
+from app.jobs import JobManager
+
+
+_started_at = time.time()
+_cache_lock = threading.Lock()
+_cached: Dict[str, Any] = {"at": 0.0, "report": None}
+
+
+def liveness() -> Dict[str, Any]:
+    """Process is up and serving requests (no dependency checks)."""
+    return {"status": "alive", "uptime_seconds": round(time.time() - _started_at, 1)}
+
+
+def _probe_redis() -> Dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        services.redis_client.ping()
+    except (RedisError, RedisConnectionError) as e:
+        return {"ok": False, "error": str(e)}
+    latency_ms = round((time.perf_counter() - started) * 1000, 2)
+    return {"ok": latency_ms <= settings.HEALTH_MAX_REDIS_LATENCY_MS, "latency_ms": latency_ms}
+
+
+def _probe_pool() -> Dict[str, Any]:
+    if settings.REDIS_CLUSTER_ENABLED:
+        # Per-node pools are managed by RedisCluster
+        return {"ok": True, "mode": "cluster"}
+    pool = services.redis_client.connection_pool
+    in_use = len(getattr(pool, "_in_use_connections", ()))
+    utilization = in_use / pool.max_connections if pool.max_connections else 0.0
+    return {
+        "ok": utilization < settings.HEALTH_MAX_POOL_UTILIZATION,
+        "in_use": in_use,
+        "max": pool.max_connections,
+        "utilization": round(utilization, 3)
+    }
+
+
+def _probe_upstream() -> Dict[str, Any]:
+    admission = services.upstream_admission
+    return {
+        # Queue full: every new miss in this worker is shed
+        "ok": admission.waiting < admission.max_queue or admission.max_queue == 0,
+        "active": admission.active,
+        "queued": admission.waiting,
+        "max_concurrent": admission.max_concurrent,
+        "max_queue": admission.max_queue
+    }
+
+
+def _probe_quota() -> Dict[str, Any]:
+    # Shared by all workers, so it is reported but never fails readiness
+    try:
+        used = int(services.redis_client.get(f"usage:global:{datetime.now():%Y-%m-%d}") or 0)
+    except (RedisError, RedisConnectionError, ValueError):
+        return {"breaker": "unknown"}
+    return {
+        "breaker": "open" if used >= settings.GLOBAL_RATE_LIMIT else "closed",
+        "used": used,
+        "limit": settings.GLOBAL_RATE_LIMIT
+    }
+
+
+def _probe_jobs() -> Dict[str, Any]:
+    backlog = JobManager.backlog()
+    return {"ok": backlog <= settings.HEALTH_MAX_JOB_BACKLOG, "backlog": backlog, "max": settings.HEALTH_MAX_JOB_BACKLOG}
+
+
+def _run_probes() -> Dict[str, Any]:
+    checks = {"redis": _probe_redis(), "upstream": _probe_upstream(), "jobs": _probe_jobs()}
+    if checks["redis"]["ok"]:
+        checks["redis_pool"] = _probe_pool()
+        checks["quota"] = _probe_quota()
+    ready = all(check.get("ok", True) for check in checks.values())
+    return {"status": "ready" if ready else "not_ready", "checked_at": time.time(), "checks": checks}
+
+
+def readiness(max_age: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Readiness report, cached for HEALTH_CACHE_SECONDS.
+    
+    Args:
+        max_age: Override the cache lifetime (seconds)
+        
+    Returns:
+        Dict with status ("ready" or "not_ready"), checked_at, cached and
+        per-dependency checks
+    """
+    max_age = settings.HEALTH_CACHE_SECONDS if max_age is None else max_age
+    with _cache_lock:
+        report = _cached["report"]
+        if report is None or time.monotonic() - _cached["at"] >= max_age:
+            report = _run_probes()
+            _cached.update(at=time.monotonic(), report=report)
+            return {**report, "cached": False}
+    return {**report, "cached": True}
@@ -0,0 +1,485 @@
+"""
+Summary generation on a pool of preloaded inference worker processes.
+
+The T5 summarizer (Summarization/inference) needs seconds of CPU per beam
+search, so it never runs in the API process: each worker process loads the
+model once (initializer) and serves batched `generate_batch` calls. The
+event loop only awaits a future.
+
+Concurrent requests are micro-batched: each request's entries join a
+pending batch, which becomes ready once it holds SUMMARY_MAX_BATCH
+entries or its oldest request has waited SUMMARY_BATCH_WAIT_MS. Ready
+batches are dispatched as one `generate_batch` call each, at most one per
+worker at a time; while all workers are busy, new requests keep filling
+the pending batch instead of queueing as separate calls. Outputs are split
+back per request, so callers see the same results as unbatched calls.
+
+Generation is deterministic (no sampling, fixed beams), so summaries are
+cached by content: the key hashes the model version, decoding options and
+the entry fields the model input and post-processing are built from. Keys
+need nothing from the inference package, so a pool that cannot start still
+fails with SummaryUnavailableException. Lookups go to an in-process LRU,
+then Redis; only misses reach the workers. Admission is bounded by
+SUMMARY_WORKERS + SUMMARY_QUEUE_DEPTH requests in flight; beyond that (or
+when the workers cannot start) callers get SummaryUnavailableException,
+which the API turns into a 503 with Retry-After.
+
+torch/transformers are only imported inside the workers, so importing the
+app stays cheap and the API runs without them when summaries are unused.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from redis import RedisError, ConnectionError as RedisConnectionError
+
+from app import services
+from app.config import settings
+from app.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+# Summarization/inference, next to this service
+DEFAULT_INFERENCE_DIR = str(Path(__file__).resolve().parents[2] / "inference")
+
+metrics.describe("summary_requests_total", "Summary generation requests by outcome")
+metrics.describe("summary_inference_seconds_total", "Wall time spent waiting on summary workers")
+metrics.describe("summary_in_flight", "Summary requests running or queued on the worker pool")
+metrics.describe("summary_batches_total", "Batched generate calls dispatched to summary workers")
+metrics.describe("summary_batch_items_total", "hourly_summary entries in dispatched batches")
+metrics.describe("summary_batch_size", "Entries in the last dispatched batch")
+metrics.describe("summary_cache_lookups_total", "Summary cache lookups per entry by result (memory, redis, miss)")
+metrics.describe("summary_cache_saved_seconds_total", "Inference seconds saved by summary cache hits")
+metrics.describe("summary_cache_entries", "Entries in the in-process summary cache")
+
+# Summarizer of this worker process (set by load_summarizer)
+_summarizer = None
+
+
+class SummaryUnavailableException(Exception):
+    """Custom exception for when summaries cannot be generated right now (pool full or down)."""
+
+    def __init__(self, message: str = "", retry_after: int = 5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def load_summarizer(
+    inference_dir: str,
+    model_path: Optional[str],
+    subfolder: str,
+    token: Optional[str],
+    threads: int,
+    backend: str = "pytorch",
+    onnx_path: Optional[str] = None
+) -> None:
+    """
+    Worker initializer: load the model once per process.
+
+    Args:
+        inference_dir: Directory containing summarizer.py and model_loader.py
+        model_path: Local model dir or Hub ID (None for the loader's default)
+        subfolder: "stage1" or "stage2"
+        token: HuggingFace token for private repos
+        threads: torch intra-op threads per worker (0 keeps torch's default)
+        backend: "pytorch" or "onnx" (ONNX Runtime)
+        onnx_path: Directory written by inference/export_onnx.py (onnx backend)
+    """
+    global _summarizer
+    if inference_dir not in sys.path:
+        sys.path.insert(0, inference_dir)
+
+    import torch
+    from model_loader import get_model_loader
+    from summarizer import get_summarizer
+
+    if threads > 0:
+        torch.set_num_threads(threads)
+    get_model_loader(model_path=model_path, subfolder=subfolder, token=token, backend=backend, onnx_path=onnx_path)
+    _summarizer = get_summarizer()
+
+
+def generate(hourly_summaries: List[Dict[str, Any]], max_length: int, num_beams: int) -> List[str]:
+    """Worker task: one batched generation for a keyword's hourly_summary entries."""
+    return _summarizer.generate_batch(hourly_summaries, max_length=max_length, num_beams=num_beams)
+
+
+def _ready() -> bool:
+    """Worker task used to wait until a worker has loaded its model."""
+    return _summarizer is not None
+
+
+# hourly_summary fields read by inference/formatting.py and the Summarizer's
+# post-processing (the rank is not); change SUMMARY_MODEL_VERSION when they change
+MODEL_INPUT_FIELDS = ("day", "time_window", "score", "hourly", "daily_avg", "peak_hour", "peak_value")
+
+
+class SummaryCache:
+    """
+    Content-addressed summary cache: in-process LRU in front of Redis.
+
+    Entries hold the final summary text and the per-entry inference seconds
+    it cost, so hits can report the time they saved. Redis errors degrade
+    to misses.
+    """
+
+    def __init__(self, capacity: int, model_version: str, redis_enabled: bool = True, ttl: int = 7 * 86400):
+        self.capacity = capacity
+        self.model_version = model_version
+        self.redis_enabled = redis_enabled
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, hourly_summary: Dict[str, Any], max_length: int, num_beams: int) -> str:
+        """Cache key: hash of model version, decoding options and the entry's model input fields."""
+        material = json.dumps([
+            self.model_version,
+            max_length,
+            num_beams,
+            {field: hourly_summary.get(field) for field in MODEL_INPUT_FIELDS}
+        ], sort_keys=True)
+        return f"summary:{hashlib.sha256(material.encode('utf-8')).hexdigest()}"
+
+    def get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put_local(self, key: str, entry: Dict[str, Any]) -> None:
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+            metrics.set("summary_cache_entries", len(self._entries))
+
+    def get_redis(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Entries found in Redis (blocking; call off the event loop)."""
+        found = {}
+        try:
+            for key in keys:
+                raw = services.redis_get_with_retry(key, replica_ok=True)
+                if raw:
+                    found[key] = json.loads(raw)
+        except (RedisError, RedisConnectionError, ValueError) as e:
+            logger.warning("Summary cache read failed, treating as miss: %s", e)
+        return found
+
+    def put_redis(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """Store entries in Redis (blocking; call off the event loop)."""
+        try:
+            for key, entry in entries.items():
+                services.redis_set_with_retry(key, json.dumps(entry), ex=self.ttl)
+        except (RedisError, RedisConnectionError) as e:
+            logger.warning("Summary cache write failed: %s", e)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class _PendingBatch:
+    """Requests waiting to be dispatched together (same decoding options)."""
+
+    def __init__(self, options: Tuple[int, int]):
+        self.options = options
+        self.requests: List[Tuple[List[Dict[str, Any]], asyncio.Future]] = []
+        self.size = 0
+        self.ready = False
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class SummaryPool:
+    """
+    Bounded, micro-batching front for a ProcessPoolExecutor of summarizer workers.
+
+    Processes are spawned on first use (or by start()), never at import.
+    A pool whose workers died (BrokenProcessPool) is replaced on the next
+    request. Batching state lives on the event loop (summarize() is only
+    called from coroutines), so it needs no lock.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        queue_depth: int,
+        timeout: float,
+        initializer: Callable[..., None] = load_summarizer,
+        initargs: Sequence[Any] = (),
+        task: Callable[..., List[str]] = generate,
+        max_batch_size: int = 1,
+        max_wait: float = 0.0,
+        cache: Optional[SummaryCache] = None
+    ):
+        self.workers = workers
+        self.capacity = workers + queue_depth
+        self.timeout = timeout
+        self.initializer = initializer
+        self.initargs = tuple(initargs)
+        self.task = task
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.cache = cache
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._pending: List[_PendingBatch] = []
+        self._running_batches = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: workers must not inherit the API's threads, sockets or Redis pool
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self.initializer,
+                    initargs=self.initargs
+                )
+            return self._executor
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def start(self) -> None:
+        """Spawn the workers and load the model in each (blocking; call off the event loop)."""
+        executor = self._get_executor()
+        try:
+            for future in [executor.submit(_ready) for _ in range(self.workers)]:
+                future.result()
+            logger.info("Summary worker pool ready (%s workers)", self.workers)
+        except BrokenProcessPool as e:
+            logger.error("Summary workers failed to start: %s", e)
+            self._discard(executor)
+
+    def shutdown(self) -> None:
+        """Stop the workers, dropping queued requests."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                metrics.inc("summary_requests_total", outcome="rejected")
+                raise SummaryUnavailableException("Summary workers are busy. Please try again later.")
+            self._in_flight += 1
+            metrics.set("summary_in_flight", self._in_flight)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            metrics.set("summary_in_flight", self._in_flight)
+
+    def _enqueue(self, hourly_summaries: List[Dict[str, Any]], options: Tuple[int, int]) -> asyncio.Future:
+        """Add a request to an open batch for `options` (or a new one) and dispatch what is ready."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = next(
+            (b for b in self._pending
+             if b.options == options and b.size + len(hourly_summaries) <= self.max_batch_size),
+            None,
+        )
+        if batch is None:
+            batch = _PendingBatch(options)
+            self._pending.append(batch)
+            if self.max_wait > 0:
+                batch.timer = loop.call_later(self.max_wait, self._mark_ready, batch)
+        batch.requests.append((hourly_summaries, future))
+        batch.size += len(hourly_summaries)
+
+        if batch.size >= self.max_batch_size or self.max_wait <= 0:
+            self._mark_ready(batch)
+        else:
+            self._dispatch()
+        return future
+
+    def _mark_ready(self, batch: _PendingBatch) -> None:
+        batch.ready = True
+        if batch.timer is not None:
+            batch.timer.cancel()
+            batch.timer = None
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Start ready batches, oldest first, while a worker is free."""
+        while self._running_batches < self.workers:
+            batch = next((b for b in self._pending if b.ready), None)
+            if batch is None:
+                return
+            self._pending.remove(batch)
+            # Callers that already gave up (timeout) are left out of the batch
+            requests = [(items, future) for items, future in batch.requests if not future.done()]
+            if requests:
+                self._running_batches += 1
+                asyncio.ensure_future(self._run_batch(requests, batch.options))
+
+    async def _run_batch(self, requests: List[Tuple[List[Dict[str, Any]], asyncio.Future]], options: Tuple[int, int]) -> None:
+        """Run one batched generation and route each request's slice of the outputs back."""
+        combined = [item for items, _ in requests for item in items]
+        metrics.inc("summary_batches_total")
+        metrics.inc("summary_batch_items_total", len(combined))
+        metrics.set("summary_batch_size", len(combined))
+
+        started = time.perf_counter()
+        try:
+            executor = self._get_executor()
+            try:
+                outputs = await asyncio.wrap_future(executor.submit(self.task, combined, *options))
+            except BaseException as e:
+                if isinstance(e, BrokenProcessPool):
+                    logger.error("Summary worker pool is broken, restarting it: %s", e)
+                    self._discard(executor)
+                for _, future in requests:
+                    if not future.done():
+                        future.set_exception(e)
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                return
+
+            item_seconds = (time.perf_counter() - started) / len(combined)
+            offset = 0
+            for items, future in requests:
+                if not future.done():
+                    future.set_result((outputs[offset:offset + len(items)], item_seconds))
+                offset += len(items)
+        finally:
+            self._running_batches -= 1
+            self._dispatch()
+
+    async def summarize(
+        self,
+        hourly_summaries: List[Dict[str, Any]],
+        max_length: int = 512,
+        num_beams: int = 4
+    ) -> List[str]:
+        """
+        Generate one summary per hourly_summary entry on a worker process.
+
+        Cached entries are answered without a worker; the rest may be
+        batched with concurrent requests (see module docstring).
+
+        Args:
+            hourly_summaries: process_data()["hourly_summary"]
+            max_length: Maximum generation length in tokens
+            num_beams: Beam width
+
+        Returns:
+            Summaries in input order
+
+        Raises:
+            SummaryUnavailableException: If the pool is full, down or too slow
+        """
+        if not hourly_summaries:
+            return []
+        if self.cache is None:
+            summaries, _ = await self._generate(hourly_summaries, max_length, num_beams)
+            return summaries
+
+        keys = [self.cache.key(item, max_length, num_beams) for item in hourly_summaries]
+        entries: Dict[str, Dict[str, Any]] = {}
+        for key in keys:
+            entry = self.cache.get_local(key)
+            if entry is not None:
+                entries[key] = entry
+                metrics.inc("summary_cache_lookups_total", result="memory")
+                metrics.inc("summary_cache_saved_seconds_total", entry.get("seconds", 0.0))
+
+        remote = [key for key in dict.fromkeys(keys) if key not in entries]
+        if remote and self.cache.redis_enabled:
+            for key, entry in (await run_in_threadpool(self.cache.get_redis, remote)).items():
+                entries[key] = entry
+                self.cache.put_local(key, entry)
+                metrics.inc("summary_cache_lookups_total", result="redis")
+                metrics.inc("summary_cache_saved_seconds_total", entry.get("seconds", 0.0))
+
+        missing = [i for i, key in enumerate(keys) if key not in entries]
+        if missing:
+            metrics.inc("summary_cache_lookups_total", len(missing), result="miss")
+            texts, item_seconds = await self._generate([hourly_summaries[i] for i in missing], max_length, num_beams)
+            generated = {}
+            for i, text in zip(missing, texts):
+                generated[keys[i]] = {"text": text, "seconds": round(item_seconds, 3)}
+                self.cache.put_local(keys[i], generated[keys[i]])
+            entries.update(generated)
+            if self.cache.redis_enabled:
+                await run_in_threadpool(self.cache.put_redis, generated)
+
+        return [entries[key]["text"] for key in keys]
+
+    async def _generate(
+        self,
+        hourly_summaries: List[Dict[str, Any]],
+        max_length: int,
+        num_beams: int
+    ) -> Tuple[List[str], float]:
+        """Run entries through the (batched) workers; returns summaries and seconds per entry."""
+        self._admit()
+        started = time.perf_counter()
+        try:
+            future = self._enqueue(hourly_summaries, (max_length, num_beams))
+            try:
+                summaries, item_seconds = await asyncio.wait_for(future, self.timeout)
+            except BrokenProcessPool:
+                metrics.inc("summary_requests_total", outcome="error")
+                raise SummaryUnavailableException("Summary workers are unavailable. Please try again later.", retry_after=30)
+            except asyncio.TimeoutError:
+                # The worker finishes the batch anyway; the caller stops waiting
+                metrics.inc("summary_requests_total", outcome="timeout")
+                raise SummaryUnavailableException("Summary generation timed out. Please try again later.")
+        finally:
+            metrics.inc("summary_inference_seconds_total", round(time.perf_counter() - started, 3))
+            self._release()
+
+        metrics.inc("summary_requests_total", outcome="ok")
+        return summaries, item_seconds
+
+
+summary_pool = SummaryPool(
+    settings.SUMMARY_WORKERS,
+    settings.SUMMARY_QUEUE_DEPTH,
+    settings.SUMMARY_TIMEOUT,
+    initargs=(
+        settings.SUMMARY_INFERENCE_DIR or DEFAULT_INFERENCE_DIR,
+        settings.SUMMARY_MODEL_PATH or None,
+        settings.SUMMARY_MODEL_SUBFOLDER,
+        settings.HF_TOKEN or os.environ.get("HF_TOKEN") or None,
+        settings.SUMMARY_TORCH_THREADS,
+        settings.SUMMARY_BACKEND,
+        settings.SUMMARY_ONNX_PATH or None
+    ),
+    max_batch_size=settings.SUMMARY_MAX_BATCH,
+    max_wait=settings.SUMMARY_BATCH_WAIT_MS / 1000,
+    cache=SummaryCache(
+        settings.SUMMARY_CACHE_SIZE,
+        settings.SUMMARY_MODEL_VERSION or f"{settings.SUMMARY_MODEL_PATH or 'default'}@{settings.SUMMARY_MODEL_SUBFOLDER}",
+        redis_enabled=settings.SUMMARY_CACHE_REDIS,
+        ttl=settings.SUMMARY_CACHE_TTL
+    ) if settings.SUMMARY_CACHE_ENABLED else None
+)
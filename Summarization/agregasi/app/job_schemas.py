@@ -43,6 +43,7 @@ class JobStatusResponse(BaseModel):
     updated_at: float = Field(..., description="Unix timestamp of last update")
     result: Optional[Dict[str, Any]] = Field(None, description="Result data (only when completed)")
     error: Optional[str] = Field(None, description="Error message (only when failed)")
+    trace_id: Optional[str] = Field(None, description="Trace ID of the request that created the job")
     
     class Config:
         json_schema_extra = {
@@ -55,6 +56,7 @@ class JobStatusResponse(BaseModel):
                 "created_at": 1704844800.0,
                 "updated_at": 1704844850.0,
                 "result": None,
-                "error": None
+                "error": None,
+                "trace_id": "4bf92f3577b34da6a3ce929d0e0e4736"
             }
         }
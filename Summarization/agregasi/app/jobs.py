@@ -2,13 +2,29 @@
 Job management for async predictions.
 Stores job status and results in Redis.
 """
+import math
 import uuid
 import json
+import threading
 import time
 from typing import Optional, Dict, Any
 from datetime import datetime
 
-from .services import redis_client, logger
+from fastapi.concurrency import run_in_threadpool
+
+from .config import settings
+from .metrics import metrics
+from .services import (
+    redis_client,
+    redis_get_with_retry,
+    hash_tag,
+    normalize_keyword,
+    logger,
+    ApifyRunPending,
+    APIFY_ACTIVE_STATUSES,
+    complete_apify_run
+)
+from . import services
 
 
 class JobStatus:
@@ -25,22 +41,66 @@ class JobManager:
     JOB_TTL = 3600  # Jobs expire after 1 hour
     JOB_PREFIX = "job:"
     
+    # Jobs created by this worker that have not finished (they run as its background tasks)
+    _backlog = 0
+    _backlog_lock = threading.Lock()
+    
+    @staticmethod
+    def _track(delta: int) -> None:
+        with JobManager._backlog_lock:
+            JobManager._backlog = max(0, JobManager._backlog + delta)
+    
+    @staticmethod
+    def backlog() -> int:
+        """Number of jobs created by this worker that are pending or processing."""
+        return JobManager._backlog
+    
+    @staticmethod
+    def job_key(job_id: str) -> str:
+        """
+        Redis key of a job.
+        
+        In cluster mode job ids are "{keyword}.{uuid}" and the key carries the
+        keyword's hash tag, so a job lives on the same shard as its trend and
+        lock keys.
+        """
+        keyword, sep, job_uuid = job_id.rpartition(".")
+        if sep and settings.REDIS_CLUSTER_ENABLED:
+            return f"{JobManager.JOB_PREFIX}{hash_tag(keyword)}:{job_uuid}"
+        return f"{JobManager.JOB_PREFIX}{job_id}"
+    
     @staticmethod
-    def create_job(keyword: str) -> str:
+    def create_job(
+        keyword: str,
+        timeframe: str = "7d",
+        geo: str = "ID",
+        tz: str = "Asia/Jakarta",
+        trace_id: Optional[str] = None
+    ) -> str:
         """
         Create a new job and store in Redis.
         
         Args:
             keyword: Search keyword for the job
+            timeframe: Lookback window for the job
+            geo: Google Trends region for the job
+            tz: Reporting timezone for the job
+            trace_id: Trace ID of the creating request
             
         Returns:
             job_id: Unique identifier for the job
         """
         job_id = str(uuid.uuid4())
+        if settings.REDIS_CLUSTER_ENABLED:
+            job_id = f"{normalize_keyword(keyword)}.{job_id}"
         
         job_data = {
             "job_id": job_id,
             "keyword": keyword,
+            "timeframe": timeframe,
+            "geo": geo,
+            "tz": tz,
+            "trace_id": trace_id,
             "status": JobStatus.PENDING,
             "created_at": time.time(),
             "updated_at": time.time(),
@@ -49,31 +109,47 @@ class JobManager:
         }
         
         redis_client.setex(
-            f"{JobManager.JOB_PREFIX}{job_id}",
+            JobManager.job_key(job_id),
             JobManager.JOB_TTL,
             json.dumps(job_data)
         )
         
-        logger.info(f"Job created: {job_id} for keyword: {keyword}")
+        JobManager._track(1)
+        logger.info("Job created: %s for keyword: %s", job_id, keyword)
         return job_id
     
     @staticmethod
-    def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    def get_job(job_id: str, replica_ok: bool = False) -> Optional[Dict[str, Any]]:
         """
         Get job data from Redis.
         
         Args:
             job_id: Job identifier
+            replica_ok: Allow a read replica to answer (status polls)
             
         Returns:
             Job data dict or None if not found
         """
-        job_data = redis_client.get(f"{JobManager.JOB_PREFIX}{job_id}")
+        if replica_ok:
+            job_data = redis_get_with_retry(JobManager.job_key(job_id), replica_ok=True)
+        else:
+            job_data = redis_client.get(JobManager.job_key(job_id))
         
         if job_data:
             return json.loads(job_data)
         return None
     
+    @staticmethod
+    def is_expired(job_id: str) -> bool:
+        """
+        Whether a job is gone or older than JOB_TTL.
+        
+        Updates refresh the key's TTL, so a job that keeps reporting progress
+        is judged by its creation time.
+        """
+        job_data = JobManager.get_job(job_id)
+        return job_data is None or time.time() - job_data.get("created_at", 0) > JobManager.JOB_TTL
+    
     @staticmethod
     def update_job(job_id: str, updates: Dict[str, Any]) -> None:
         """
@@ -85,7 +161,7 @@ class JobManager:
         """
         job_data = JobManager.get_job(job_id)
         if not job_data:
-            logger.error(f"Job not found: {job_id}")
+            logger.error("Job not found: %s", job_id)
             return
         
         # Update fields
@@ -94,12 +170,12 @@ class JobManager:
         
         # Save back to Redis
         redis_client.setex(
-            f"{JobManager.JOB_PREFIX}{job_id}",
+            JobManager.job_key(job_id),
             JobManager.JOB_TTL,
             json.dumps(job_data)
         )
         
-        logger.info(f"Job updated: {job_id}, status: {job_data.get('status')}")
+        logger.info("Job updated: %s, status: %s", job_id, job_data.get('status'))
     
     @staticmethod
     def set_processing(job_id: str) -> None:
@@ -121,6 +197,7 @@ class JobManager:
     @staticmethod
     def set_completed(job_id: str, result_data: Dict[str, Any]) -> None:
         """Mark job as completed with results."""
+        JobManager._track(-1)
         JobManager.update_job(job_id, {
             "status": JobStatus.COMPLETED,
             "progress": 100,
@@ -131,9 +208,76 @@ class JobManager:
     @staticmethod
     def set_failed(job_id: str, error: str) -> None:
         """Mark job as failed with error message."""
+        JobManager._track(-1)
         JobManager.update_job(job_id, {
             "status": JobStatus.FAILED,
             "progress": 0,
             "message": f"Failed: {error}",
             "error": error
         })
+
+
+metrics.describe("apify_runs_aborted_total", "Apify runs aborted because the job that started them expired")
+
+# Job progress while an Apify run is pending: READY maps to the start of the
+# range, RUNNING approaches the end as elapsed time passes the expected duration
+APIFY_PROGRESS_START = 35
+APIFY_PROGRESS_END = 75
+
+
+def apify_progress(status: str, elapsed: float, expected: float) -> int:
+    """Job progress (APIFY_PROGRESS_START-APIFY_PROGRESS_END) for a pending Apify run."""
+    if status != "RUNNING":
+        return APIFY_PROGRESS_START
+    share = 1 - math.exp(-max(elapsed, 0.0) / max(expected, 1.0))
+    return APIFY_PROGRESS_START + 5 + int((APIFY_PROGRESS_END - APIFY_PROGRESS_START - 5) * share)
+
+
+async def watch_apify_run(job_id: str, pending: ApifyRunPending) -> Optional[Dict[str, Any]]:
+    """
+    Wait for a deferred Apify run without holding a thread.
+    
+    Long-polls the run (APIFY_POLL_INTERVAL seconds per request) with the
+    asyncio client and reports its status, elapsed time and dataset item
+    count as job progress (job and run registry writes go through the
+    threadpool, as they block on Redis). If the job has expired in the meantime, a run
+    this job started is aborted.
+    
+    Args:
+        job_id: Job waiting on the run
+        pending: The ApifyRunPending raised by the fetch
+        
+    Returns:
+        The finished run (also handed to the retried fetch), or None if the
+        job expired
+    """
+    run_id = pending.run["id"]
+    run_client = services.apify_async_client.run(run_id)
+    dataset_client = services.apify_async_client.dataset(pending.run["defaultDatasetId"])
+    started = time.time()
+    logger.info("Job %s waiting on Apify run %s", job_id, run_id)
+    
+    while True:
+        run = await run_client.wait_for_finish(wait_secs=settings.APIFY_POLL_INTERVAL) or {}
+        status = run.get("status", pending.run.get("status", "READY"))
+        if status not in APIFY_ACTIVE_STATUSES:
+            await run_in_threadpool(complete_apify_run, pending, run)
+            logger.info("Apify run %s finished with status %s for job %s", run_id, status, job_id)
+            return run
+        
+        if await run_in_threadpool(JobManager.is_expired, job_id):
+            if pending.started:
+                await run_client.abort()
+                await run_in_threadpool(complete_apify_run, pending, {"status": "ABORTED"})
+                metrics.inc("apify_runs_aborted_total")
+                logger.warning("Job %s expired, aborted Apify run %s", job_id, run_id)
+            return None
+        
+        dataset = await dataset_client.get() or {}
+        elapsed = time.time() - started
+        await run_in_threadpool(
+            JobManager.set_progress,
+            job_id,
+            apify_progress(status, elapsed, settings.APIFY_EXPECTED_RUN_SECONDS),
+            f"Apify run {status.lower()} ({int(elapsed)}s, {dataset.get('itemCount', 0)} items)"
+        )
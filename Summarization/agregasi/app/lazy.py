@@ -0,0 +1,67 @@
+"""
+Deferred imports and client construction.
+
+Module-level names in app.services (np, pd, TrendReq, apify_client,
+redis_client, ...) start out as proxies so importing the app stays cheap.
+The first attribute access or call builds the real object and rebinds the
+module global to it, so later lookups pay no proxy overhead. Tests can
+still patch the names as usual.
+"""
+import importlib
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class LazyObject:
+    """Proxy for an object built by `factory` on first use (thread-safe)."""
+
+    def __init__(self, factory: Callable[[], Any], namespace: Optional[Dict[str, Any]] = None, name: Optional[str] = None):
+        self._factory = factory
+        self._namespace = namespace
+        self._name = name
+        self._lock = threading.Lock()
+        self._target = None
+        self._resolved = False
+
+    def _resolve(self) -> Any:
+        if not self._resolved:
+            with self._lock:
+                if not self._resolved:
+                    self._target = self._factory()
+                    self._resolved = True
+                    # Rebind the module global only if nobody replaced (e.g. patched) it
+                    if self._namespace is not None and self._namespace.get(self._name) is self:
+                        self._namespace[self._name] = self._target
+        return self._target
+
+    @property
+    def is_resolved(self) -> bool:
+        return self._resolved
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._resolve(), attr)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self._resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        state = "resolved" if self._resolved else "pending"
+        return f"<LazyObject {self._name or self._factory!r} ({state})>"
+
+
+def lazy_import(
+    module: str,
+    namespace: Optional[Dict[str, Any]] = None,
+    name: Optional[str] = None,
+    attr: Optional[str] = None
+) -> LazyObject:
+    """Proxy for a module (or one of its attributes) imported on first use."""
+    def factory() -> Any:
+        imported = importlib.import_module(module)
+        return getattr(imported, attr) if attr else imported
+    return LazyObject(factory, namespace, name)
+
+
+def resolve(obj: Any) -> Any:
+    """Force a lazy proxy (no-op for anything else) and return the real object."""
+    return obj._resolve() if isinstance(obj, LazyObject) else obj
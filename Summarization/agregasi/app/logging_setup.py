@@ -0,0 +1,185 @@
+"""
+Structured, non-blocking logging.
+
+Records are rendered as one JSON object per line (time, level, logger,
+message, exception and any `extra=` fields). Application threads only put
+records on a bounded in-memory queue; a QueueListener thread formats and
+writes them, so request threads never block on stderr. When the queue is
+full, records are dropped and counted (`log_records_dropped_total`), so
+logging cannot stall requests.
+
+Per-request INFO/DEBUG logs are sampled at LOG_SAMPLE_RATE. The decision is
+made once per request (begin_request()), so a sampled request keeps all of
+its log lines. Warnings and errors are always kept, and records logged with
+`extra={"always": True}` bypass sampling.
+
+Records logged while a trace ID is bound (app.tracing) get a `trace_id`
+field, captured on the logging thread before the record is queued.
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from app.metrics import metrics
+from app.tracing import current_trace_id
+
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "always"}
+
+_request_sampled: contextvars.ContextVar[Optional[bool]] = contextvars.ContextVar("request_sampled", default=None)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional[logging.Handler] = None
+_setup_lock = threading.Lock()
+
+metrics.describe("log_records_dropped_total", "Log records dropped because the log queue was full")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; `extra=` fields are added as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a LOG_SAMPLE_RATE share of INFO/DEBUG records; WARNING and above always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1.0 or record.levelno >= logging.WARNING or getattr(record, "always", False):
+            return True
+        sampled = _request_sampled.get()
+        if sampled is None:
+            # Outside a request: sample record by record
+            return random.random() < self.rate
+        return sampled
+
+
+class TraceIdFilter(logging.Filter):
+    """Add the bound trace ID (if any) as a `trace_id` field."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "trace_id"):
+            trace_id = current_trace_id()
+            if trace_id is not None:
+                record.trace_id = trace_id
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only interpolate here (args may change after the call); JSON rendering
+        # happens on the writer thread
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc("log_records_dropped_total")
+
+
+class _Listener(logging.handlers.QueueListener):
+    """QueueListener whose stop() waits for room in a full queue instead of raising."""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+def begin_request(rate: float) -> None:
+    """Decide once per request whether its INFO/DEBUG logs are kept."""
+    _request_sampled.set(rate >= 1.0 or random.random() < rate)
+
+
+def configure_logging(
+    level: str = "INFO",
+    sample_rate: float = 1.0,
+    queue_size: int = 10000,
+    stream: Any = None
+) -> logging.handlers.QueueListener:
+    """
+    Route the root logger through a bounded queue to a JSON stream handler.
+
+    Idempotent: later calls replace the previous configuration.
+
+    Args:
+        level: Root log level
+        sample_rate: Share of per-request INFO/DEBUG records kept (0-1)
+        queue_size: Max records waiting to be written
+        stream: Output stream (defaults to stderr)
+
+    Returns:
+        The running QueueListener
+    """
+    global _listener, _handler
+    with _setup_lock:
+        _stop()
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter())
+        records: queue.Queue = queue.Queue(maxsize=queue_size)
+        handler = DroppingQueueHandler(records)
+        handler.addFilter(SamplingFilter(sample_rate))
+        handler.addFilter(TraceIdFilter())
+
+        root = logging.getLogger()
+        root.addHandler(handler)
+        root.setLevel(level.upper())
+
+        _handler = handler
+        _listener = _Listener(records, output, respect_handler_level=True)
+        _listener.start()
+        return _listener
+
+
+def _stop() -> None:
+    global _listener, _handler
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def shutdown_logging() -> None:
+    """Detach the queue handler, flush queued records and stop the writer thread."""
+    with _setup_lock:
+        _stop()
+
+
+atexit.register(shutdown_logging)
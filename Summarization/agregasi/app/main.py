@@ -1,25 +1,70 @@
 import logging
 import sys
-from fastapi import FastAPI, Query, BackgroundTasks, Request, HTTPException
+import threading
+from contextlib import asynccontextmanager
+from typing import Literal, Optional, Tuple
+
+from fastapi import FastAPI, Depends, Query, BackgroundTasks, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 
+from app.config import settings
 from app.schemas import PredictionResponse, MetaData
 from app.job_schemas import JobCreateResponse, JobStatusResponse
-from app.services import get_prediction_swr, DataNotFoundException, DataValidationException
-from app.jobs import JobManager, JobStatus
+from app.services import (
+    get_prediction_swr,
+    check_rate_limits,
+    resolve_client,
+    get_cached_response_body,
+    public_prediction_data,
+    resolve_locale,
+    DataNotFoundException,
+    DataValidationException,
+    UpstreamOverloadedException,
+    UpstreamBudgetExhaustedException,
+    ApifyRunPending,
+    defer_apify_runs,
+    warmup
+)
+from app import health
+from app.inference import SummaryUnavailableException, summary_pool
+from app.jobs import JobManager, JobStatus, watch_apify_run
+from app.logging_setup import begin_request, configure_logging, shutdown_logging
+from app.metrics import metrics
+from app.tracing import TraceMiddleware, current_trace_id, trace_context
 
-# Setup logging
+# Setup logging: JSON lines via a background writer thread
+configure_logging(settings.LOG_LEVEL, settings.LOG_SAMPLE_RATE, settings.LOG_QUEUE_SIZE)
 logger = logging.getLogger(__name__)
 
 # Suppress traceback for reload-related errors in development
 sys.tracebacklimit = 0 if "uvicorn" in sys.argv[0] else None
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start warmup in the background so the worker accepts requests immediately."""
+    if settings.WARMUP_ON_STARTUP:
+        threading.Thread(target=warmup, name="warmup", daemon=True).start()
+    if settings.SUMMARY_PRELOAD:
+        threading.Thread(target=summary_pool.start, name="summary-preload", daemon=True).start()
+    yield
+    summary_pool.shutdown()
+    shutdown_logging()
+
+
+async def sample_request_logs():
+    """Make the per-request log sampling decision (kept for the whole request)."""
+    begin_request(settings.LOG_SAMPLE_RATE)
+
+
 # Initialize FastAPI application
 app = FastAPI(
     title="Google Trends Prediction API",
     description="Google Trends Analytics",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    dependencies=[Depends(sample_request_logs)]
 )
 
 # Add CORS middleware
@@ -29,14 +74,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[settings.TRACE_HEADER],
 )
 
+# Bind a trace ID (X-Request-ID or generated) for logs, jobs and upstream calls
+app.add_middleware(TraceMiddleware, header=settings.TRACE_HEADER)
+
 
 # Global exception handler for DataNotFoundException
 @app.exception_handler(DataNotFoundException)
 async def data_not_found_exception_handler(request: Request, exc: DataNotFoundException):
     """Handle DataNotFoundException and return 404 JSON response."""
-    logger.error(f"Data not found: {str(exc)}")
+    logger.error("Data not found: %s", exc)
     return JSONResponse(
         status_code=404,
         content={
@@ -51,7 +100,7 @@ async def data_not_found_exception_handler(request: Request, exc: DataNotFoundEx
 @app.exception_handler(DataValidationException)
 async def data_validation_exception_handler(request: Request, exc: DataValidationException):
     """Handle DataValidationException and return 422 JSON response."""
-    logger.error(f"Data validation failed: {str(exc)}")
+    logger.error("Data validation failed: %s", exc)
     return JSONResponse(
         status_code=422,
         content={
@@ -62,6 +111,54 @@ async def data_validation_exception_handler(request: Request, exc: DataValidatio
     )
 
 
+# Global exception handler for UpstreamOverloadedException
+@app.exception_handler(UpstreamOverloadedException)
+async def upstream_overloaded_exception_handler(request: Request, exc: UpstreamOverloadedException):
+    """Handle UpstreamOverloadedException (load shedding) and return 503 JSON response."""
+    logger.warning("Request shed: %s", exc)
+    return JSONResponse(
+        status_code=503,
+        content={
+            "status": "error",
+            "message": str(exc),
+            "detail": "Too many new keywords are being fetched. Retry later or use /predict/async"
+        },
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+# Global exception handler for UpstreamBudgetExhaustedException
+@app.exception_handler(UpstreamBudgetExhaustedException)
+async def upstream_budget_exhausted_exception_handler(request: Request, exc: UpstreamBudgetExhaustedException):
+    """Handle UpstreamBudgetExhaustedException (daily Apify budget spent) and return 503 JSON response."""
+    logger.warning("Upstream budget exhausted: %s", exc)
+    return JSONResponse(
+        status_code=503,
+        content={
+            "status": "error",
+            "message": str(exc),
+            "detail": "New keywords cannot be fetched until the daily upstream budget resets. Cached keywords are still served"
+        },
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+# Global exception handler for SummaryUnavailableException
+@app.exception_handler(SummaryUnavailableException)
+async def summary_unavailable_exception_handler(request: Request, exc: SummaryUnavailableException):
+    """Handle SummaryUnavailableException (inference pool full or down) and return 503 JSON response."""
+    logger.warning("Summary request rejected: %s", exc)
+    return JSONResponse(
+        status_code=503,
+        content={
+            "status": "error",
+            "message": str(exc),
+            "detail": "Summary workers are busy. Retry later or use /predict/summary/async"
+        },
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
 @app.get("/health")
 async def health_check():
     """
@@ -73,9 +170,70 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/health/live")
+async def health_live():
+    """
+    Liveness probe: the process is up and the event loop responds.
+    
+    Returns:
+        Dictionary with status and uptime
+    """
+    return health.liveness()
+
+
+@app.get("/health/ready")
+async def health_ready():
+    """
+    Readiness probe: Redis latency, pool utilization, upstream capacity,
+    quota breaker and job backlog. Results are cached for a few seconds.
+    
+    Returns:
+        Readiness report (503 when the worker should get no traffic)
+    """
+    report = await run_in_threadpool(health.readiness)
+    return JSONResponse(status_code=200 if report["status"] == "ready" else 503, content=report)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(request: Request):
+    """
+    Metrics endpoint (Prometheus text format, per worker process).
+    
+    Scrapers that accept application/openmetrics-text get the OpenMetrics
+    format, which includes trace ID exemplars on counters.
+    
+    Returns:
+        Plain text metrics
+    """
+    if "application/openmetrics-text" in request.headers.get("accept", ""):
+        return PlainTextResponse(
+            metrics.render(openmetrics=True),
+            media_type="application/openmetrics-text; version=1.0.0; charset=utf-8"
+        )
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def client_identity(request: Request) -> Tuple[str, str]:
+    """Rate limit identity: X-API-Key if known, else the client IP (X-Real-IP from nginx)."""
+    client_ip = request.headers.get("X-Real-IP") or (request.client.host if request.client else None)
+    return resolve_client(request.headers.get("X-API-Key"), client_ip)
+
+
+def validate_locale(geo: str, tz: Optional[str]) -> Tuple[str, str]:
+    """Resolve geo/tz query params, returning 422 for unknown values."""
+    try:
+        return resolve_locale(geo, tz)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
 @app.get("/predict", response_model=PredictionResponse)
 async def predict(
+    request: Request,
     keyword: str = Query(..., min_length=2, max_length=100, description="Search keyword"),
+    timeframe: Literal["7d", "30d", "90d"] = Query("7d", description="Lookback window"),
+    geo: str = Query("ID", min_length=2, max_length=2, description="Google Trends region (country code)"),
+    tz: Optional[str] = Query(None, description="IANA timezone for days/hours (default: the geo's timezone)"),
     background_tasks: BackgroundTasks = BackgroundTasks()
 ):
     """
@@ -83,22 +241,50 @@ async def predict(
     
     Args:
         keyword: Search keyword\n
+        timeframe: Lookback window (7d, 30d or 90d)\n
+        geo: Country code, e.g. ID, MY, PH\n
+        tz: Timezone, e.g. Asia/Manila\n
         
     Returns:
         PredictionResponse
     """
-    logger.info(f"Predict endpoint called with keyword: {keyword}")
+    logger.info("Predict endpoint called with keyword: %s", keyword)
+    geo, tz = validate_locale(geo, tz)
     
-    # Get prediction data using SWR pattern
-    data, source, stats = get_prediction_swr(keyword, background_tasks)
+    # Global quota and per-client limit in one Redis roundtrip
+    await run_in_threadpool(check_rate_limits, *client_identity(request))
     
-    # Remove score from recommendations before sending to user
-    if "recommendations" in data:
-        for rec in data["recommendations"]:
-            rec.pop("score", None)
+    # Fast path: fresh hit served from the pre-serialized body, no validation/encoding.
+    # The lookup is a blocking Redis read with retries (and may take the refresh lock),
+    # so it runs in the threadpool as well
+    body = await run_in_threadpool(get_cached_response_body, keyword, timeframe, geo, tz, background_tasks)
+    if body is not None:
+        return Response(content=body, media_type="application/json", headers={"X-Cache": "hit"})
+    
+    # Get prediction data using SWR pattern. Misses can block for minutes, so run
+    # off the event loop to keep hits flowing
+    try:
+        data, source, stats = await run_in_threadpool(
+            get_prediction_swr, keyword, background_tasks, timeframe, geo, tz, check_rate_limit=False
+        )
+    except UpstreamOverloadedException:
+        if not settings.OVERLOAD_CONVERT_TO_ASYNC:
+            raise
+        # Shed miss becomes an async job (it waits for a fetch slot in the background)
+        trace_id = current_trace_id()
+        job_id = JobManager.create_job(keyword, timeframe, geo, tz, trace_id=trace_id)
+        background_tasks.add_task(process_job_async, job_id, keyword, timeframe, geo, tz, trace_id)
+        logger.info("Upstream overloaded, converted request to async job %s: %s", job_id, keyword)
+        job = JobCreateResponse(
+            job_id=job_id,
+            status="pending",
+            message="Server busy. Job created instead, use polling_url to check progress.",
+            polling_url=f"/job/{job_id}"
+        )
+        return JSONResponse(status_code=202, content=job.model_dump())
     
-    # Remove chart_data from response (not needed in API output)
-    data.pop("chart_data", None)
+    # Remove score and chart_data (not needed in API output)
+    data = public_prediction_data(data)
     
     # Build response
     response = PredictionResponse(
@@ -106,46 +292,186 @@ async def predict(
         meta=MetaData(
             keyword=keyword,
             source=source,
+            timeframe=timeframe,
+            geo=geo,
+            tz=tz,
+            apify_stats=stats
+        ),
+        data=data
+    )
+    
+    logger.info("Successfully processed prediction for: %s", keyword)
+    return response
+
+
+async def add_summaries(data: dict) -> dict:
+    """
+    Generate a summary per recommendation on the inference worker pool.
+    
+    Returns:
+        A copy of data with `summaries` (rank, day, time_window, summary)
+    """
+    hourly_summary = data.get("hourly_summary") or []
+    texts = await summary_pool.summarize(
+        hourly_summary,
+        max_length=settings.SUMMARY_MAX_LENGTH,
+        num_beams=settings.SUMMARY_NUM_BEAMS
+    )
+    summaries = [
+        {"rank": item.get("rank"), "day": item["day"], "time_window": item["time_window"], "summary": text}
+        for item, text in zip(hourly_summary, texts)
+    ]
+    return {**data, "summaries": summaries}
+
+
+@app.get("/predict/summary", response_model=PredictionResponse)
+async def predict_summary(
+    request: Request,
+    keyword: str = Query(..., min_length=2, max_length=100, description="Search keyword"),
+    timeframe: Literal["7d", "30d", "90d"] = Query("7d", description="Lookback window"),
+    geo: str = Query("ID", min_length=2, max_length=2, description="Google Trends region (country code)"),
+    tz: Optional[str] = Query(None, description="IANA timezone for days/hours (default: the geo's timezone)"),
+    background_tasks: BackgroundTasks = BackgroundTasks()
+):
+    """
+    Get Google Trends prediction with a generated summary per recommendation.
+    
+    Args:
+        keyword: Search keyword\n
+        timeframe: Lookback window (7d, 30d or 90d)\n
+        geo: Country code, e.g. ID, MY, PH\n
+        tz: Timezone, e.g. Asia/Manila\n
+        
+    Returns:
+        PredictionResponse with data.summaries
+    """
+    logger.info("Summary endpoint called with keyword: %s", keyword)
+    geo, tz = validate_locale(geo, tz)
+    
+    await run_in_threadpool(check_rate_limits, *client_identity(request))
+    
+    data, source, stats = await run_in_threadpool(
+        get_prediction_swr, keyword, background_tasks, timeframe, geo, tz, check_rate_limit=False
+    )
+    
+    # Beam search runs on a worker process; the event loop only awaits it
+    data = public_prediction_data(await add_summaries(data))
+    
+    response = PredictionResponse(
+        status="success",
+        meta=MetaData(
+            keyword=keyword,
+            source=source,
+            timeframe=timeframe,
+            geo=geo,
+            tz=tz,
             apify_stats=stats
         ),
         data=data
     )
     
-    logger.info(f"Successfully processed prediction for: {keyword}")
+    logger.info("Successfully generated summaries for: %s", keyword)
     return response
 
 
 # ====== ASYNC ENDPOINTS ======
 
-def process_job_async(job_id: str, keyword: str):
+async def process_job_async(
+    job_id: str,
+    keyword: str,
+    timeframe: str = "7d",
+    geo: str = "ID",
+    tz: Optional[str] = None,
+    trace_id: Optional[str] = None,
+    summarize: bool = False
+):
     """
     Background task to process job asynchronously.
     
     Args:
         job_id: Unique job identifier
         keyword: Search keyword
+        timeframe: Lookback window
+        geo: Google Trends region
+        tz: Reporting timezone
+        trace_id: Trace ID of the request that created the job
+        summarize: Also generate summaries (/predict/summary/async)
+    """
+    with trace_context(trace_id):
+        await _run_job(job_id, keyword, timeframe, geo, tz, summarize)
+
+
+# Fetch passes per job before falling back to blocking Apify waits (a pass
+# can end on a new pending run when slice boundaries move, e.g. across an hour)
+MAX_DEFERRED_PASSES = 20
+
+
+async def _predict_for_job(
+    job_id: str,
+    keyword: str,
+    timeframe: str,
+    geo: str,
+    tz: Optional[str]
+) -> Optional[Tuple[dict, str, Optional[dict]]]:
+    """
+    Run get_prediction in the threadpool, awaiting Apify runs between passes.
+    
+    Each pass first awaits an upstream fetch slot on the event loop, then
+    runs until it needs an unfinished Apify run (ApifyRunPending), so no
+    thread (or upstream slot) is held while queued or while the actor runs;
+    the next pass reads the finished run's dataset.
+    
+    Returns:
+        get_prediction's result, or None if the job expired while waiting
+    """
+    from app.services import get_prediction, upstream_admission
+    with defer_apify_runs():
+        for _ in range(MAX_DEFERRED_PASSES):
+            try:
+                async with upstream_admission.slot_async():
+                    return await run_in_threadpool(get_prediction, keyword, timeframe, geo, tz, admitted=True)
+            except ApifyRunPending as pending:
+                if await watch_apify_run(job_id, pending) is None:
+                    return None
+        
+        def blocking_pass():
+            with defer_apify_runs(enabled=False):
+                return get_prediction(keyword, timeframe, geo, tz, admitted=True)
+        async with upstream_admission.slot_async():
+            return await run_in_threadpool(blocking_pass)
+
+
+async def _run_job(job_id: str, keyword: str, timeframe: str, geo: str, tz: Optional[str], summarize: bool = False):
+    """
+    Job body for process_job_async (runs with the job's trace ID bound).
+    
+    Runs on the event loop, so job state writes (Redis, with retries) go
+    through the threadpool like every other blocking call.
     """
     try:
         # Mark as processing
-        JobManager.set_processing(job_id)
-        logger.info(f"Job {job_id} started processing keyword: {keyword}")
+        await run_in_threadpool(JobManager.set_processing, job_id)
+        logger.info("Job %s started processing keyword: %s", job_id, keyword)
         
         # Fetch and process data (this takes 60-180s for viral keywords)
-        JobManager.set_progress(job_id, 30, "Fetching from Google Trends...")
+        await run_in_threadpool(JobManager.set_progress, job_id, 30, "Fetching from Google Trends...")
         
-        # Use existing service (no background tasks needed here)
-        from app.services import get_prediction
-        data, source, stats = get_prediction(keyword)
+        # Use existing service; Apify runs are awaited without holding a thread
+        prediction = await _predict_for_job(job_id, keyword, timeframe, geo, tz)
+        if prediction is None:
+            logger.warning("Job %s expired before its Apify run finished", job_id)
+            await run_in_threadpool(JobManager.set_failed, job_id, "Job expired before the upstream fetch finished")
+            return
+        data, source, stats = prediction
         
-        JobManager.set_progress(job_id, 80, "Processing data...")
+        await run_in_threadpool(JobManager.set_progress, job_id, 80, "Processing data...")
         
-        # Remove score from recommendations
-        if "recommendations" in data:
-            for rec in data["recommendations"]:
-                rec.pop("score", None)
+        if summarize:
+            await run_in_threadpool(JobManager.set_progress, job_id, 85, "Generating summaries...")
+            data = await add_summaries(data)
         
-        # Remove chart_data from response (not needed in API output)
-        data.pop("chart_data", None)
+        # Remove score and chart_data (not needed in API output)
+        data = public_prediction_data(data)
         
         # Build result
         result = {
@@ -153,31 +479,46 @@ def process_job_async(job_id: str, keyword: str):
             "meta": {
                 "keyword": keyword,
                 "source": source,
+                "timeframe": timeframe,
+                "geo": geo,
+                "tz": tz,
                 "apify_stats": stats
             },
             "data": data
         }
         
         # Mark as completed
-        JobManager.set_completed(job_id, result)
-        logger.info(f"Job {job_id} completed successfully")
+        await run_in_threadpool(JobManager.set_completed, job_id, result)
+        logger.info("Job %s completed successfully", job_id)
         
     except DataNotFoundException as e:
-        logger.error(f"Job {job_id} failed: Data not found - {str(e)}")
-        JobManager.set_failed(job_id, f"No trend data available: {str(e)}")
+        logger.error("Job %s failed: Data not found - %s", job_id, e)
+        await run_in_threadpool(JobManager.set_failed, job_id, f"No trend data available: {str(e)}")
         
     except DataValidationException as e:
-        logger.error(f"Job {job_id} failed: Validation error - {str(e)}")
-        JobManager.set_failed(job_id, f"Data validation failed: {str(e)}")
+        logger.error("Job %s failed: Validation error - %s", job_id, e)
+        await run_in_threadpool(JobManager.set_failed, job_id, f"Data validation failed: {str(e)}")
+        
+    except UpstreamBudgetExhaustedException as e:
+        logger.error("Job %s failed: Upstream budget exhausted - %s", job_id, e)
+        await run_in_threadpool(JobManager.set_failed, job_id, f"Upstream budget exhausted: {str(e)}")
+        
+    except SummaryUnavailableException as e:
+        logger.error("Job %s failed: Summaries unavailable - %s", job_id, e)
+        await run_in_threadpool(JobManager.set_failed, job_id, f"Summary generation unavailable: {str(e)}")
         
     except Exception as e:
-        logger.error(f"Job {job_id} failed: Unexpected error - {str(e)}")
-        JobManager.set_failed(job_id, f"Unexpected error: {str(e)}")
+        logger.error("Job %s failed: Unexpected error - %s", job_id, e)
+        await run_in_threadpool(JobManager.set_failed, job_id, f"Unexpected error: {str(e)}")
 
 
 @app.post("/predict/async", response_model=JobCreateResponse, status_code=202)
 async def predict_async(
+    request: Request,
     keyword: str = Query(..., min_length=2, max_length=100, description="Search keyword"),
+    timeframe: Literal["7d", "30d", "90d"] = Query("7d", description="Lookback window"),
+    geo: str = Query("ID", min_length=2, max_length=2, description="Google Trends region (country code)"),
+    tz: Optional[str] = Query(None, description="IANA timezone for days/hours (default: the geo's timezone)"),
     background_tasks: BackgroundTasks = BackgroundTasks()
 ):
     """
@@ -185,18 +526,26 @@ async def predict_async(
     
     Args:
         keyword: Search keyword
+        timeframe: Lookback window (7d, 30d or 90d)
+        geo: Country code, e.g. ID, MY, PH
+        tz: Timezone, e.g. Asia/Manila
     Returns:
         JobCreateResponse job_id and polling URL
     """
-    logger.info(f"Async predict endpoint called with keyword: {keyword}")
+    logger.info("Async predict endpoint called with keyword: %s", keyword)
+    geo, tz = validate_locale(geo, tz)
+    
+    # Jobs always run the expensive miss path; limit per client
+    await run_in_threadpool(check_rate_limits, *client_identity(request), include_global=False)
     
     try:
         # Create job
-        job_id = JobManager.create_job(keyword)
-        logger.info(f"Job created successfully: {job_id}")
+        trace_id = current_trace_id()
+        job_id = JobManager.create_job(keyword, timeframe, geo, tz, trace_id=trace_id)
+        logger.info("Job created successfully: %s", job_id)
         
-        # Schedule background processing
-        background_tasks.add_task(process_job_async, job_id, keyword)
+        # Schedule background processing (under the creating request's trace ID)
+        background_tasks.add_task(process_job_async, job_id, keyword, timeframe, geo, tz, trace_id)
         
         return JobCreateResponse(
             job_id=job_id,
@@ -205,13 +554,50 @@ async def predict_async(
             polling_url=f"/job/{job_id}"
         )
     except Exception as e:
-        logger.error(f"Failed to create async job: {str(e)}", exc_info=True)
+        logger.error("Failed to create async job: %s", e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to create job: {str(e)}"
         )
 
 
+@app.post("/predict/summary/async", response_model=JobCreateResponse, status_code=202)
+async def predict_summary_async(
+    request: Request,
+    keyword: str = Query(..., min_length=2, max_length=100, description="Search keyword"),
+    timeframe: Literal["7d", "30d", "90d"] = Query("7d", description="Lookback window"),
+    geo: str = Query("ID", min_length=2, max_length=2, description="Google Trends region (country code)"),
+    tz: Optional[str] = Query(None, description="IANA timezone for days/hours (default: the geo's timezone)"),
+    background_tasks: BackgroundTasks = BackgroundTasks()
+):
+    """
+    Create async job for a prediction with generated summaries.
+    
+    Args:
+        keyword: Search keyword
+        timeframe: Lookback window (7d, 30d or 90d)
+        geo: Country code, e.g. ID, MY, PH
+        tz: Timezone, e.g. Asia/Manila
+    Returns:
+        JobCreateResponse job_id and polling URL
+    """
+    logger.info("Async summary endpoint called with keyword: %s", keyword)
+    geo, tz = validate_locale(geo, tz)
+    
+    await run_in_threadpool(check_rate_limits, *client_identity(request), include_global=False)
+    
+    trace_id = current_trace_id()
+    job_id = JobManager.create_job(keyword, timeframe, geo, tz, trace_id=trace_id)
+    background_tasks.add_task(process_job_async, job_id, keyword, timeframe, geo, tz, trace_id, summarize=True)
+    
+    return JobCreateResponse(
+        job_id=job_id,
+        status="pending",
+        message="Job created. Use polling_url to check progress.",
+        polling_url=f"/job/{job_id}"
+    )
+
+
 @app.get("/job/{job_id}", response_model=JobStatusResponse)
 async def get_job_status(job_id: str):
     """
@@ -226,12 +612,13 @@ async def get_job_status(job_id: str):
     Raises:
         404: Job not found
     """
-    logger.info(f"Job status check for: {job_id}")
+    logger.info("Job status check for: %s", job_id)
     
-    job_data = JobManager.get_job(job_id)
+    # Polls tolerate replica lag; job updates read the primary
+    job_data = JobManager.get_job(job_id, replica_ok=True)
     
     if not job_data:
-        logger.warning(f"Job not found: {job_id}")
+        logger.warning("Job not found: %s", job_id)
         raise HTTPException(
             status_code=404,
             detail="Job not found. Jobs expire after 1 hour."
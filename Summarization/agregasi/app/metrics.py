@@ -0,0 +1,105 @@
+"""
+In-process metrics registry exposed at /metrics (Prometheus text format).
+Counters and gauges are kept per worker process.
+
+Counter increments made while a trace ID is bound (see app.tracing) keep
+the latest one per series as an exemplar; it is rendered in the
+OpenMetrics format (Accept: application/openmetrics-text).
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from app.tracing import current_trace_id
+
+
+LabelSet = Tuple[Tuple[str, str], ...]
+Exemplar = Tuple[str, float, float]  # trace_id, value, unix timestamp
+
+
+class MetricsRegistry:
+    """Thread-safe counters and gauges keyed by name and labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._gauges: Dict[str, Dict[LabelSet, float]] = {}
+        self._help: Dict[str, str] = {}
+        self._exemplars: Dict[str, Dict[LabelSet, Exemplar]] = {}
+
+    @staticmethod
+    def _labels(labels: Dict[str, str]) -> LabelSet:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def describe(self, name: str, help_text: str) -> None:
+        """Register the HELP line for a metric."""
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        """Increment a counter (recording the current trace ID as its exemplar)."""
+        key = self._labels(labels)
+        trace_id = current_trace_id()
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+            if trace_id is not None:
+                self._exemplars.setdefault(name, {})[key] = (trace_id, value, time.time())
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        """Set a gauge."""
+        with self._lock:
+            self._gauges.setdefault(name, {})[self._labels(labels)] = value
+
+    def get(self, name: str, **labels: str) -> float:
+        """Current value of a counter or gauge (0.0 if never recorded)."""
+        key = self._labels(labels)
+        with self._lock:
+            for store in (self._counters, self._gauges):
+                if name in store and key in store[name]:
+                    return store[name][key]
+        return 0.0
+
+    def exemplar(self, name: str, **labels: str) -> Optional[Exemplar]:
+        """Latest (trace_id, value, timestamp) recorded for a counter series."""
+        with self._lock:
+            return self._exemplars.get(name, {}).get(self._labels(labels))
+
+    def reset(self) -> None:
+        """Drop all recorded values (used by tests and benchmarks)."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._exemplars.clear()
+
+    def render(self, openmetrics: bool = False) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Args:
+            openmetrics: Use the OpenMetrics format instead, which carries
+                counter exemplars (counter families drop the _total suffix
+                and the output ends with # EOF)
+        """
+        lines = []
+        with self._lock:
+            for kind, store in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted(store):
+                    family = name[:-len("_total")] if openmetrics and kind == "counter" and name.endswith("_total") else name
+                    if name in self._help:
+                        lines.append(f"# HELP {family} {self._help[name]}")
+                    lines.append(f"# TYPE {family} {kind}")
+                    for labels, value in sorted(store[name].items()):
+                        label_str = ",".join(f'{k}="{v}"' for k, v in labels)
+                        suffix = f"{{{label_str}}}" if label_str else ""
+                        line = f"{name}{suffix} {value:g}"
+                        exemplar = self._exemplars.get(name, {}).get(labels) if openmetrics else None
+                        if exemplar is not None:
+                            trace_id, ex_value, ex_time = exemplar
+                            line += f' # {{trace_id="{trace_id}"}} {ex_value:g} {ex_time:.3f}'
+                        lines.append(line)
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
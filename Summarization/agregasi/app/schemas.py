@@ -10,7 +10,10 @@ class Recommendation(BaseModel):
 
 class MetaData(BaseModel):
     keyword: str
-    source: Literal["pytrends", "apify", "cache"]
+    source: Literal["pytrends", "apify", "cache", "cache_fresh", "live_apify"]
+    timeframe: Literal["7d", "30d", "90d"] = "7d"
+    geo: str = "ID"
+    tz: str = "Asia/Jakarta"
     apify_stats: Optional[Dict[str, Any]] = None
 
 
@@ -1,48 +1,231 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import hashlib
 import json
 import logging
+import math
+import random
 import re
+import threading
 import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager, nullcontext
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Any, Optional
+from typing import AsyncIterator, Callable, Deque, Dict, Iterator, List, Tuple, Any, Optional
 
-import pandas as pd
 import pytz
-from pytrends.request import TrendReq
-from apify_client import ApifyClient
 from fastapi import BackgroundTasks, HTTPException
-from redis import Redis, ConnectionPool, RedisError, ConnectionError as RedisConnectionError
-from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
+from redis import Redis, ConnectionPool, RedisError, WatchError, ConnectionError as RedisConnectionError
+from redis.exceptions import RedisClusterException
+from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type, retry_if_not_exception_type
 
 from app.config import settings
+from app.lazy import LazyObject, lazy_import, resolve
+from app.metrics import metrics
+from app.schemas import PredictionResponse
+from app.tracing import current_trace_id
 
-# logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='{"time": "%(asctime)s", "level": "%(levelname)s", "message": "%(message)s"}'
-)
+# Heavy dependencies are imported on first use (or by warmup() at startup)
+np = lazy_import("numpy", globals(), "np")
+pd = lazy_import("pandas", globals(), "pd")
+TrendReq = lazy_import("pytrends.request", globals(), "TrendReq", attr="TrendReq")
+
+# Handlers are configured by the app entry point (app.logging_setup)
 logger = logging.getLogger(__name__)
 
 
-apify_client = ApifyClient(settings.APIFY_TOKEN)
+def _create_apify_client(client_class: str = "ApifyClient"):
+    """Build the Apify client; APIFY_TOKEN is only required once Apify is used."""
+    if not settings.APIFY_TOKEN:
+        raise RuntimeError("APIFY_TOKEN is not configured")
+    import apify_client as apify
+    return getattr(apify, client_class)(settings.APIFY_TOKEN)
+
 
-# redis connection pool
-redis_pool = ConnectionPool(
-    host=settings.REDIS_HOST,
-    port=settings.REDIS_PORT,
-    db=0,
-    decode_responses=True,
-    max_connections=50,
-    socket_connect_timeout=5,
-    socket_timeout=5,
-    retry_on_timeout=True
+apify_client = LazyObject(_create_apify_client, globals(), "apify_client")
+# asyncio client: async jobs poll Apify runs without holding a thread
+apify_async_client = LazyObject(lambda: _create_apify_client("ApifyClientAsync"), globals(), "apify_async_client")
+
+# redis connection pool (created on first command)
+redis_pool = LazyObject(
+    lambda: ConnectionPool(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=0,
+        decode_responses=True,
+        max_connections=50,
+        socket_connect_timeout=5,
+        socket_timeout=5,
+        retry_on_timeout=True
+    ),
+    globals(),
+    "redis_pool"
 )
 
-redis_client = Redis(connection_pool=redis_pool)
+
+
+def _cluster_nodes() -> List[Any]:
+    """Startup nodes from REDIS_CLUSTER_NODES (falls back to REDIS_HOST:REDIS_PORT)."""
+    from redis.cluster import ClusterNode
+    
+    nodes = []
+    for address in (settings.REDIS_CLUSTER_NODES or f"{settings.REDIS_HOST}:{settings.REDIS_PORT}").split(","):
+        host, _, port = address.strip().rpartition(":")
+        nodes.append(ClusterNode(host, int(port)))
+    return nodes
+
+
+def _create_redis_client():
+    """Primary client: single node by default, RedisCluster when REDIS_CLUSTER_ENABLED."""
+    if settings.REDIS_CLUSTER_ENABLED:
+        from redis.cluster import RedisCluster
+        return RedisCluster(
+            startup_nodes=_cluster_nodes(),
+            decode_responses=True,
+            max_connections=50,
+            socket_connect_timeout=5,
+            socket_timeout=5
+        )
+    return Redis(connection_pool=resolve(redis_pool))
+
+
+def _create_replica_client():
+    """Read client for staleness-tolerant reads, or None if replicas are not configured."""
+    if not settings.REDIS_READ_FROM_REPLICAS:
+        return None
+    if settings.REDIS_CLUSTER_ENABLED:
+        from redis.cluster import RedisCluster
+        return RedisCluster(
+            startup_nodes=_cluster_nodes(),
+            read_from_replicas=True,
+            decode_responses=True,
+            socket_connect_timeout=5,
+            socket_timeout=5
+        )
+    if settings.REDIS_REPLICA_HOST:
+        return Redis(
+            host=settings.REDIS_REPLICA_HOST,
+            port=settings.REDIS_REPLICA_PORT,
+            decode_responses=True,
+            max_connections=50,
+            socket_connect_timeout=5,
+            socket_timeout=5
+        )
+    return None
+
+
+redis_client = LazyObject(_create_redis_client, globals(), "redis_client")
+
+
+def hash_tag(normalized: str) -> str:
+    """
+    Keyword segment of Redis keys.
+    
+    In cluster mode it is wrapped in a hash tag ({keyword}), so the trend,
+    response, profile, lock and job keys of a keyword hash to the same slot
+    and multi-key operations on them stay on one shard. Single-node keys
+    keep the plain form.
+    """
+    return f"{{{normalized}}}" if settings.REDIS_CLUSTER_ENABLED else normalized
+
+
+def _key_client(key: str) -> Any:
+    """Client for WATCH/MULTI on `key`: the primary owning its slot in cluster mode."""
+    if settings.REDIS_CLUSTER_ENABLED:
+        return redis_client.get_redis_connection(redis_client.get_node_from_key(key))
+    return redis_client
+
+
+metrics.describe("redis_replica_lag_seconds", "Worst replication lag seen on read replicas (-1 = link down)")
+metrics.describe("redis_replica_reads_total", "Staleness-tolerant reads by the node type that served them")
+
+
+def _replica_lag(client: Any) -> float:
+    """Worst replication lag (seconds) across the read client's replicas; inf if a link is down."""
+    if settings.REDIS_CLUSTER_ENABLED:
+        from redis.cluster import RedisCluster
+        result = client.info("replication", target_nodes=RedisCluster.REPLICAS)
+        # A single target node returns its INFO dict directly
+        infos = [result] if "role" in result else list(result.values())
+    else:
+        infos = [client.info("replication")]
+    
+    lag = 0.0
+    for info in infos:
+        if info.get("role") != "slave":
+            continue
+        if info.get("master_link_status") != "up":
+            return math.inf
+        lag = max(lag, float(info.get("master_last_io_seconds_ago", math.inf)))
+    return lag
+
+
+class ReplicaRouter:
+    """
+    Route staleness-tolerant reads to replicas while they are within the lag bound.
+    
+    Replication health (master link up, seconds since the last contact with
+    the primary) is checked at most every REDIS_REPLICA_CHECK_INTERVAL. When
+    a replica is lagging, unreachable or not configured, client() returns
+    None and callers read from the primary.
+    """
+    
+    def __init__(self, factory: Callable[[], Any], max_lag: float, check_interval: float):
+        self._factory = factory
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._client = None
+        self._healthy = False
+        self._checked_at = -math.inf
+    
+    def client(self) -> Optional[Any]:
+        """Replica read client, or None to read from the primary."""
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            with self._lock:
+                if time.monotonic() - self._checked_at >= self.check_interval:
+                    self._healthy = self._check()
+                    self._checked_at = time.monotonic()
+        return self._client if self._healthy else None
+    
+    def mark_failed(self) -> None:
+        """Stop using replicas until the next health check."""
+        self._healthy = False
+    
+    def _check(self) -> bool:
+        try:
+            if self._client is None:
+                self._client = self._factory()
+            if self._client is None:
+                return False
+            lag = _replica_lag(self._client)
+        except (RedisError, RedisConnectionError) as e:
+            logger.warning("Replica health check failed: %s", e)
+            lag = math.inf
+        metrics.set("redis_replica_lag_seconds", lag if math.isfinite(lag) else -1)
+        if lag > self.max_lag:
+            logger.warning("Replica reads paused: lag %ss exceeds %ss", lag, self.max_lag)
+            return False
+        return True
+
+
+replica_router = ReplicaRouter(
+    _create_replica_client,
+    settings.REDIS_REPLICA_MAX_LAG_SECONDS,
+    settings.REDIS_REPLICA_CHECK_INTERVAL
+)
 
 
 class DataNotFoundException(Exception):
     """Custom exception for when no data is returned from Apify."""
-    pass
+    
+    def __init__(self, message: str = "", compute_units: float = 0.0):
+        super().__init__(message)
+        # Apify compute units spent finding out there is no data
+        self.compute_units = compute_units
 
 
 class RedisUnavailableException(Exception):
@@ -60,18 +243,66 @@ class PyTrendsUnavailableException(Exception):
     pass
 
 
+class UpstreamOverloadedException(Exception):
+    """Custom exception for when the upstream fetch queue is full (load shedding)."""
+    
+    def __init__(self, message: str = "", retry_after: int = 5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class UpstreamBudgetExhaustedException(Exception):
+    """Custom exception for when pytrends failed and the daily Apify budget is spent."""
+    
+    def __init__(self, message: str = "", retry_after: int = 60):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ApifyRunPending(Exception):
+    """
+    Raised instead of blocking on an Apify run while deferral is active
+    (see defer_apify_runs); the caller waits for the run and retries.
+    """
+    
+    def __init__(self, run_key: str, run: Dict[str, Any], started: bool, normalized: str, apify_timeframe: str, geo: str):
+        self.run_key = run_key
+        self.run = run
+        self.started = started
+        self.normalized = normalized
+        self.apify_timeframe = apify_timeframe
+        self.geo = geo
+        super().__init__(f"Apify run {run.get('id')} pending for {normalized}")
+
+
 @retry(
     retry=retry_if_exception_type((RedisError, RedisConnectionError)),
     stop=stop_after_attempt(3),
     wait=wait_fixed(1),
     reraise=True
 )
-def redis_get_with_retry(key: str) -> Optional[str]:
-    """Get value from Redis with retry logic."""
+def redis_get_with_retry(key: str, replica_ok: bool = False) -> Optional[str]:
+    """
+    Get value from Redis with retry logic.
+    
+    With replica_ok, the read may be served by a replica within the lag
+    bound (cache lookups, job polls); otherwise it goes to the primary.
+    """
+    if replica_ok and settings.REDIS_READ_FROM_REPLICAS:
+        replica = replica_router.client()
+        if replica is not None:
+            try:
+                value = replica.get(key)
+                metrics.inc("redis_replica_reads_total", node="replica")
+                return value
+            except (RedisError, RedisConnectionError) as e:
+                logger.warning("Replica GET failed for key %s, using primary: %s", key, e)
+                replica_router.mark_failed()
+        metrics.inc("redis_replica_reads_total", node="primary")
     try:
         return redis_client.get(key)
     except (RedisError, RedisConnectionError) as e:
-        logger.error(f"Redis GET error for key {key}: {str(e)}")
+        logger.error("Redis GET error for key %s: %s", key, e)
         raise
 
 
@@ -92,7 +323,7 @@ def redis_set_with_retry(key: str, value: str, ex: Optional[int] = None, nx: boo
             else:
                 return redis_client.set(key, value)
     except (RedisError, RedisConnectionError) as e:
-        logger.error(f"Redis SET error for key {key}: {str(e)}")
+        logger.error("Redis SET error for key %s: %s", key, e)
         raise
 
 
@@ -107,7 +338,7 @@ def redis_incr_with_retry(key: str) -> int:
     try:
         return redis_client.incr(key)
     except (RedisError, RedisConnectionError) as e:
-        logger.error(f"Redis INCR error for key {key}: {str(e)}")
+        logger.error("Redis INCR error for key %s: %s", key, e)
         raise
 
 
@@ -122,7 +353,7 @@ def redis_expire_with_retry(key: str, seconds: int) -> bool:
     try:
         return redis_client.expire(key, seconds)
     except (RedisError, RedisConnectionError) as e:
-        logger.error(f"Redis EXPIRE error for key {key}: {str(e)}")
+        logger.error("Redis EXPIRE error for key %s: %s", key, e)
         raise
 
 
@@ -137,7 +368,97 @@ def redis_delete_with_retry(key: str) -> int:
     try:
         return redis_client.delete(key)
     except (RedisError, RedisConnectionError) as e:
-        logger.error(f"Redis DELETE error for key {key}: {str(e)}")
+        logger.error("Redis DELETE error for key %s: %s", key, e)
+        raise
+
+
+@retry(
+    retry=retry_if_exception_type((RedisError, RedisConnectionError)),
+    stop=stop_after_attempt(3),
+    wait=wait_fixed(1),
+    reraise=True
+)
+def redis_compare_and_with_retry(key: str, expected: str, action: Callable[[Any], Any]) -> bool:
+    """
+    Run `action(pipe)` in a transaction only if `key` still holds `expected`.
+    
+    Uses WATCH/MULTI, so the check and the action are atomic with respect
+    to other clients (a concurrent change to the key retries the check).
+    
+    Returns:
+        True if the value matched and the action was applied
+    """
+    try:
+        with _key_client(key).pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    if pipe.get(key) != expected:
+                        pipe.unwatch()
+                        return False
+                    pipe.multi()
+                    action(pipe)
+                    pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+    except (RedisError, RedisConnectionError) as e:
+        logger.error("Redis compare-and-set error for key %s: %s", key, e)
+        raise
+
+
+def _entry_fence(raw: Optional[str]) -> int:
+    """Fencing token stored in a JSON entry (0 if absent or unreadable)."""
+    try:
+        return int(json.loads(raw).get("fence") or 0)
+    except (TypeError, ValueError, AttributeError):
+        return 0
+
+
+metrics.describe("fenced_writes_rejected_total", "Writes dropped because a newer lock holder already stored the key")
+
+
+@retry(
+    retry=retry_if_exception_type((RedisError, RedisConnectionError)),
+    stop=stop_after_attempt(3),
+    wait=wait_fixed(1),
+    reraise=True
+)
+def redis_set_fenced_with_retry(key: str, entry: Dict[str, Any], fence: Optional[int], ex: int) -> bool:
+    """
+    Store a JSON entry unless the current one was written under a newer fencing token.
+    
+    Args:
+        key: Redis key
+        entry: JSON-serializable dict (stored with a "fence" field)
+        fence: Fencing token of the writer's lock. None (writers without a lock)
+               writes unconditionally but keeps the stored entry's fence, so a
+               stale lock holder still cannot overwrite it afterwards
+        ex: TTL in seconds
+        
+    Returns:
+        True if the entry was written
+    """
+    try:
+        with _key_client(key).pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    stored = _entry_fence(pipe.get(key))
+                    if fence is not None and stored > fence:
+                        pipe.unwatch()
+                        metrics.inc("fenced_writes_rejected_total")
+                        logger.warning("Skipping write to %s: fence %s is older than the stored entry", key, fence)
+                        return False
+                    token = stored if fence is None else fence
+                    pipe.multi()
+                    pipe.set(key, json.dumps({**entry, "fence": token} if token else entry), ex=ex)
+                    pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+    except (RedisError, RedisConnectionError) as e:
+        logger.error("Redis fenced SET error for key %s: %s", key, e)
         raise
 
 
@@ -158,13 +479,156 @@ def normalize_keyword(raw: str) -> str:
     return keyword.strip('_')
 
 
+# Lookback windows served by /predict. Google Trends only returns hourly
+# points for ranges up to 7 days, so longer windows are stitched from
+# consecutive 7-day hourly slices.
+TIMEFRAME_DAYS = {"7d": 7, "30d": 30, "90d": 90}
+DEFAULT_TIMEFRAME = "7d"
+HOURLY_SLICE_DAYS = 7
+
+
+# Google Trends region used when none is requested; its primary timezone
+# (Asia/Jakarta) is the default for binning
+DEFAULT_GEO = "ID"
+DEFAULT_TZ = "Asia/Jakarta"
+
+
+def resolve_locale(geo: str = DEFAULT_GEO, tz: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Validate a Google Trends geo and an IANA timezone.
+    
+    Args:
+        geo: ISO 3166-1 alpha-2 country code (case-insensitive)
+        tz: IANA timezone name; defaults to the geo's primary timezone
+        
+    Returns:
+        Tuple of (geo, tz), e.g. ("MY", "Asia/Kuala_Lumpur")
+        
+    Raises:
+        ValueError: If the geo or timezone is unknown
+    """
+    geo = (geo or DEFAULT_GEO).upper()
+    if geo not in pytz.country_timezones:
+        raise ValueError(f"Unsupported geo '{geo}'. Must be an ISO 3166-1 alpha-2 country code")
+    if tz is None:
+        return geo, pytz.country_timezones[geo][0]
+    if tz not in pytz.all_timezones_set:
+        raise ValueError(f"Unsupported timezone '{tz}'. Must be an IANA timezone name")
+    return geo, tz
+
+
+def _scoped_key(
+    prefix: str,
+    normalized: str,
+    timeframe: str,
+    geo: str,
+    tz: Optional[str] = None
+) -> str:
+    """
+    Build a Redis key scoped by timeframe, geo and (optionally) timezone.
+    Defaults are omitted, so 7-day Indonesian keys keep the original
+    `{prefix}:{keyword}` form. In cluster mode the keyword is a hash tag.
+    """
+    parts = [prefix, hash_tag(normalized)]
+    if timeframe != DEFAULT_TIMEFRAME:
+        parts.append(timeframe)
+    if geo != DEFAULT_GEO:
+        parts.append(geo)
+    if tz is not None and tz != pytz.country_timezones[geo][0]:
+        parts.append(tz)
+    return ":".join(parts)
+
+
+def build_cache_key(
+    normalized: str,
+    timeframe: str = DEFAULT_TIMEFRAME,
+    geo: str = DEFAULT_GEO,
+    tz: Optional[str] = None
+) -> str:
+    """
+    Build the Redis cache key for a normalized keyword, timeframe, geo and timezone.
+    The default 7-day Indonesian window keeps the original `trend:{keyword}` key.
+    """
+    return _scoped_key("trend", normalized, timeframe, geo, tz)
+
+
+def build_lock_key(normalized: str, timeframe: str = DEFAULT_TIMEFRAME, geo: str = DEFAULT_GEO) -> str:
+    """Build the Redis lock key guarding the upstream fetch for a keyword, timeframe and geo."""
+    return _scoped_key("lock", normalized, timeframe, geo)
+
+
+def build_profile_key(normalized: str, timeframe: str = DEFAULT_TIMEFRAME, geo: str = DEFAULT_GEO) -> str:
+    """Build the Redis key holding the stored (UTC) TrendProfile for a keyword, timeframe and geo."""
+    return _scoped_key("profile", normalized, timeframe, geo)
+
+
+def build_response_key(
+    normalized: str,
+    timeframe: str = DEFAULT_TIMEFRAME,
+    geo: str = DEFAULT_GEO,
+    tz: Optional[str] = None
+) -> str:
+    """Build the Redis key holding the pre-serialized /predict body for a keyword, timeframe, geo and timezone."""
+    return _scoped_key("resp", normalized, timeframe, geo, tz)
+
+
+def build_negative_key(normalized: str, timeframe: str = DEFAULT_TIMEFRAME, geo: str = DEFAULT_GEO) -> str:
+    """Build the Redis key marking a keyword, timeframe and geo as having no trend data."""
+    return _scoped_key("empty", normalized, timeframe, geo)
+
+
+def build_apify_run_key(normalized: str, apify_timeframe: str, geo: str = DEFAULT_GEO) -> str:
+    """Build the Redis key registering the latest Apify run for a keyword, Google Trends timeframe and geo."""
+    return ":".join(["apify_run", hash_tag(normalized), geo, apify_timeframe.replace(" ", "_")])
+
+
+def timeframe_slices(timeframe: str, now: Optional[datetime] = None) -> List[str]:
+    """
+    Split a lookback window into Google Trends timeframe strings.
+    
+    Args:
+        timeframe: One of TIMEFRAME_DAYS keys ("7d", "30d", "90d")
+        now: Reference time in UTC (defaults to current time)
+        
+    Returns:
+        List of timeframe strings, newest slice first. "7d" maps to the
+        native "now 7-d" range; longer windows become hourly custom ranges
+        ("YYYY-MM-DDTHH YYYY-MM-DDTHH") of at most 7 days each.
+        
+    Raises:
+        ValueError: If timeframe is not supported
+    """
+    if timeframe not in TIMEFRAME_DAYS:
+        raise ValueError(f"Unsupported timeframe '{timeframe}'. Must be one of: {', '.join(TIMEFRAME_DAYS)}")
+    
+    if timeframe == DEFAULT_TIMEFRAME:
+        return ["now 7-d"]
+    
+    end = (now or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=TIMEFRAME_DAYS[timeframe])
+    
+    slices = []
+    slice_end = end
+    while slice_end > start:
+        slice_start = max(start, slice_end - timedelta(days=HOURLY_SLICE_DAYS))
+        slices.append(f"{slice_start:%Y-%m-%dT%H} {slice_end:%Y-%m-%dT%H}")
+        slice_end = slice_start
+    return slices
+
+
 @retry(stop=stop_after_attempt(2), wait=wait_fixed(3), reraise=True)
-def fetch_from_pytrends(keyword: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+def fetch_from_pytrends(
+    keyword: str,
+    timeframe: str = "now 7-d",
+    geo: str = DEFAULT_GEO
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
     Fetch Google Trends data from pytrends (fast unofficial API).
     
     Args:
         keyword: Search term to fetch trends for
+        timeframe: Google Trends timeframe (see timeframe_slices)
+        geo: Google Trends region (country code)
         
     Returns:
         Tuple of (timeline_data, stats)
@@ -172,18 +636,19 @@ def fetch_from_pytrends(keyword: str) -> Tuple[List[Dict[str, Any]], Dict[str, A
     Raises:
         PyTrendsUnavailableException: If pytrends fails (rate limit, timeout, error)
     """
-    logger.info(f"Fetching data from pytrends for keyword: {keyword}")
+    logger.info("Fetching data from pytrends for keyword: %s (%s, %s)", keyword, timeframe, geo)
     start_time = time.time()
     
     try:
-        # Initialize pytrends
-        pytrend = TrendReq(hl='id-ID', tz=420, timeout=(5, 10))  # Jakarta timezone offset
+        # Initialize pytrends in UTC: custom slice ranges are built in UTC and
+        # the series is binned per requested timezone later
+        pytrend = TrendReq(hl='id-ID', tz=0, timeout=(5, 10))
         
-        # Build payload (last 7 days, Indonesia)
+        # Build payload (hourly range, requested region)
         pytrend.build_payload(
             kw_list=[keyword],
-            timeframe='now 7-d',
-            geo='ID'
+            timeframe=timeframe,
+            geo=geo
         )
         
         # Get hourly interest over time
@@ -191,12 +656,12 @@ def fetch_from_pytrends(keyword: str) -> Tuple[List[Dict[str, Any]], Dict[str, A
         
         # Validate data
         if df is None or df.empty:
-            logger.warning(f"Pytrends returned empty data for keyword: {keyword}")
+            logger.warning("Pytrends returned empty data for keyword: %s", keyword)
             raise PyTrendsUnavailableException("No data returned from pytrends")
         
         # Check if keyword column exists
         if keyword not in df.columns:
-            logger.warning(f"Keyword '{keyword}' not found in pytrends columns: {df.columns.tolist()}")
+            logger.warning("Keyword '%s' not found in pytrends columns: %s", keyword, df.columns.tolist())
             raise PyTrendsUnavailableException(f"Keyword not found in results")
         
         # Convert to timeline format
@@ -216,49 +681,193 @@ def fetch_from_pytrends(keyword: str) -> Tuple[List[Dict[str, Any]], Dict[str, A
             "source": "pytrends"
         }
         
-        logger.info(f"Successfully fetched {len(timeline_data)} data points from pytrends in {duration_ms}ms")
+        logger.info("Successfully fetched %s data points from pytrends in %sms", len(timeline_data), duration_ms)
         return timeline_data, stats
         
     except Exception as e:
         # Any error with pytrends = fallback to Apify
-        logger.warning(f"Pytrends failed for keyword '{keyword}': {str(e)}")
+        logger.warning("Pytrends failed for keyword '%s': %s", keyword, e)
         raise PyTrendsUnavailableException(f"Pytrends unavailable: {str(e)}")
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(2), reraise=True)
-def fetch_from_apify(keyword: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+APIFY_ACTOR = "apify/google-trends-scraper"
+APIFY_ACTIVE_STATUSES = ("READY", "RUNNING")
+APIFY_STARTING = "STARTING"  # registry marker while the claiming caller starts the run
+
+metrics.describe("apify_runs_total", "Apify fetches by outcome: started a run, joined an in-flight one or reused a dataset")
+metrics.describe("apify_compute_units_saved_total", "Compute units not spent thanks to reused Apify datasets")
+
+
+def _load_apify_run(run_key: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """Raw and parsed registry entry (parsed is None for unreadable entries)."""
+    raw = redis_get_with_retry(run_key)
+    if not raw:
+        return None, None
+    try:
+        return raw, json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return raw, None
+
+
+def claim_apify_run(normalized: str, apify_timeframe: str, geo: str = DEFAULT_GEO) -> Optional[Dict[str, Any]]:
     """
-    Fetch Google Trends data from Apify with retry logic.
+    Find an Apify run to share for this fetch, or claim the right to start one.
+    
+    The registry holds the latest run per keyword, geo and Google Trends
+    timeframe across all workers. A finished run is reused while its
+    dataset is younger than APIFY_DATASET_REUSE_SECONDS; a READY/RUNNING
+    run is joined. While another caller is starting a run (STARTING
+    marker) this waits up to APIFY_JOIN_START_TIMEOUT for its run ID.
     
     Args:
-        keyword: Search term to fetch trends for
+        normalized: Normalized keyword
+        apify_timeframe: Google Trends timeframe of the fetch
+        geo: Google Trends region
         
     Returns:
-        Tuple of (timeline_data, stats)
-        
-    Raises:
-        DataNotFoundException: If no timeline data is returned
+        Registry entry to reuse (status SUCCEEDED) or join (READY/RUNNING),
+        or None if the caller should start a run (it then holds the
+        STARTING marker and must call record_apify_run)
     """
-    logger.info(f"Fetching data from Apify for keyword: {keyword}")
-    
-    run = apify_client.actor("apify/google-trends-scraper").call(
-        run_input={
-            "searchTerms": [keyword],
-            "timeRange": "now 7-d",
-            "geo": "ID",
-            # Optimizations that DON'T sacrifice data quality
-            "isPublic": False,  # Private dataset (no impact on data quality)
-            # Note: isMultiTimelineSourcesRequired removed - let Apify decide
-            # Note: maxItems removed - need all data for accurate aggregation
-        },
-        # Runtime config - optimized for viral keywords
-        memory_mbytes=4096,  # High memory for large datasets (viral keywords)
-        timeout_secs=600,  # 10 minutes - handle slow fetches for popular keywords
-    )
+    if not settings.APIFY_RUN_REUSE_ENABLED:
+        return None
     
-    # Extract dataset items
-    dataset_items = list(apify_client.dataset(run["defaultDatasetId"]).iterate_items())
+    run_key = build_apify_run_key(normalized, apify_timeframe, geo)
+    deadline = time.time() + settings.APIFY_JOIN_START_TIMEOUT
+    marker_ttl = max(1, int(settings.APIFY_JOIN_START_TIMEOUT))
+    try:
+        while True:
+            marker = json.dumps({"status": APIFY_STARTING, "started_at": time.time()})
+            raw, entry = _load_apify_run(run_key)
+            if raw is None:
+                if redis_set_with_retry(run_key, marker, ex=marker_ttl, nx=True):
+                    return None
+                continue
+            
+            status = (entry or {}).get("status")
+            if (
+                status == "SUCCEEDED"
+                and time.time() - entry.get("finished_at", 0) <= settings.APIFY_DATASET_REUSE_SECONDS
+            ):
+                return entry
+            if status in APIFY_ACTIVE_STATUSES and entry.get("run_id"):
+                return entry
+            if status == APIFY_STARTING and time.time() < deadline:
+                time.sleep(0.5)
+                continue
+            
+            # Failed, expired or stuck entry: take it over
+            if redis_compare_and_with_retry(run_key, raw, lambda pipe: pipe.set(run_key, marker, ex=marker_ttl)):
+                return None
+    except (RedisError, RedisConnectionError) as e:
+        logger.warning("Apify run registry unavailable, starting a new run for %s: %s", normalized, e)
+        return None
+
+
+def record_apify_run(normalized: str, apify_timeframe: str, geo: str, run: Dict[str, Any]) -> None:
+    """
+    Register a run (after start or when it finishes) so other callers can share it.
+    
+    Finished runs stay for APIFY_DATASET_REUSE_SECONDS if they succeeded and
+    are removed otherwise, so the next fetch starts a fresh run.
+    """
+    if not settings.APIFY_RUN_REUSE_ENABLED:
+        return
+    
+    run_key = build_apify_run_key(normalized, apify_timeframe, geo)
+    status = run.get("status")
+    try:
+        if status in APIFY_ACTIVE_STATUSES:
+            entry = {
+                "run_id": run.get("id"),
+                "dataset_id": run.get("defaultDatasetId"),
+                "status": status,
+                "started_at": time.time()
+            }
+            redis_set_with_retry(run_key, json.dumps(entry), ex=settings.APIFY_RUN_TIMEOUT_SECS + 60)
+        elif status == "SUCCEEDED":
+            entry = {
+                "run_id": run.get("id"),
+                "dataset_id": run.get("defaultDatasetId"),
+                "status": status,
+                "finished_at": time.time(),
+                "compute_units": run.get("stats", {}).get("computeUnits", 0.0)
+            }
+            redis_set_with_retry(run_key, json.dumps(entry), ex=settings.APIFY_DATASET_REUSE_SECONDS)
+        else:
+            redis_delete_with_retry(run_key)
+    except (RedisError, RedisConnectionError) as e:
+        logger.warning("Failed to record Apify run %s for %s: %s", run.get("id"), normalized, e)
+
+
+class ApifyDeferral:
+    """
+    Per-job state of non-blocking Apify fetches, kept across the job's passes.
+    
+    `finished` holds awaited runs by registry key and `slices` the binned
+    slices of stitched windows by (keyword, range, geo), so a later pass
+    reuses what earlier passes completed instead of fetching it again.
+    """
     
+    def __init__(self):
+        self.finished: Dict[str, Tuple[Dict[str, Any], bool]] = {}
+        self.slices: Dict[Tuple[str, str, str], Tuple[Optional[TrendProfile], Dict[str, Any], str]] = {}
+
+
+_apify_deferral: contextvars.ContextVar[Optional[ApifyDeferral]] = contextvars.ContextVar("apify_deferral", default=None)
+
+
+@contextmanager
+def defer_apify_runs(enabled: bool = True) -> Iterator[Optional[ApifyDeferral]]:
+    """
+    Make fetch_from_apify raise ApifyRunPending instead of waiting on a run.
+    
+    Used by async jobs: the job awaits the run off-thread (jobs.watch_apify_run),
+    hands the finished run back with complete_apify_run and runs the fetch
+    again, which then reads that run's dataset. enabled=False restores the
+    blocking behaviour inside a deferred block.
+    """
+    token = _apify_deferral.set(ApifyDeferral() if enabled else None)
+    try:
+        yield _apify_deferral.get()
+    finally:
+        _apify_deferral.reset(token)
+
+
+def complete_apify_run(pending: ApifyRunPending, run: Dict[str, Any]) -> None:
+    """Register a deferred run's final state and make it available to the retried fetch."""
+    run = {**pending.run, **run}
+    if pending.started:
+        record_apify_run(pending.normalized, pending.apify_timeframe, pending.geo, run)
+    deferral = _apify_deferral.get()
+    if deferral is not None and run.get("status") not in APIFY_ACTIVE_STATUSES:
+        deferral.finished[pending.run_key] = (run, pending.started)
+
+
+def _apify_run_input(keyword: str, timeframe: str, geo: str) -> Dict[str, Any]:
+    """Actor input for a keyword, Google Trends timeframe and geo."""
+    run_input = {
+        "searchTerms": [keyword],
+        "timeRange": "now 7-d",
+        "geo": geo,
+        # Optimizations that DON'T sacrifice data quality
+        "isPublic": False,  # Private dataset (no impact on data quality)
+        # Note: isMultiTimelineSourcesRequired removed - let Apify decide
+        # Note: maxItems removed - need all data for accurate aggregation
+    }
+    if timeframe != "now 7-d":
+        # Stitched slices of longer windows use an explicit hourly range
+        run_input["timeRange"] = ""
+        run_input["customTimeRange"] = timeframe
+    trace_id = current_trace_id()
+    if trace_id and settings.APIFY_TRACE_INPUT_FIELD:
+        # Stored with the run's INPUT record, so the Apify console links back to the request
+        run_input[settings.APIFY_TRACE_INPUT_FIELD] = trace_id
+    return run_input
+
+
+def _apify_timeline(dataset_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Extract the timeline from scraper dataset items."""
     # Extract timeline data (Apify uses 'interestOverTime_timelineData' key)
     timeline_data = []
     if dataset_items:
@@ -277,113 +886,641 @@ def fetch_from_apify(keyword: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]
                             "date": dt.isoformat(),  # Will be converted to Jakarta timezone later
                             "value": data_point.get("value", [0])[0]  # Extract first value from array
                         })
+    return timeline_data
+
+
+def _acquire_apify_run(
+    keyword: str,
+    normalized: str,
+    timeframe: str,
+    geo: str,
+    deferred: bool
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Reuse, join or start the Apify run for a fetch and wait for it to finish.
+    
+    Returns:
+        Tuple of (finished run, whether this caller started and pays for it)
+        
+    Raises:
+        ApifyRunPending: If `deferred` and the run has not finished
+    """
+    run_key = build_apify_run_key(normalized, timeframe, geo)
+    shared = claim_apify_run(normalized, timeframe, geo)
+    if shared is not None and shared["status"] == "SUCCEEDED":
+        metrics.inc("apify_runs_total", outcome="reused_dataset")
+        metrics.inc("apify_compute_units_saved_total", float(shared.get("compute_units", 0.0)))
+        logger.info("Reusing dataset of Apify run %s for keyword: %s", shared["run_id"], keyword)
+        return {"id": shared["run_id"], "defaultDatasetId": shared["dataset_id"], "status": "SUCCEEDED"}, False
+    
+    if shared is not None:
+        metrics.inc("apify_runs_total", outcome="joined")
+        logger.info("Joining in-flight Apify run %s for keyword: %s", shared["run_id"], keyword)
+        run = {"id": shared["run_id"], "defaultDatasetId": shared["dataset_id"], "status": shared["status"]}
+        if deferred:
+            raise ApifyRunPending(run_key, run, False, normalized, timeframe, geo)
+        finished = apify_client.run(run["id"]).wait_for_finish(wait_secs=settings.APIFY_RUN_TIMEOUT_SECS)
+        return {**run, **(finished or {})}, False
+    
+    metrics.inc("apify_runs_total", outcome="started")
+    run = apify_client.actor(APIFY_ACTOR).start(
+        run_input=_apify_run_input(keyword, timeframe, geo),
+        # Runtime config - optimized for viral keywords
+        memory_mbytes=4096,  # High memory for large datasets (viral keywords)
+        timeout_secs=settings.APIFY_RUN_TIMEOUT_SECS,  # handle slow fetches for popular keywords
+    )
+    record_apify_run(normalized, timeframe, geo, run)
+    if deferred:
+        raise ApifyRunPending(run_key, run, True, normalized, timeframe, geo)
+    run = apify_client.run(run["id"]).wait_for_finish(wait_secs=settings.APIFY_RUN_TIMEOUT_SECS) or run
+    record_apify_run(normalized, timeframe, geo, run)
+    return run, True
+
+
+@retry(retry=retry_if_not_exception_type(ApifyRunPending), stop=stop_after_attempt(3), wait=wait_fixed(2), reraise=True)
+def fetch_from_apify(
+    keyword: str,
+    timeframe: str = "now 7-d",
+    geo: str = DEFAULT_GEO
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Fetch Google Trends data from Apify with retry logic.
+    
+    Recent runs are shared through the run registry (claim_apify_run):
+    a fresh dataset for the same keyword, timeframe and geo is read again
+    and an in-flight run is waited on, instead of paying for another run.
+    Shared runs report zero compute units (the starter paid for them).
+    Inside defer_apify_runs, a run that is not finished yet raises
+    ApifyRunPending instead of blocking the thread.
+    
+    Args:
+        keyword: Search term to fetch trends for
+        timeframe: Google Trends timeframe (see timeframe_slices)
+        geo: Google Trends region (country code)
+        
+    Returns:
+        Tuple of (timeline_data, stats)
+        
+    Raises:
+        DataNotFoundException: If no timeline data is returned
+        ApifyRunPending: If deferral is active and the run is still going
+    """
+    logger.info("Fetching data from Apify for keyword: %s (%s, %s)", keyword, timeframe, geo)
+    normalized = normalize_keyword(keyword)
+    run_key = build_apify_run_key(normalized, timeframe, geo)
+    deferral = _apify_deferral.get()
+    
+    resolved = deferral.finished.get(run_key) if deferral is not None else None
+    if resolved is not None:
+        # Run awaited by the async job between passes; only a run this caller started costs compute units
+        run, paid = resolved
+    else:
+        run, paid = _acquire_apify_run(keyword, normalized, timeframe, geo, deferral is not None)
+    
+    logger.info("Apify run %s finished for keyword: %s", run.get("id"), keyword)
+    
+    # Extract dataset items
+    dataset_items = list(apify_client.dataset(run["defaultDatasetId"]).iterate_items())
+    timeline_data = _apify_timeline(dataset_items)
+    compute_units = run.get("stats", {}).get("computeUnits", 0.0) if paid else 0.0
     
     # Validate data
     if not timeline_data:
-        logger.error(f"No timeline data returned for keyword: {keyword}")
-        raise DataNotFoundException(f"No data found for keyword: {keyword}")
+        logger.error("No timeline data returned for keyword: %s", keyword)
+        raise DataNotFoundException(
+            f"No data found for keyword: {keyword}",
+            compute_units=compute_units
+        )
     
     # Extract stats
     stats = {
         "duration_ms": run.get("stats", {}).get("durationMillis", 0),
-        "compute_units": run.get("stats", {}).get("computeUnits", 0.0)
+        "compute_units": compute_units
     }
+    if not paid:
+        stats["shared_run_id"] = run.get("id")
     
-    logger.info(f"Successfully fetched {len(timeline_data)} data points from Apify")
+    logger.info("Successfully fetched %s data points from Apify", len(timeline_data))
     return timeline_data, stats
 
 
-def process_data(timeline_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+UPSTREAM_SOURCES = ("pytrends", "apify")
+DEFAULT_SOURCE_TIER = "all"
+
+# Starting estimates per source, replaced by observations as fetches complete
+SOURCE_PRIORS = {
+    "pytrends": {"success": 0.7, "latency_ms": 15000.0, "cost": 0.0},
+    "apify": {"success": 0.95, "latency_ms": 90000.0, "cost": 0.1},
+}
+
+metrics.describe("source_plan_total", "Upstream fetch plans chosen by the source selector")
+metrics.describe("source_success_rate", "Rolling success rate per upstream source and tier")
+metrics.describe("source_latency_ms", "Rolling attempt latency per upstream source and tier")
+metrics.describe("source_cost_cu", "Rolling compute units per successful fetch, per source and tier")
+metrics.describe("apify_budget_spent_cu", "Apify compute units spent today (all workers)")
+metrics.describe("apify_budget_exhausted_total", "Fetches that could not use Apify because the daily budget was spent")
+
+
+class SourceSelector:
     """
-    Process timeline data using pandas to generate recommendations and chart data.
+    Cost-aware ordering of the upstream sources (pytrends, Apify).
     
-    Args:
-        timeline_data: List of timeline data points from Apify
-        
-    Returns:
-        Dictionary containing recommendations and chart_data
-        
-    Raises:
-        DataValidationException: If data validation fails
+    Keeps exponentially weighted success rate, attempt latency and
+    compute-unit cost per source and popularity tier (per worker), plus the
+    day's Apify spend (shared through Redis). The candidate plans are
+    "pytrends, then Apify" and "Apify only"; the one with the lowest
+    expected latency plus a cost penalty wins. The penalty grows as the
+    daily budget is used up, and once it is spent only pytrends is tried.
+    A small share of fetches explores the pytrends-first plan so its
+    statistics recover after an outage.
     """
-    logger.info(f"Processing {len(timeline_data)} data points")
     
-    # Validation 1: Check if data is not empty
-    if not timeline_data or len(timeline_data) == 0:
-        logger.error("Timeline data is empty")
-        raise DataValidationException("No timeline data available to process")
+    def __init__(
+        self,
+        alpha: float,
+        daily_budget: float,
+        cost_weight_ms: float,
+        explore_rate: float,
+        enabled: bool = True
+    ):
+        self.alpha = alpha
+        self.daily_budget = daily_budget
+        self.cost_weight_ms = cost_weight_ms
+        self.explore_rate = explore_rate
+        self.enabled = enabled
+        self._stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._lock = threading.Lock()
     
-    try:
-        # Convert to DataFrame
-        df = pd.DataFrame(timeline_data)
-        
-        # Validation 2: Check required columns exist
-        required_columns = ['date', 'value']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            logger.error(f"Missing required columns: {missing_columns}")
-            raise DataValidationException(f"Missing required columns: {', '.join(missing_columns)}")
+    @staticmethod
+    def _budget_key() -> str:
+        return f"apify_budget:{datetime.now():%Y-%m-%d}"
+    
+    def reset(self) -> None:
+        """Forget observations (used by tests and benchmarks)."""
+        with self._lock:
+            self._stats.clear()
+    
+    def estimate(self, source: str, tier: str = DEFAULT_SOURCE_TIER) -> Dict[str, float]:
+        """Current success/latency_ms/cost estimate for a source and tier."""
+        with self._lock:
+            return dict(self._stats.get((source, tier)) or SOURCE_PRIORS[source])
+    
+    def record(self, source: str, tier: str, ok: bool, latency_ms: float, cost: float = 0.0) -> None:
+        """
+        Fold one attempt into the rolling statistics.
         
-        # Validation 3: Check if DataFrame has data
-        if df.empty:
-            logger.error("DataFrame is empty after conversion")
-            raise DataValidationException("No valid data after conversion to DataFrame")
+        Args:
+            source: "pytrends" or "apify"
+            tier: Popularity tier of the keyword
+            ok: Whether the source answered (an empty result counts as an answer)
+            latency_ms: Time the attempt took
+            cost: Compute units this caller paid (added to today's spend)
+        """
+        with self._lock:
+            stats = self._stats.setdefault((source, tier), dict(SOURCE_PRIORS[source]))
+            stats["success"] += self.alpha * ((1.0 if ok else 0.0) - stats["success"])
+            stats["latency_ms"] += self.alpha * (latency_ms - stats["latency_ms"])
+            if ok:
+                stats["cost"] += self.alpha * (cost - stats["cost"])
+            snapshot = dict(stats)
         
-        # Validation 4: Check minimum data points (at least 24 hours)
-        if len(df) < 24:
-            logger.warning(f"Only {len(df)} data points available, may affect accuracy")
+        metrics.set("source_success_rate", round(snapshot["success"], 4), source=source, tier=tier)
+        metrics.set("source_latency_ms", round(snapshot["latency_ms"], 1), source=source, tier=tier)
+        metrics.set("source_cost_cu", round(snapshot["cost"], 4), source=source, tier=tier)
+        if cost > 0:
+            self._add_spend(cost)
+    
+    def _add_spend(self, cost: float) -> None:
+        try:
+            key = self._budget_key()
+            spent = float(_key_client(key).incrbyfloat(key, cost))
+            redis_expire_with_retry(key, 2 * 86400)
+            metrics.set("apify_budget_spent_cu", round(spent, 4))
+        except (RedisError, RedisConnectionError) as e:
+            logger.warning("Failed to record Apify spend: %s", e)
+    
+    def spent_today(self) -> float:
+        """Compute units spent on Apify today across workers (0 if Redis is unavailable)."""
+        try:
+            return float(redis_get_with_retry(self._budget_key()) or 0.0)
+        except (RedisError, RedisConnectionError) as e:
+            logger.warning("Failed to read Apify spend, assuming none: %s", e)
+            return 0.0
+    
+    def plan(self, tier: str = DEFAULT_SOURCE_TIER) -> Tuple[str, ...]:
+        """
+        Sources to try, in order, for one fetch.
         
-        # Validation 5: Clean and validate data types
-        # Remove rows with null values in critical columns
-        df_clean = df.dropna(subset=['date', 'value'])
-        if len(df_clean) < len(df):
-            logger.warning(f"Dropped {len(df) - len(df_clean)} rows with null values")
+        Expected latency of "pytrends, then Apify" is L_p + (1 - S_p) * L_a
+        at cost (1 - S_p) * C_a; "Apify only" is L_a at C_a. Each plan
+        scores latency + cost_weight_ms * cost * pressure, where pressure =
+        1 / (1 - spent / budget).
+        """
+        fallback_plan = ("pytrends", "apify")
+        budget_pressure = 1.0
+        if self.daily_budget > 0:
+            spent = self.spent_today()
+            if spent >= self.daily_budget:
+                metrics.inc("apify_budget_exhausted_total")
+                metrics.inc("source_plan_total", plan="pytrends", tier=tier)
+                return ("pytrends",)
+            budget_pressure = 1.0 / max(1.0 - spent / self.daily_budget, 0.05)
         
-        if df_clean.empty:
-            logger.error("All rows contain null values")
-            raise DataValidationException("No valid data after removing nulls")
+        plan = fallback_plan
+        if self.enabled and random.random() >= self.explore_rate:
+            pytrends, apify = self.estimate("pytrends", tier), self.estimate("apify", tier)
+            miss = 1.0 - pytrends["success"]
+            fallback_score = (
+                pytrends["latency_ms"] + miss * apify["latency_ms"]
+                + self.cost_weight_ms * miss * apify["cost"] * budget_pressure
+            )
+            direct_score = apify["latency_ms"] + self.cost_weight_ms * apify["cost"] * budget_pressure
+            if direct_score < fallback_score:
+                plan = ("apify",)
+        metrics.inc("source_plan_total", plan=",".join(plan), tier=tier)
+        return plan
+
+
+source_selector = SourceSelector(
+    settings.SOURCE_STATS_ALPHA,
+    settings.APIFY_DAILY_CU_BUDGET,
+    settings.SOURCE_COST_WEIGHT_MS,
+    settings.SOURCE_EXPLORE_RATE,
+    enabled=settings.SOURCE_POLICY_ENABLED
+)
+
+
+def popularity_tier(previous: Optional[TrendProfile]) -> str:
+    """
+    Stats tier of a keyword when SOURCE_POLICY_TIERS is on: "known" for
+    keywords with a stored profile (requested again since an earlier fetch),
+    "new" otherwise. Repeat keywords tend to be the popular ones, whose
+    Apify runs are larger and slower.
+    """
+    if not settings.SOURCE_POLICY_TIERS:
+        return DEFAULT_SOURCE_TIER
+    return "known" if previous is not None else "new"
+
+
+def fetch_timeline(
+    keyword: str,
+    apify_timeframe: str,
+    geo: str = DEFAULT_GEO,
+    on_apify_fallback: Optional[Callable[[], None]] = None,
+    tier: str = DEFAULT_SOURCE_TIER
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any], str]:
+    """
+    Fetch one Google Trends range from the sources chosen by source_selector.
+    
+    Args:
+        keyword: Search keyword
+        apify_timeframe: Google Trends timeframe (see timeframe_slices)
+        geo: Google Trends region
+        on_apify_fallback: Optional callback run before the Apify fetch
+        tier: Popularity tier (see popularity_tier)
         
-        df = df_clean
+    Returns:
+        Tuple of (timeline_data, stats, source)
         
-        # Validation 6: Convert and validate date column
+    Raises:
+        DataNotFoundException: If the answering source has no data
+        UpstreamBudgetExhaustedException: If pytrends failed and the Apify budget is spent
+    """
+    plan = source_selector.plan(tier)
+    deferral = _apify_deferral.get()
+    if deferral is not None and build_apify_run_key(normalize_keyword(keyword), apify_timeframe, geo) in deferral.finished:
+        # The job already awaited this range's Apify run; read it instead of asking pytrends again
+        plan = ("apify",)
+    for source in plan:
+        started = time.time()
         try:
-            df['date'] = pd.to_datetime(df['date'], errors='coerce')
-            # Remove rows where date conversion failed
-            df = df.dropna(subset=['date'])
-            
-            if df.empty:
-                raise DataValidationException("No valid dates in data")
-            
-            # Check if dates have timezone info, if not assume UTC
-            if df['date'].dt.tz is None:
-                df['date'] = df['date'].dt.tz_localize('UTC')
-            
-            # Convert to Jakarta timezone
-            df['date'] = df['date'].dt.tz_convert('Asia/Jakarta')
-            
-        except Exception as e:
-            logger.error(f"Date conversion error: {str(e)}")
-            raise DataValidationException(f"Failed to convert dates: {str(e)}")
+            if source == "pytrends":
+                timeline_data, stats = fetch_from_pytrends(keyword, apify_timeframe, geo)
+            else:
+                if on_apify_fallback:
+                    on_apify_fallback()
+                timeline_data, stats = fetch_from_apify(keyword, apify_timeframe, geo)
+        except PyTrendsUnavailableException as e:
+            source_selector.record(source, tier, False, (time.time() - started) * 1000)
+            if source == plan[-1]:
+                break
+            logger.warning("Pytrends failed (%s), falling back to Apify for %s: %s", e, apify_timeframe, keyword)
+            continue
+        except DataNotFoundException as e:
+            source_selector.record(source, tier, True, (time.time() - started) * 1000, e.compute_units)
+            raise
+        except ApifyRunPending:
+            # Not an outcome yet: the job's next pass records the finished run
+            raise
+        except Exception:
+            source_selector.record(source, tier, False, (time.time() - started) * 1000)
+            raise
         
-        # Validation 7: Convert and validate value column
-        try:
-            df['value'] = pd.to_numeric(df['value'], errors='coerce')
-            # Remove rows where value conversion failed or is negative
-            df = df[df['value'].notna() & (df['value'] >= 0)]
+        # Deferred Apify passes only time the dataset read; use the run's duration
+        latency_ms = max((time.time() - started) * 1000, float(stats.get("duration_ms", 0)))
+        source_selector.record(source, tier, True, latency_ms, float(stats.get("compute_units", 0.0)))
+        return timeline_data, stats, source
+    
+    logger.warning("Pytrends failed and the daily Apify budget is spent: %s", keyword)
+    raise UpstreamBudgetExhaustedException(
+        "Daily upstream budget exhausted. Please try again later.",
+        retry_after=_seconds_until_quota_reset()
+    )
+
+
+# Hours of the most recent raw points kept on a profile to rescale delta fetches
+PROFILE_TAIL_HOURS = 24
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+class TrendProfile:
+    """
+    Weighted 7x24 day-of-week/hour profile of trend interest.
+    
+    Stores per-cell sums and counts (sufficient statistics for the mean),
+    so profiles binned from separate fetches can be merged without keeping
+    the raw series around. Rows are days (Monday=0), columns are hours, both
+    in UTC; localized() re-bins them for a client timezone.
+    
+    It also tracks the first/last ingested timestamp and a short tail of
+    the most recent points, which anchors the scale of later delta fetches
+    (Google Trends rescales every request to its own 0-100 range).
+    """
+    
+    def __init__(
+        self,
+        sums: Optional[np.ndarray] = None,
+        counts: Optional[np.ndarray] = None,
+        first_ts: Optional[float] = None,
+        last_ts: Optional[float] = None,
+        tail: Optional[Dict[int, float]] = None,
+        fetched_at: Optional[float] = None
+    ) -> None:
+        self.sums = sums if sums is not None else np.zeros((7, 24), dtype=float)
+        self.counts = counts if counts is not None else np.zeros((7, 24), dtype=float)
+        self.first_ts = first_ts
+        self.last_ts = last_ts
+        self.tail = tail if tail is not None else {}
+        # When the upstream data was last fetched (freshness across timezones)
+        self.fetched_at = fetched_at
+    
+    @property
+    def total_points(self) -> int:
+        """Number of raw data points folded into the profile."""
+        return int(round(self.counts.sum()))
+    
+    def is_empty(self) -> bool:
+        """Check if no data points have been added."""
+        return not self.counts.any()
+    
+    def add_points(
+        self,
+        days: np.ndarray,
+        hours: np.ndarray,
+        values: np.ndarray,
+        weight: float = 1.0,
+        timestamps: Optional[np.ndarray] = None
+    ) -> None:
+        """Bin data points (day index, hour, value) into the profile."""
+        np.add.at(self.sums, (days, hours), values * weight)
+        np.add.at(self.counts, (days, hours), weight)
+        if timestamps is not None and len(timestamps):
+            self._track(timestamps, values)
+    
+    def _extend_range(self, first: float, last: float) -> None:
+        """Widen the ingested time range and drop tail points outside the window."""
+        self.first_ts = first if self.first_ts is None else min(self.first_ts, first)
+        self.last_ts = last if self.last_ts is None else max(self.last_ts, last)
+        cutoff = self.last_ts - PROFILE_TAIL_HOURS * 3600
+        self.tail = {ts: v for ts, v in self.tail.items() if ts > cutoff}
+    
+    def _track(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """Update ingested time range and the anchor tail."""
+        cutoff = float(np.max(timestamps)) - PROFILE_TAIL_HOURS * 3600
+        for ts, value in zip(timestamps, values):
+            if ts > cutoff:
+                self.tail[int(round(ts))] = float(value)
+        self._extend_range(float(np.min(timestamps)), float(np.max(timestamps)))
+    
+    def merge(self, other: "TrendProfile", weight: float = 1.0) -> "TrendProfile":
+        """Merge another profile into this one, scaling its contribution by weight."""
+        self.sums += other.sums * weight
+        self.counts += other.counts * weight
+        if other.last_ts is not None:
+            self.tail.update(other.tail)
+            self._extend_range(other.first_ts, other.last_ts)
+        return self
+    
+    def localized(self, tz: str) -> "TrendProfile":
+        """
+        Re-bin the UTC profile into day/hour cells of a timezone.
+        
+        Shifting every point by a whole-hour offset moves whole cells, so this
+        is a single roll over the flattened hour-of-week axis (no refetch or
+        per-point conversion). Fractional offsets floor to the hour the local
+        bucket starts in, matching per-point conversion. For DST zones the
+        offset in effect at the newest point is used.
+        """
+        reference = self.last_ts if self.last_ts is not None else time.time()
+        offset = datetime.fromtimestamp(reference, pytz.timezone(tz)).utcoffset()
+        shift = math.floor(offset.total_seconds() / 3600)
+        if shift == 0:
+            return self
+        return TrendProfile(
+            sums=np.roll(self.sums.reshape(-1), shift).reshape(7, 24),
+            counts=np.roll(self.counts.reshape(-1), shift).reshape(7, 24),
+            first_ts=self.first_ts,
+            last_ts=self.last_ts,
+            tail=self.tail,
+            fetched_at=self.fetched_at
+        )
+    
+    def means(self) -> np.ndarray:
+        """Per-cell mean value (NaN where a cell has no data)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.counts > 0, self.sums / self.counts, np.nan)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to a JSON-compatible dict."""
+        return {
+            "sums": np.round(self.sums, 4).tolist(),
+            "counts": np.round(self.counts, 4).tolist(),
+            "first_ts": self.first_ts,
+            "last_ts": self.last_ts,
+            "tail": [[ts, value] for ts, value in sorted(self.tail.items())],
+            "fetched_at": self.fetched_at,
+            "bins": "utc"
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TrendProfile":
+        """
+        Deserialize a profile produced by to_dict.
+        
+        Raises:
+            ValueError: If the stored arrays are not 7x24 or not binned in UTC
+        """
+        if data.get("bins") != "utc":
+            raise ValueError("Profile is not binned in UTC")
+        sums = np.array(data["sums"], dtype=float)
+        counts = np.array(data["counts"], dtype=float)
+        if sums.shape != (7, 24) or counts.shape != (7, 24):
+            raise ValueError(f"Invalid profile shape: {sums.shape}/{counts.shape}")
+        return cls(
+            sums=sums,
+            counts=counts,
+            first_ts=data.get("first_ts"),
+            last_ts=data.get("last_ts"),
+            tail={int(ts): float(value) for ts, value in data.get("tail", [])},
+            fetched_at=data.get("fetched_at")
+        )
+
+
+def _clean_timeline(timeline_data: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Validate timeline data and convert it to a DataFrame in UTC.
+    
+    Args:
+        timeline_data: List of timeline data points from pytrends/Apify
+        
+    Returns:
+        DataFrame with tz-aware 'date' and non-negative numeric 'value' columns
+        
+    Raises:
+        DataValidationException: If data validation fails
+    """
+    # Validation 1: Check if data is not empty
+    if not timeline_data or len(timeline_data) == 0:
+        logger.error("Timeline data is empty")
+        raise DataValidationException("No timeline data available to process")
+    
+    # Convert to DataFrame
+    df = pd.DataFrame(timeline_data)
+    
+    # Validation 2: Check required columns exist
+    required_columns = ['date', 'value']
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    if missing_columns:
+        logger.error("Missing required columns: %s", missing_columns)
+        raise DataValidationException(f"Missing required columns: {', '.join(missing_columns)}")
+    
+    # Validation 3: Check if DataFrame has data
+    if df.empty:
+        logger.error("DataFrame is empty after conversion")
+        raise DataValidationException("No valid data after conversion to DataFrame")
+    
+    # Validation 4: Check minimum data points (at least 24 hours)
+    if len(df) < 24:
+        logger.warning("Only %s data points available, may affect accuracy", len(df))
+    
+    # Validation 5: Clean and validate data types
+    # Remove rows with null values in critical columns
+    df_clean = df.dropna(subset=['date', 'value'])
+    if len(df_clean) < len(df):
+        logger.warning("Dropped %s rows with null values", len(df) - len(df_clean))
+    
+    if df_clean.empty:
+        logger.error("All rows contain null values")
+        raise DataValidationException("No valid data after removing nulls")
+    
+    df = df_clean
+    
+    # Validation 6: Convert and validate date column
+    try:
+        df['date'] = pd.to_datetime(df['date'], errors='coerce')
+        # Remove rows where date conversion failed
+        df = df.dropna(subset=['date'])
+        
+        if df.empty:
+            raise DataValidationException("No valid dates in data")
+        
+        # Check if dates have timezone info, if not assume UTC
+        if df['date'].dt.tz is None:
+            df['date'] = df['date'].dt.tz_localize('UTC')
+        
+        # Normalize to UTC; client timezones are applied when building recommendations
+        df['date'] = df['date'].dt.tz_convert('UTC')
+        
+    except Exception as e:
+        logger.error("Date conversion error: %s", e)
+        raise DataValidationException(f"Failed to convert dates: {str(e)}")
+    
+    # Validation 7: Convert and validate value column
+    try:
+        df['value'] = pd.to_numeric(df['value'], errors='coerce')
+        # Remove rows where value conversion failed or is negative
+        df = df[df['value'].notna() & (df['value'] >= 0)]
+        
+        if df.empty:
+            raise DataValidationException("No valid values in data")
             
-            if df.empty:
-                raise DataValidationException("No valid values in data")
-                
-        except Exception as e:
-            logger.error(f"Value conversion error: {str(e)}")
-            raise DataValidationException(f"Failed to convert values: {str(e)}")
+    except Exception as e:
+        logger.error("Value conversion error: %s", e)
+        raise DataValidationException(f"Failed to convert values: {str(e)}")
+    
+    return df
+
+
+def _epoch_seconds(dates: pd.Series) -> np.ndarray:
+    """Convert a tz-aware datetime Series to Unix timestamps (seconds)."""
+    return (dates - pd.Timestamp(0, tz="UTC")).dt.total_seconds().to_numpy()
+
+
+def bin_timeline(timeline_data: List[Dict[str, Any]]) -> TrendProfile:
+    """
+    Validate timeline data and bin it into a 7x24 UTC TrendProfile.
+    
+    Args:
+        timeline_data: List of timeline data points from pytrends/Apify
+        
+    Returns:
+        TrendProfile with per day/hour sums and counts
+        
+    Raises:
+        DataValidationException: If data validation fails
+    """
+    try:
+        df = _clean_timeline(timeline_data)
+        profile = TrendProfile()
+        profile.add_points(
+            df['date'].dt.dayofweek.to_numpy(),
+            df['date'].dt.hour.to_numpy(),
+            df['value'].to_numpy(dtype=float),
+            timestamps=_epoch_seconds(df['date'])
+        )
+        return profile
+    except DataValidationException:
+        raise
+    except Exception as e:
+        logger.error("Unexpected error during data binning: %s", e)
+        raise DataValidationException(f"Data processing failed: {str(e)}")
+
+
+def build_recommendations(profile: TrendProfile, tz: str = DEFAULT_TZ) -> Dict[str, Any]:
+    """
+    Generate recommendations, chart data and hourly summary from a profile.
+    
+    Args:
+        profile: Aggregated day-of-week/hour profile (UTC)
+        tz: Timezone the days and hours are reported in
         
-        # Extract day name and hour
-        df['day_name'] = df['date'].dt.day_name()
-        df['hour'] = df['date'].dt.hour
+    Returns:
+        Dictionary containing recommendations, chart_data and hourly_summary
         
-        # Aggregate by day and hour
-        grouped = df.groupby(['day_name', 'hour'])['value'].mean().reset_index()
+    Raises:
+        DataValidationException: If the profile holds no data
+    """
+    try:
+        # Aggregate by day and hour (cell means of the profile, in local time)
+        profile = profile.localized(tz)
+        means = profile.means()
+        days_idx, hours_idx = np.nonzero(profile.counts > 0)
+        grouped = pd.DataFrame({
+            'day_name': [DAY_NAMES[d] for d in days_idx],
+            'hour': hours_idx.astype(int),
+            'value': means[days_idx, hours_idx]
+        })
         
         # Validation 8: Check if aggregation produced results
         if grouped.empty:
@@ -391,7 +1528,7 @@ def process_data(timeline_data: List[Dict[str, Any]]) -> Dict[str, Any]:
             raise DataValidationException("No data after aggregation")
         
         # Calculate rolling score (3-hour window)
-        grouped = grouped.sort_values(['day_name', 'hour'])
+        grouped = grouped.sort_values(['day_name', 'hour']).reset_index(drop=True)
         grouped['rolling_score'] = grouped.groupby('day_name')['value'].transform(
             lambda x: x.rolling(window=3, min_periods=1).mean()
         )
@@ -466,7 +1603,10 @@ def process_data(timeline_data: List[Dict[str, Any]]) -> Dict[str, Any]:
                 "hourly": hourly_str
             })
         
-        logger.info(f"Generated {len(recommendations)} recommendations and {len(chart_data)} chart points from {len(df)} raw data points")
+        logger.info(
+            "Generated %s recommendations and %s chart points from %s raw data points",
+            len(recommendations), len(chart_data), profile.total_points
+        )
         
         return {
             "recommendations": recommendations,
@@ -479,58 +1619,949 @@ def process_data(timeline_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         raise
     except Exception as e:
         # Catch any unexpected pandas/processing errors
-        logger.error(f"Unexpected error during data processing: {str(e)}")
+        logger.error("Unexpected error during data processing: %s", e)
         raise DataValidationException(f"Data processing failed: {str(e)}")
 
 
-def update_cache_background(keyword: str) -> None:
+def process_data(timeline_data: List[Dict[str, Any]], tz: str = DEFAULT_TZ) -> Dict[str, Any]:
+    """
+    Process timeline data using pandas to generate recommendations and chart data.
+    
+    Args:
+        timeline_data: List of timeline data points from Apify
+        
+    Returns:
+        Dictionary containing recommendations and chart_data
+        
+    Raises:
+        DataValidationException: If data validation fails
+    """
+    logger.info("Processing %s data points", len(timeline_data))
+    return build_recommendations(bin_timeline(timeline_data), tz)
+
+
+def fetch_profile(
+    keyword: str,
+    timeframe: str = DEFAULT_TIMEFRAME,
+    on_apify_fallback: Optional[Callable[[], None]] = None,
+    geo: str = DEFAULT_GEO,
+    tier: str = DEFAULT_SOURCE_TIER
+) -> Tuple[TrendProfile, str, Dict[str, Any]]:
+    """
+    Fetch the full lookback window and bin it into a TrendProfile.
+    Each slice is fetched from the sources chosen by source_selector
+    (pytrends first with Apify as fallback, unless the statistics say otherwise).
+    
+    For windows longer than 7 days every hourly slice is binned as soon as
+    it arrives and merged into the running profile, so only one slice of
+    raw data is held in memory at a time.
+    
+    Args:
+        keyword: Search keyword
+        timeframe: One of TIMEFRAME_DAYS keys
+        on_apify_fallback: Optional callback run before each Apify fetch
+                           (used to extend the cache-fill lock)
+        geo: Google Trends region
+        tier: Popularity tier for source statistics
+        
+    Returns:
+        Tuple of (profile, source, stats)
+        
+    Raises:
+        DataNotFoundException: If no slice returned data
+        DataValidationException: If data validation fails
+    """
+    slices = timeframe_slices(timeframe)
+    
+    profile = TrendProfile()
+    source = "pytrends"
+    stats = {"duration_ms": 0, "compute_units": 0.0}
+    empty_compute_units = 0.0
+    # Async jobs keep finished slices across deferred passes (see ApifyDeferral)
+    deferral = _apify_deferral.get() if len(slices) > 1 else None
+    
+    for slice_range in slices:
+        done = deferral.slices.get((keyword, slice_range, geo)) if deferral is not None else None
+        if done is None:
+            try:
+                timeline_data, slice_stats, slice_source = fetch_timeline(keyword, slice_range, geo, on_apify_fallback, tier)
+            except DataNotFoundException as e:
+                if len(slices) == 1:
+                    raise
+                logger.warning("No data for slice %s, skipping: %s", slice_range, keyword)
+                done = (None, {"compute_units": e.compute_units}, "")
+            else:
+                done = (bin_timeline(timeline_data), slice_stats, slice_source)
+            if deferral is not None:
+                deferral.slices[(keyword, slice_range, geo)] = done
+        
+        slice_profile, slice_stats, slice_source = done
+        if slice_profile is None:
+            empty_compute_units += slice_stats["compute_units"]
+            continue
+        if slice_source == "apify":
+            source = "apify"
+        
+        profile.merge(slice_profile)
+        stats["duration_ms"] += slice_stats.get("duration_ms", 0)
+        stats["compute_units"] += slice_stats.get("compute_units", 0.0)
+    
+    if profile.is_empty():
+        raise DataNotFoundException(f"No data found for keyword: {keyword}", compute_units=empty_compute_units)
+    
+    stats["source"] = source
+    if len(slices) > 1:
+        stats["slices"] = len(slices)
+        logger.info("Stitched %s slices (%s points) for %s: %s", len(slices), profile.total_points, timeframe, keyword)
+    return profile, source, stats
+
+
+def can_refresh_incrementally(profile: TrendProfile, timeframe: str, now: Optional[float] = None) -> bool:
+    """
+    Check whether a stored profile can be updated with a delta fetch.
+    
+    The profile must have an anchor tail, its newest point must be recent
+    enough for a single hourly delta range, and the span it covers must not
+    exceed the window by more than INCREMENTAL_MAX_SPAN_RATIO (after that a
+    full fetch rebuilds it so old hours age out).
+    """
+    if not settings.INCREMENTAL_REFRESH_ENABLED or profile.is_empty():
+        return False
+    if profile.first_ts is None or profile.last_ts is None or not profile.tail:
+        return False
+    
+    now = now or time.time()
+    max_span = TIMEFRAME_DAYS[timeframe] * 86400 * settings.INCREMENTAL_MAX_SPAN_RATIO
+    max_gap = HOURLY_SLICE_DAYS * 86400 - PROFILE_TAIL_HOURS * 3600
+    return (now - profile.first_ts) <= max_span and (now - profile.last_ts) <= max_gap
+
+
+def refresh_profile(
+    keyword: str,
+    profile: TrendProfile,
+    on_apify_fallback: Optional[Callable[[], None]] = None,
+    geo: str = DEFAULT_GEO,
+    tier: str = DEFAULT_SOURCE_TIER
+) -> Tuple[TrendProfile, str, Dict[str, Any]]:
+    """
+    Update a stored profile with only the hours ingested since its last point.
+    
+    Fetches an hourly range starting PROFILE_TAIL_HOURS before the last
+    ingested point, rescales it so the overlapping hours match the stored
+    tail, and bins only the points newer than the last ingested timestamp.
+    
+    Args:
+        keyword: Search keyword
+        profile: Stored profile (updated in place)
+        on_apify_fallback: Optional callback run before the Apify fetch
+        geo: Google Trends region
+        tier: Popularity tier for source statistics
+        
+    Returns:
+        Tuple of (profile, source, stats)
+        
+    Raises:
+        DataNotFoundException: If the delta fetch returned no data
+        DataValidationException: If data validation fails
+    """
+    start = datetime.utcfromtimestamp(profile.last_ts - PROFILE_TAIL_HOURS * 3600)
+    end = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    delta_range = f"{start:%Y-%m-%dT%H} {end:%Y-%m-%dT%H}"
+    
+    timeline_data, stats, source = fetch_timeline(keyword, delta_range, geo, on_apify_fallback, tier)
+    
+    df = _clean_timeline(timeline_data)
+    timestamps = _epoch_seconds(df['date'])
+    values = df['value'].to_numpy(dtype=float)
+    
+    # Rescale the delta so its overlap with the stored tail lines up
+    overlap = [(profile.tail[int(round(ts))], value)
+               for ts, value in zip(timestamps, values)
+               if int(round(ts)) in profile.tail]
+    stored_sum = sum(old for old, _ in overlap)
+    fetched_sum = sum(new for _, new in overlap)
+    scale = stored_sum / fetched_sum if stored_sum > 0 and fetched_sum > 0 else 1.0
+    
+    new_mask = timestamps > profile.last_ts
+    if new_mask.any():
+        profile.add_points(
+            df['date'].dt.dayofweek.to_numpy()[new_mask],
+            df['date'].dt.hour.to_numpy()[new_mask],
+            values[new_mask] * scale,
+            timestamps=timestamps[new_mask]
+        )
+    
+    stats = dict(stats)
+    stats.update({
+        "source": source,
+        "incremental": True,
+        "new_points": int(new_mask.sum()),
+        "scale": round(scale, 4)
+    })
+    logger.info("Incremental refresh merged %s new points (scale %.3f): %s", int(new_mask.sum()), scale, keyword)
+    return profile, source, stats
+
+
+def compute_prediction(
+    keyword: str,
+    timeframe: str = DEFAULT_TIMEFRAME,
+    previous: Optional[TrendProfile] = None,
+    on_apify_fallback: Optional[Callable[[], None]] = None,
+    geo: str = DEFAULT_GEO,
+    tz: str = DEFAULT_TZ
+) -> Tuple[Dict[str, Any], str, Dict[str, Any], TrendProfile]:
+    """
+    Compute recommendations, incrementally when a usable profile is stored.
+    
+    Args:
+        keyword: Search keyword
+        timeframe: One of TIMEFRAME_DAYS keys
+        previous: Stored profile from an earlier fetch (optional)
+        on_apify_fallback: Optional callback run before each Apify fetch
+        geo: Google Trends region
+        tz: Timezone the recommendations are reported in
+        
+    Returns:
+        Tuple of (processed_data, source, stats, profile)
+    """
+    profile = None
+    tier = popularity_tier(previous)
+    if previous is not None and can_refresh_incrementally(previous, timeframe):
+        try:
+            profile, source, stats = refresh_profile(keyword, previous, on_apify_fallback, geo, tier)
+        except (DataNotFoundException, DataValidationException) as e:
+            logger.warning("Incremental refresh failed (%s), doing full fetch for: %s", e, keyword)
+    
+    if profile is None:
+        profile, source, stats = fetch_profile(keyword, timeframe, on_apify_fallback, geo, tier)
+    
+    profile.fetched_at = time.time()
+    return build_recommendations(profile, tz), source, stats, profile
+
+
+def load_profile(
+    normalized: str,
+    timeframe: str = DEFAULT_TIMEFRAME,
+    geo: str = DEFAULT_GEO
+) -> Optional[TrendProfile]:
+    """Load the stored profile for a keyword, or None if missing/unreadable."""
+    try:
+        stored = redis_get_with_retry(build_profile_key(normalized, timeframe, geo))
+        return TrendProfile.from_dict(json.loads(stored)) if stored else None
+    except (RedisError, RedisConnectionError) as e:
+        logger.warning("Redis error while loading profile for %s: %s", normalized, e)
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        logger.warning("Invalid stored profile for %s: %s", normalized, e)
+    return None
+
+
+def profile_ttl_seconds(timeframe: str = DEFAULT_TIMEFRAME) -> int:
+    """Lifetime of a stored profile: the max incremental span of the window."""
+    return int(TIMEFRAME_DAYS[timeframe] * 86400 * settings.INCREMENTAL_MAX_SPAN_RATIO)
+
+
+def save_profile(
+    normalized: str,
+    profile: TrendProfile,
+    timeframe: str = DEFAULT_TIMEFRAME,
+    geo: str = DEFAULT_GEO,
+    fence: Optional[int] = None
+) -> None:
+    """Persist a profile; kept for the max incremental span of the window."""
+    ttl = profile_ttl_seconds(timeframe)
+    try:
+        redis_set_fenced_with_retry(build_profile_key(normalized, timeframe, geo), profile.to_dict(), fence, ex=ttl)
+    except (RedisError, RedisConnectionError) as e:
+        logger.warning("Failed to save profile for %s: %s", normalized, e)
+
+
+# Freshness window of a cache entry (seconds)
+CACHE_FRESH_SECONDS = 86400
+
+# Placeholder for meta.keyword in pre-serialized bodies; the raw keyword
+# differs per request (e.g. "Skin-Care!" vs "skin care") for the same entry
+_KEYWORD_PLACEHOLDER = "__keyword__"
+
+
+def public_prediction_data(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Strip internal fields from processed data for API output.
+    Scores are hidden from recommendations and chart_data is dropped.
+    """
+    public = {k: v for k, v in data.items() if k != "chart_data"}
+    if "recommendations" in public:
+        public["recommendations"] = [
+            {k: v for k, v in rec.items() if k != "score"}
+            for rec in public["recommendations"]
+        ]
+    return public
+
+
+def cache_response_body(
+    normalized: str,
+    timeframe: str,
+    data: Dict[str, Any],
+    stats: Optional[Dict[str, Any]],
+    ttl: int = CACHE_FRESH_SECONDS,
+    geo: str = DEFAULT_GEO,
+    tz: str = DEFAULT_TZ,
+    delta: Optional[float] = None
+) -> None:
+    """
+    Store the serialized /predict body served on fresh cache hits.
+    
+    The body is validated once here and stored as two halves around
+    meta.keyword, so hits only splice in the JSON-encoded keyword. Its TTL
+    is the remaining freshness of the cache entry it was rendered from, so
+    it expires together with that cache generation. A header line keeps the
+    entry's write time and fetch duration for early refresh decisions.
+    """
+    if ttl <= 0:
+        return
+    body = PredictionResponse(
+        status="success",
+        meta={
+            "keyword": _KEYWORD_PLACEHOLDER,
+            "source": "cache_fresh",
+            "timeframe": timeframe,
+            "geo": geo,
+            "tz": tz,
+            "apify_stats": stats
+        },
+        data=public_prediction_data(data)
+    ).model_dump_json()
+    prefix, suffix = body.split(json.dumps(_KEYWORD_PLACEHOLDER), 1)
+    header = json.dumps([time.time() - (CACHE_FRESH_SECONDS - ttl), delta])
+    try:
+        redis_set_with_retry(
+            build_response_key(normalized, timeframe, geo, tz), f"{header}\n{prefix}\n{suffix}", ex=int(ttl)
+        )
+    except (RedisError, RedisConnectionError) as e:
+        logger.warning("Failed to cache response body for %s: %s", normalized, e)
+
+
+def get_cached_response_body(
+    keyword: str,
+    timeframe: str = DEFAULT_TIMEFRAME,
+    geo: str = DEFAULT_GEO,
+    tz: Optional[str] = None,
+    background_tasks: Optional[BackgroundTasks] = None
+) -> Optional[bytes]:
+    """
+    Get the pre-serialized /predict body for a fresh cache hit.
+    
+    Args:
+        keyword: Raw search keyword (echoed in meta.keyword)
+        timeframe: Lookback window
+        geo: Google Trends region
+        tz: Reporting timezone (defaults to the geo's primary timezone)
+        background_tasks: If given, a hit may schedule an early refresh
+        
+    Returns:
+        Response body bytes, or None on miss or Redis error
+    """
+    normalized = normalize_keyword(keyword)
+    geo, tz = resolve_locale(geo, tz)
+    try:
+        stored = redis_get_with_retry(build_response_key(normalized, timeframe, geo, tz), replica_ok=True)
+    except (RedisError, RedisConnectionError) as e:
+        logger.warning("Redis error during response cache check: %s", e)
+        return None
+    
+    parts = stored.split("\n", 2) if stored else []
+    if len(parts) != 3:
+        return None
+    
+    header, prefix, suffix = parts
+    logger.info("Cache hit (serialized) for keyword: %s", normalized)
+    if background_tasks is not None:
+        written_at, delta = json.loads(header)
+        if xfetch_due(written_at, delta):
+            schedule_early_refresh(keyword, normalized, timeframe, geo, tz, background_tasks, written_at)
+    return f"{prefix}{json.dumps(keyword, ensure_ascii=False)}{suffix}".encode("utf-8")
+
+
+metrics.describe("cache_early_refresh_total", "Early (XFetch) refresh decisions by outcome")
+metrics.describe("cache_early_refresh_lead_seconds_total", "Freshness left on entries when an early refresh was scheduled")
+
+
+def xfetch_due(
+    written_at: float,
+    delta: Optional[float],
+    now: Optional[float] = None,
+    beta: Optional[float] = None,
+    rand: Optional[float] = None
+) -> bool:
+    """
+    Decide whether a read of a fresh entry should recompute it early (XFetch).
+    
+    A read refreshes with probability exp(-remaining / (delta * beta)), where
+    remaining is the time left before the entry goes stale and delta is how
+    long the fetch behind it took. Under steady traffic a single read
+    refreshes shortly before the 24h boundary, instead of every reader
+    missing at the same instant; slow keywords start earlier.
+    
+    Args:
+        written_at: When the entry was written (epoch seconds)
+        delta: Seconds the fetch took (None uses XFETCH_DEFAULT_DELTA)
+        now: Current time (defaults to time.time())
+        beta: Eagerness factor (defaults to XFETCH_BETA)
+        rand: Uniform sample in (0, 1] (defaults to a random draw)
+        
+    Returns:
+        True if this read should trigger a refresh
+    """
+    if not settings.XFETCH_ENABLED:
+        return False
+    
+    now = time.time() if now is None else now
+    delta = settings.XFETCH_DEFAULT_DELTA if delta is None else delta
+    beta = settings.XFETCH_BETA if beta is None else beta
+    rand = 1.0 - random.random() if rand is None else rand
+    return now - written_at - delta * beta * math.log(rand) >= CACHE_FRESH_SECONDS
+
+
+def schedule_early_refresh(
+    keyword: str,
+    normalized: str,
+    timeframe: str,
+    geo: str,
+    tz: str,
+    background_tasks: BackgroundTasks,
+    written_at: float
+) -> bool:
+    """
+    Refresh an entry picked by xfetch_due() after the response is sent.
+    
+    The refresh holds the keyword's fetch lock, so concurrent early picks
+    (from any worker) collapse into one upstream fetch. Readers keep getting
+    the current entry until the new one is written.
+    
+    Returns:
+        True if this request scheduled the refresh
+    """
+    lock = FetchLock(build_lock_key(normalized, timeframe, geo))
+    try:
+        acquired = lock.acquire()
+    except (RedisError, RedisConnectionError) as e:
+        logger.warning("Skipping early refresh for %s: %s", normalized, e)
+        return False
+    
+    if not acquired:
+        metrics.inc("cache_early_refresh_total", outcome="in_progress")
+        return False
+    
+    remaining = CACHE_FRESH_SECONDS - (time.time() - written_at)
+    metrics.inc("cache_early_refresh_total", outcome="scheduled")
+    metrics.inc("cache_early_refresh_lead_seconds_total", max(remaining, 0.0))
+    background_tasks.add_task(update_cache_background, keyword, timeframe, geo, tz, lock=lock)
+    logger.info("Early refresh scheduled for %s (%.0fs before expiry)", normalized, remaining)
+    return True
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+    
+    Answers "definitely not added" or "maybe added"; items cannot be removed,
+    so the filter is cleared once it holds `capacity` items to keep the
+    false positive rate near `error_rate`.
+    """
+    
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+    
+    def _positions(self, item: str) -> List[int]:
+        # Double hashing: position_i = h1 + i * h2
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+    
+    def add(self, item: str) -> None:
+        with self._lock:
+            if item in self:
+                return
+            if self.count >= self.capacity:
+                self._bits = bytearray(len(self._bits))
+                self.count = 0
+            for pos in self._positions(item):
+                self._bits[pos >> 3] |= 1 << (pos & 7)
+            self.count += 1
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._bits = bytearray(len(self._bits))
+            self.count = 0
+    
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+# Known-empty keywords seen by this worker; consulted before the cache-fill lock
+_empty_filter = BloomFilter(settings.NEGATIVE_FILTER_CAPACITY, settings.NEGATIVE_FILTER_ERROR_RATE)
+
+metrics.describe("negative_cache_hits_total", "Requests answered from the negative cache")
+metrics.describe("negative_cache_stores_total", "Negative cache entries written")
+metrics.describe("negative_cache_invalidations_total", "Negative cache entries removed after data was found")
+metrics.describe("negative_filter_false_positives_total", "Filter matches with no negative cache entry")
+metrics.describe("negative_cache_compute_units_saved_total", "Apify compute units not spent thanks to the negative cache")
+metrics.describe("negative_cache_seconds_saved_total", "Upstream fetch seconds not spent thanks to the negative cache")
+
+
+def check_negative_cache(
+    normalized: str,
+    timeframe: str = DEFAULT_TIMEFRAME,
+    use_filter: bool = True,
+    geo: str = DEFAULT_GEO
+) -> None:
+    """
+    Fail fast for keywords recently found to have no trend data.
+    
+    Args:
+        normalized: Normalized keyword
+        timeframe: Lookback window
+        use_filter: Only query Redis if the local filter may contain the
+                    keyword (skips the roundtrip for the common case)
+        geo: Google Trends region
+        
+    Raises:
+        DataNotFoundException: If a negative cache entry exists
+    """
+    if not settings.NEGATIVE_CACHE_ENABLED:
+        return
+    
+    negative_key = build_negative_key(normalized, timeframe, geo)
+    if use_filter and negative_key not in _empty_filter:
+        return
+    
+    try:
+        stored = redis_get_with_retry(negative_key)
+    except (RedisError, RedisConnectionError) as e:
+        logger.warning("Redis error during negative cache check: %s", e)
+        return
+    
+    if not stored:
+        if use_filter:
+            metrics.inc("negative_filter_false_positives_total")
+        return
+    
+    try:
+        entry = json.loads(stored)
+    except (json.JSONDecodeError, TypeError):
+        entry = {}
+    
+    _empty_filter.add(negative_key)
+    metrics.inc("negative_cache_hits_total")
+    metrics.inc("negative_cache_compute_units_saved_total", float(entry.get("compute_units", 0.0)))
+    metrics.inc("negative_cache_seconds_saved_total", float(entry.get("duration_ms", 0)) / 1000)
+    logger.info("Negative cache hit for keyword: %s", normalized)
+    raise DataNotFoundException(f"No data found for keyword: {normalized}")
+
+
+def store_negative_cache(
+    normalized: str,
+    timeframe: str,
+    error: DataNotFoundException,
+    duration_ms: int,
+    geo: str = DEFAULT_GEO
+) -> None:
+    """
+    Remember that a keyword returned no data, for NEGATIVE_CACHE_TTL seconds.
+    
+    The entry records what the failed fill cost so later hits can report
+    the compute units and fetch time they saved.
+    """
+    if not settings.NEGATIVE_CACHE_ENABLED:
+        return
+    
+    negative_key = build_negative_key(normalized, timeframe, geo)
+    entry = {
+        "timestamp": time.time(),
+        "compute_units": error.compute_units,
+        "duration_ms": duration_ms
+    }
+    try:
+        redis_set_with_retry(negative_key, json.dumps(entry), ex=settings.NEGATIVE_CACHE_TTL)
+        _empty_filter.add(negative_key)
+        metrics.inc("negative_cache_stores_total")
+        logger.info("Negative cache stored for %s (%ss)", normalized, settings.NEGATIVE_CACHE_TTL)
+    except (RedisError, RedisConnectionError) as e:
+        logger.warning("Failed to store negative cache for %s: %s", normalized, e)
+
+
+def invalidate_negative_cache(
+    normalized: str,
+    timeframe: str = DEFAULT_TIMEFRAME,
+    geo: str = DEFAULT_GEO
+) -> None:
+    """Drop the negative cache entry after a fill found data."""
+    if not settings.NEGATIVE_CACHE_ENABLED:
+        return
+    
+    try:
+        if redis_delete_with_retry(build_negative_key(normalized, timeframe, geo)):
+            metrics.inc("negative_cache_invalidations_total")
+            logger.info("Negative cache invalidated for: %s", normalized)
+    except (RedisError, RedisConnectionError) as e:
+        logger.warning("Failed to invalidate negative cache for %s: %s", normalized, e)
+
+
+class FetchAdmission:
+    """
+    Admission control for upstream (pytrends/Apify) fetches in this worker.
+    
+    At most `max_concurrent` fetches run at once; up to `max_queue` more
+    wait for a slot. Arrivals beyond that are shed immediately, and queued
+    ones are shed once their wait exceeds the timeout, so a burst of new
+    keywords cannot tie up every threadpool thread. Async jobs, which are
+    never shed, wait on the event loop instead (acquire_async).
+    """
+    
+    def __init__(self, max_concurrent: int, max_queue: int):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+        self._async_waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+    
+    def _publish(self) -> None:
+        metrics.set("upstream_fetch_active", self.active)
+        metrics.set("upstream_fetch_queue_depth", self.waiting)
+    
+    def _shed(self, reason: str) -> None:
+        metrics.inc("upstream_fetch_shed_total", reason=reason)
+        logger.warning("Upstream fetch shed (%s): %s active, %s queued", reason, self.active, self.waiting)
+        raise UpstreamOverloadedException("Upstream fetch capacity exhausted. Please try again.")
+    
+    def acquire(self, timeout: Optional[float] = None, shed: bool = True) -> None:
+        """
+        Take a fetch slot, waiting in the bounded queue if all are busy.
+        
+        Args:
+            timeout: Max seconds to wait for a slot (None = no limit)
+            shed: Reject immediately when the queue is full; False waits
+                  outside the queue bound (async jobs must not be dropped)
+            
+        Raises:
+            UpstreamOverloadedException: If the request is shed
+        """
+        with self._cond:
+            if self.active < self.max_concurrent:
+                self.active += 1
+                self._publish()
+                return
+            if shed and self.waiting >= self.max_queue:
+                self._shed("queue_full")
+            
+            self.waiting += 1
+            self._publish()
+            deadline = None if timeout is None else time.monotonic() + timeout
+            try:
+                while self.active >= self.max_concurrent:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._shed("timeout")
+                    self._cond.wait(remaining)
+                self.active += 1
+            finally:
+                self.waiting -= 1
+                self._publish()
+    
+    async def acquire_async(self) -> None:
+        """
+        Take a fetch slot, awaiting it on the event loop if all are busy.
+        
+        Used by async jobs: like acquire(shed=False) the wait has no queue
+        bound or timeout, but it holds no threadpool thread.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self.active < self.max_concurrent:
+                    self.active += 1
+                    self._publish()
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+                self.waiting += 1
+                self._publish()
+            try:
+                await waiter
+            except BaseException:
+                with self._cond:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+                    else:
+                        # Woken for a free slot but cancelled: pass the wakeup on
+                        self._wake_locked()
+                    raise
+            finally:
+                with self._cond:
+                    self.waiting -= 1
+                    self._publish()
+    
+    def _wake_locked(self) -> None:
+        """Wake one thread and one event-loop waiter; the loser waits again."""
+        self._cond.notify()
+        while self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(lambda w=waiter: w.done() or w.set_result(None))
+                return
+            except RuntimeError:
+                continue  # loop closed
+    
+    def release(self) -> None:
+        """Return a fetch slot and wake a waiter."""
+        with self._cond:
+            self.active -= 1
+            self._publish()
+            self._wake_locked()
+    
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None, shed: bool = True) -> Iterator[None]:
+        """Context manager around acquire/release."""
+        self.acquire(timeout, shed)
+        try:
+            yield
+        finally:
+            self.release()
+    
+    @asynccontextmanager
+    async def slot_async(self) -> AsyncIterator[None]:
+        """Async context manager around acquire_async/release."""
+        await self.acquire_async()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+upstream_admission = FetchAdmission(settings.UPSTREAM_MAX_CONCURRENCY, settings.UPSTREAM_MAX_QUEUE)
+
+metrics.describe("upstream_fetch_active", "Upstream fetches running in this worker")
+metrics.describe("upstream_fetch_queue_depth", "Requests waiting for an upstream fetch slot")
+metrics.describe("upstream_fetch_shed_total", "Requests rejected because upstream fetch capacity was exhausted")
+
+
+def fence_ttl_seconds() -> int:
+    """
+    TTL of the per-lock fence counters.
+    
+    Counters must outlive every entry written under them (cache entries and
+    profiles), otherwise a reset counter would hand out tokens below the
+    ones already stored and every later fenced write would be rejected.
+    """
+    return max(2 * 88200, max(profile_ttl_seconds(timeframe) for timeframe in TIMEFRAME_DAYS))
+
+metrics.describe("fetch_lock_lost_total", "Fetch locks that expired or changed owner while held")
+
+
+class FetchLock:
+    """
+    Keyword fetch lock with an owner token, background renewal and fencing.
+    
+    The stored value is "{fence}:{owner}". The fence comes from a per-lock
+    counter, so every acquisition gets a larger number than the ones before
+    it. While held, a daemon thread resets the TTL as long as the value is
+    still ours, so slow Apify runs keep the lock without a long fixed TTL and
+    a crashed holder frees it within LOCK_TTL_SECONDS. Release deletes only
+    our own value. Writes made under the lock pass `fence` to
+    redis_set_fenced_with_retry(), so a holder whose lock expired anyway
+    cannot overwrite what a later holder stored.
+    """
+    
+    def __init__(self, key: str, ttl: Optional[int] = None, renew_interval: Optional[float] = None):
+        self.key = key
+        self.ttl = ttl or settings.LOCK_TTL_SECONDS
+        self.renew_interval = renew_interval or settings.LOCK_RENEW_INTERVAL
+        self.fence: Optional[int] = None
+        self.token: Optional[str] = None
+        self._stop = threading.Event()
+        self._lost = threading.Event()
+    
+    @property
+    def held(self) -> bool:
+        """Whether the lock is ours as of the last renewal."""
+        return self.token is not None and not self._lost.is_set()
+    
+    def acquire(self) -> bool:
+        """
+        Try once to take the lock; starts background renewal on success.
+        
+        Raises:
+            RedisError: If Redis is unavailable
+        """
+        fence_key = f"{self.key}:fence"
+        fence = redis_incr_with_retry(fence_key)
+        redis_expire_with_retry(fence_key, fence_ttl_seconds())
+        token = f"{fence}:{uuid.uuid4().hex}"
+        if not redis_set_with_retry(self.key, token, ex=self.ttl, nx=True):
+            return False
+        
+        self.fence, self.token = fence, token
+        threading.Thread(target=self._renew_loop, name=f"renew-{self.key}", daemon=True).start()
+        return True
+    
+    def renew(self) -> bool:
+        """Reset the TTL if the lock is still ours."""
+        if self.token is None:
+            return False
+        return redis_compare_and_with_retry(self.key, self.token, lambda pipe: pipe.expire(self.key, self.ttl))
+    
+    def release(self) -> bool:
+        """Stop renewal and delete the lock if it is still ours."""
+        self._stop.set()
+        if self.token is None:
+            return False
+        token, self.token = self.token, None
+        return redis_compare_and_with_retry(self.key, token, lambda pipe: pipe.delete(self.key))
+    
+    def _renew_loop(self) -> None:
+        while not self._stop.wait(self.renew_interval):
+            try:
+                if self.renew():
+                    continue
+            except (RedisError, RedisConnectionError) as e:
+                logger.warning("Failed to renew lock %s: %s", self.key, e)
+                continue
+            if not self._stop.is_set():
+                self._lost.set()
+                metrics.inc("fetch_lock_lost_total")
+                logger.warning("Lock %s lost while held (fence %s)", self.key, self.fence)
+            return
+
+
+def predict_from_profile(
+    normalized: str,
+    timeframe: str = DEFAULT_TIMEFRAME,
+    geo: str = DEFAULT_GEO,
+    tz: str = DEFAULT_TZ
+) -> Optional[Dict[str, Any]]:
+    """
+    Serve a timezone without refetching by re-binning the geo's stored UTC profile.
+    
+    The profile is shared by every timezone of a geo. If it was fetched
+    within the freshness window, recommendations for `tz` are built from it
+    and cached under the timezone's key with the profile's fetch time, so
+    the entry expires together with the data it came from.
+    
+    Returns:
+        Processed data, or None if there is no fresh profile
+    """
+    profile = load_profile(normalized, timeframe, geo)
+    if profile is None or profile.fetched_at is None:
+        return None
+    
+    age = time.time() - profile.fetched_at
+    if age >= CACHE_FRESH_SECONDS:
+        return None
+    
+    try:
+        processed = build_recommendations(profile, tz)
+    except DataValidationException as e:
+        logger.warning("Stored profile unusable for %s: %s", normalized, e)
+        return None
+    
+    cache_entry = {
+        "timestamp": profile.fetched_at,
+        "data": processed,
+        "stats": None
+    }
+    try:
+        redis_set_fenced_with_retry(build_cache_key(normalized, timeframe, geo, tz), cache_entry, None, ex=88200)
+        cache_response_body(normalized, timeframe, processed, None, int(CACHE_FRESH_SECONDS - age), geo, tz)
+    except (RedisError, RedisConnectionError) as e:
+        logger.warning("Failed to cache re-binned prediction for %s: %s", normalized, e)
+    
+    logger.info("Re-binned stored %s profile for %s: %s", geo, tz, normalized)
+    return processed
+
+
+def update_cache_background(
+    keyword: str,
+    timeframe: str = DEFAULT_TIMEFRAME,
+    geo: str = DEFAULT_GEO,
+    tz: Optional[str] = None,
+    lock: Optional[FetchLock] = None
+) -> None:
     """
     Background task to refresh stale cache data.
     Tries pytrends first, falls back to Apify.
     
     Args:
         keyword: Keyword to refresh cache for
+        timeframe: Lookback window to refresh
+        geo: Google Trends region
+        tz: Reporting timezone (defaults to the geo's primary timezone)
+        lock: Fetch lock taken by the caller; its fence guards the writes and it is released when done
     """
     try:
         normalized = normalize_keyword(keyword)
-        logger.info(f"Background refresh started for keyword: {normalized}")
+        geo, tz = resolve_locale(geo, tz)
+        logger.info("Background refresh started for keyword: %s (%s, %s, %s)", normalized, timeframe, geo, tz)
         
-        # Try pytrends first (fast)
-        try:
-            timeline_data, stats = fetch_from_pytrends(keyword)
-            processed = process_data(timeline_data)
-            logger.info(f"Background refresh via pytrends for: {normalized}")
-        except PyTrendsUnavailableException:
-            # Fallback to Apify
-            logger.info(f"Background refresh via Apify fallback for: {normalized}")
-            timeline_data, stats = fetch_from_apify(keyword)
-            processed = process_data(timeline_data)
+        previous = load_profile(normalized, timeframe, geo)
+        started = time.time()
+        with upstream_admission.slot(settings.UPSTREAM_QUEUE_TIMEOUT):
+            processed, source, stats, profile = compute_prediction(keyword, timeframe, previous, geo=geo, tz=tz)
+        delta = round(time.time() - started, 3)
+        fence = lock.fence if lock else None
+        save_profile(normalized, profile, timeframe, geo, fence)
+        logger.info("Background refresh via %s for: %s", source, normalized)
         
         # Prepare cache entry
         cache_entry = {
             "timestamp": time.time(),
             "data": processed,
-            "stats": stats
+            "stats": stats,
+            "delta": delta
         }
         
         # Update cache
-        cache_key = f"trend:{normalized}"
+        cache_key = build_cache_key(normalized, timeframe, geo, tz)
         try:
-            redis_set_with_retry(cache_key, json.dumps(cache_entry), ex=88200)
-            logger.info(f"Background refresh completed for keyword: {normalized}")
+            if redis_set_fenced_with_retry(cache_key, cache_entry, fence, ex=88200):
+                cache_response_body(normalized, timeframe, processed, stats, geo=geo, tz=tz, delta=delta)
+                invalidate_negative_cache(normalized, timeframe, geo)
+                logger.info("Background refresh completed for keyword: %s", normalized)
         except (RedisError, RedisConnectionError) as e:
-            logger.error(f"Failed to update cache for {normalized}: {str(e)}")
+            logger.error("Failed to update cache for %s: %s", normalized, e)
     except Exception as e:
-        logger.error(f"Background refresh failed for keyword {keyword}: {str(e)}")
+        logger.error("Background refresh failed for keyword %s: %s", keyword, e)
+    finally:
+        if lock:
+            try:
+                lock.release()
+            except (RedisError, RedisConnectionError) as e:
+                logger.error("Failed to release lock for %s: %s", keyword, e)
 
 
-def get_prediction(keyword: str) -> Tuple[Dict[str, Any], str, Optional[Dict[str, Any]]]:
+def get_prediction(
+    keyword: str,
+    timeframe: str = DEFAULT_TIMEFRAME,
+    geo: str = DEFAULT_GEO,
+    tz: Optional[str] = None,
+    admitted: bool = False
+) -> Tuple[Dict[str, Any], str, Optional[Dict[str, Any]]]:
     """
     Get prediction data directly (used by async jobs).
     Checks cache first, tries pytrends (fast), falls back to Apify if needed.
     
     Args:
         keyword: Search keyword
+        timeframe: Lookback window (one of TIMEFRAME_DAYS keys)
+        geo: Google Trends region
+        tz: Reporting timezone (defaults to the geo's primary timezone)
+        admitted: The caller already holds an upstream fetch slot
+                  (async jobs await one with FetchAdmission.acquire_async)
         
     Returns:
         Tuple of (processed_data, source, stats)
@@ -540,13 +2571,14 @@ def get_prediction(keyword: str) -> Tuple[Dict[str, Any], str, Optional[Dict[str
         DataValidationException: If data validation fails
     """
     normalized = normalize_keyword(keyword)
-    logger.info(f"Getting prediction for keyword: {normalized}")
+    geo, tz = resolve_locale(geo, tz)
+    logger.info("Getting prediction for keyword: %s", normalized)
     
     # Check cache first
-    cache_key = f"trend:{normalized}"
+    cache_key = build_cache_key(normalized, timeframe, geo, tz)
     
     try:
-        cached = redis_get_with_retry(cache_key)
+        cached = redis_get_with_retry(cache_key, replica_ok=True)
         
         if cached:
             cache_data = json.loads(cached)
@@ -555,51 +2587,222 @@ def get_prediction(keyword: str) -> Tuple[Dict[str, Any], str, Optional[Dict[str
             
             # Cache is fresh (< 24 hours)
             if age < 86400:
-                logger.info(f"Cache hit for keyword: {normalized}")
+                logger.info("Cache hit for keyword: %s", normalized)
                 return cache_data["data"], "cache", cache_data.get("stats")
     except (RedisError, RedisConnectionError) as e:
-        logger.warning(f"Redis error during cache check: {str(e)}")
+        logger.warning("Redis error during cache check: %s", e)
     except json.JSONDecodeError as e:
-        logger.warning(f"Invalid JSON in cache for {normalized}: {str(e)}")
+        logger.warning("Invalid JSON in cache for %s: %s", normalized, e)
+    
+    # Same geo already fetched for another timezone - re-bin instead of refetching
+    rebinned = predict_from_profile(normalized, timeframe, geo, tz)
+    if rebinned is not None:
+        return rebinned, "cache", None
     
-    # Cache miss - try pytrends first (fast)
-    logger.info(f"Cache miss, trying pytrends first for: {normalized}")
-    source = "apify"  # Default
+    # Known-empty keyword - skip the upstream fetch
+    check_negative_cache(normalized, timeframe, use_filter=False, geo=geo)
     
+    # Cache miss - try pytrends first (fast), Apify as fallback
+    logger.info("Cache miss, trying pytrends first for: %s", normalized)
+    previous = load_profile(normalized, timeframe, geo)
+    started = time.time()
     try:
-        timeline_data, stats = fetch_from_pytrends(keyword)
-        processed = process_data(timeline_data)
-        source = "pytrends"
-        logger.info(f"✅ Pytrends succeeded for: {normalized}")
-        
-    except PyTrendsUnavailableException as e:
-        # Pytrends failed - fallback to Apify
-        logger.warning(f"Pytrends failed, falling back to Apify for: {normalized}")
-        timeline_data, stats = fetch_from_apify(keyword)
-        processed = process_data(timeline_data)
-        source = "apify"
-        logger.info(f"✅ Apify fallback succeeded for: {normalized}")
+        # Jobs wait for a fetch slot instead of being shed (the job runner takes it on the event loop)
+        with nullcontext() if admitted else upstream_admission.slot(shed=False):
+            processed, source, stats, profile = compute_prediction(keyword, timeframe, previous, geo=geo, tz=tz)
+    except DataNotFoundException as e:
+        store_negative_cache(normalized, timeframe, e, int((time.time() - started) * 1000), geo)
+        raise
+    delta = round(time.time() - started, 3)
+    save_profile(normalized, profile, timeframe, geo)
+    logger.info("✅ %s succeeded for: %s", source, normalized)
     
-    # Save to cache
+    # Save to cache (delta = fetch seconds, used for early refresh)
     cache_entry = {
         "timestamp": time.time(),
         "data": processed,
-        "stats": stats
+        "stats": stats,
+        "delta": delta
     }
     
     try:
-        redis_set_with_retry(cache_key, json.dumps(cache_entry), ex=88200)
-        logger.info(f"Data cached for: {normalized}")
+        redis_set_fenced_with_retry(cache_key, cache_entry, None, ex=88200)
+        cache_response_body(normalized, timeframe, processed, stats, geo=geo, tz=tz, delta=delta)
+        invalidate_negative_cache(normalized, timeframe, geo)
+        logger.info("Data cached for: %s", normalized)
     except (RedisError, RedisConnectionError) as e:
-        logger.warning(f"Failed to cache data for {normalized}: {str(e)}")
+        logger.warning("Failed to cache data for %s: %s", normalized, e)
     
     return processed, source, stats
 
 
 
+metrics.describe("rate_limit_rejections_total", "Requests rejected by the global quota or a client limit")
+
+
+@retry(
+    retry=retry_if_exception_type((RedisError, RedisConnectionError)),
+    stop=stop_after_attempt(3),
+    wait=wait_fixed(1),
+    reraise=True
+)
+def redis_rate_limit_with_retry(
+    usage_key: Optional[str],
+    window_keys: Optional[Tuple[str, str]],
+    window: int
+) -> List[Any]:
+    """
+    Count a request against the global quota and a client window in one roundtrip.
+    
+    Returns:
+        MULTI/EXEC results: [global_count, expire_ok] if usage_key is set,
+        followed by [current_count, expire_ok, previous_count] if window_keys is set
+    """
+    # Cluster pipelines cannot span slots in MULTI; the commands are then sent per shard
+    pipe = redis_client.pipeline(transaction=not settings.REDIS_CLUSTER_ENABLED)
+    if usage_key:
+        pipe.incr(usage_key)
+        pipe.expire(usage_key, 86400)  # 24 hours
+    if window_keys:
+        current_key, previous_key = window_keys
+        pipe.incr(current_key)
+        pipe.expire(current_key, window * 2)
+        pipe.get(previous_key)
+    return pipe.execute()
+
+
+def resolve_client(api_key: Optional[str], client_ip: Optional[str]) -> Tuple[str, str]:
+    """
+    Identify the client a request is rate limited as.
+    
+    Known API keys (settings.API_KEYS) use their tier and are tracked by a
+    hash of the key; everything else is limited per IP on the default tier.
+    
+    Returns:
+        Tuple of (client_id, tier)
+    """
+    if api_key and api_key in settings.API_KEYS:
+        digest = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+        return f"key:{digest}", settings.API_KEYS[api_key]
+    return f"ip:{client_ip or 'unknown'}", settings.DEFAULT_RATE_LIMIT_TIER
+
+
+def _sliding_window_retry_after(previous: int, current: int, limit: int, window: int, elapsed: float) -> int:
+    """
+    Seconds until one more request fits under a sliding-window limit.
+    
+    The estimate is previous * (remaining share of the window) + current;
+    it decays as the previous window slides out and resets at the next
+    window, where the current count becomes the decaying one.
+    """
+    remaining = window - elapsed
+    if current + 1 <= limit and previous > 0:
+        wait = remaining - (limit - current - 1) * window / previous
+        if wait < remaining:
+            return max(1, math.ceil(wait))
+    if current <= 0:
+        return max(1, math.ceil(remaining))
+    decay = max(0.0, window * (1 - (limit - 1) / current))
+    return max(1, math.ceil(remaining + decay))
+
+
+def _seconds_until_quota_reset() -> int:
+    """Seconds until the daily usage key rolls over (local midnight)."""
+    now = datetime.now()
+    tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(1, math.ceil((tomorrow - now).total_seconds()))
+
+
+def check_rate_limits(
+    client_id: Optional[str] = None,
+    tier: Optional[str] = None,
+    include_global: bool = True
+) -> None:
+    """
+    Enforce the global daily quota and the client's sliding-window limit.
+    
+    Both counters are incremented in a single MULTI/EXEC roundtrip. The
+    client limit is a sliding-window counter over the tier's window: the
+    previous window's count weighted by its remaining overlap plus the
+    current window's count. A rejected request is un-counted so it does not
+    eat into the global quota or extend the client's wait. Continues without
+    limiting if Redis is unavailable (degraded mode).
+    
+    Args:
+        client_id: Client identity from resolve_client (None = global only)
+        tier: Rate limit tier name (settings.RATE_LIMIT_TIERS key)
+        include_global: Count the request against the global daily quota
+        
+    Raises:
+        HTTPException: 429 with a Retry-After header when a limit is exceeded
+    """
+    usage_key = f"usage:global:{datetime.now():%Y-%m-%d}" if include_global else None
+    
+    window_keys = None
+    limit = window = 0
+    elapsed = 0.0
+    if client_id and settings.CLIENT_RATE_LIMIT_ENABLED:
+        tier_config = settings.RATE_LIMIT_TIERS.get(tier) or settings.RATE_LIMIT_TIERS[settings.DEFAULT_RATE_LIMIT_TIER]
+        limit, window = int(tier_config["limit"]), int(tier_config["window"])
+        now = time.time()
+        window_start = int(now // window) * window
+        elapsed = now - window_start
+        client_tag = hash_tag(client_id)
+        window_keys = (f"ratelimit:{client_tag}:{window_start}", f"ratelimit:{client_tag}:{window_start - window}")
+    
+    if not usage_key and not window_keys:
+        return
+    
+    try:
+        results = redis_rate_limit_with_retry(usage_key, window_keys, window)
+    except (RedisError, RedisConnectionError) as e:
+        logger.error("Redis unavailable for rate limiting: %s", e)
+        # Continue without rate limiting if Redis is down (degraded mode)
+        return
+    
+    global_count = int(results[0]) if usage_key else 0
+    if window_keys:
+        offset = 2 if usage_key else 0
+        current = int(results[offset])
+        previous = int(results[offset + 2] or 0)
+    
+    rejection = None
+    if usage_key and global_count > settings.GLOBAL_RATE_LIMIT:
+        logger.warning("Global rate limit exceeded: %s/%s", global_count - 1, settings.GLOBAL_RATE_LIMIT)
+        rejection = ("global", "Global rate limit exceeded. Please try again later.", _seconds_until_quota_reset())
+    elif window_keys:
+        estimate = previous * (window - elapsed) / window + current
+        if estimate > limit:
+            logger.warning("Client rate limit exceeded for %s (%s): %.1f/%s per %ss", client_id, tier, estimate, limit, window)
+            retry_after = _sliding_window_retry_after(previous, current - 1, limit, window, elapsed)
+            rejection = ("client", f"Rate limit exceeded for tier '{tier}'. Please try again later.", retry_after)
+    
+    if rejection is None:
+        return
+    
+    scope, detail, retry_after = rejection
+    try:
+        # Same cross-slot constraint as the counting pipeline
+        pipe = redis_client.pipeline(transaction=not settings.REDIS_CLUSTER_ENABLED)
+        if usage_key:
+            pipe.decr(usage_key)
+        if window_keys:
+            pipe.decr(window_keys[0])
+        pipe.execute()
+    except (RedisError, RedisConnectionError, RedisClusterException) as e:
+        logger.warning("Failed to un-count rejected request: %s", e)
+    
+    metrics.inc("rate_limit_rejections_total", scope=scope, tier=tier or "global")
+    raise HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(retry_after)})
+
+
 def get_prediction_swr(
     keyword: str,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    timeframe: str = DEFAULT_TIMEFRAME,
+    geo: str = DEFAULT_GEO,
+    tz: Optional[str] = None,
+    check_rate_limit: bool = True
 ) -> Tuple[Dict[str, Any], str, Optional[Dict[str, Any]]]:
     """
     Get prediction data using Stale-While-Revalidate pattern.
@@ -607,43 +2810,32 @@ def get_prediction_swr(
     Args:
         keyword: Search keyword
         background_tasks: FastAPI background tasks
+        timeframe: Lookback window (one of TIMEFRAME_DAYS keys)
+        geo: Google Trends region
+        tz: Reporting timezone (defaults to the geo's primary timezone)
+        check_rate_limit: Set False when the caller already counted this
+                          request against the global quota
         
     Returns:
         Tuple of (processed_data, source, stats)
         
     Raises:
         HTTPException: For rate limiting or service unavailability
+        UpstreamOverloadedException: If no upstream fetch slot is available
     """
     normalized = normalize_keyword(keyword)
-    logger.info(f"Processing request for keyword: {normalized}")
+    geo, tz = resolve_locale(geo, tz)
+    logger.info("Processing request for keyword: %s (%s, %s)", normalized, geo, tz)
     
     # Step 1: Circuit Breaker - Global Rate Limit
-    date_str = datetime.now().strftime("%Y-%m-%d")
-    usage_key = f"usage:global:{date_str}"
-    
-    try:
-        current_usage = redis_get_with_retry(usage_key)
-        current_usage = int(current_usage) if current_usage else 0
-        
-        if current_usage >= settings.GLOBAL_RATE_LIMIT:
-            logger.warning(f"Global rate limit exceeded: {current_usage}/{settings.GLOBAL_RATE_LIMIT}")
-            raise HTTPException(
-                status_code=429,
-                detail="Global rate limit exceeded. Please try again later."
-            )
-        
-        # Increment usage counter
-        redis_incr_with_retry(usage_key)
-        redis_expire_with_retry(usage_key, 86400)  # 24 hours
-    except (RedisError, RedisConnectionError) as e:
-        logger.error(f"Redis unavailable for rate limiting: {str(e)}")
-        # Continue without rate limiting if Redis is down (degraded mode)
+    if check_rate_limit:
+        check_rate_limits()
     
     # Step 2: Check Cache
-    cache_key = f"trend:{normalized}"
+    cache_key = build_cache_key(normalized, timeframe, geo, tz)
     
     try:
-        cached = redis_get_with_retry(cache_key)
+        cached = redis_get_with_retry(cache_key, replica_ok=True)
         
         if cached:
             cache_data = json.loads(cached)
@@ -651,49 +2843,71 @@ def get_prediction_swr(
             age = time.time() - timestamp
             
             # Cache is fresh (< 24 hours)
-            if age < 86400:
-                logger.info(f"Cache hit (fresh) for keyword: {normalized}")
+            if age < CACHE_FRESH_SECONDS:
+                logger.info("Cache hit (fresh) for keyword: %s", normalized)
+                # Body cache was missing (e.g. entry written before it existed) - repopulate
+                cache_response_body(
+                    normalized, timeframe, cache_data["data"], cache_data.get("stats"),
+                    int(CACHE_FRESH_SECONDS - age), geo, tz, cache_data.get("delta")
+                )
+                # Close to expiry: maybe refresh now so readers never hit the boundary
+                if xfetch_due(timestamp, cache_data.get("delta")):
+                    schedule_early_refresh(keyword, normalized, timeframe, geo, tz, background_tasks, timestamp)
                 return cache_data["data"], "cache_fresh", cache_data.get("stats")
             
             # Cache is stale (> 24 hours) - treat as cache miss
-            logger.info(f"Cache expired (> 24h) for keyword: {normalized}, treating as cache miss")
+            logger.info("Cache expired (> 24h) for keyword: %s, treating as cache miss", normalized)
     except (RedisError, RedisConnectionError) as e:
-        logger.error(f"Redis error during cache check: {str(e)}")
+        logger.error("Redis error during cache check: %s", e)
         # Continue to fetch from Apify if Redis is down
     except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON in cache for {normalized}: {str(e)}")
+        logger.error("Invalid JSON in cache for %s: %s", normalized, e)
         # Treat as cache miss if data is corrupted
     
-    # Step 3: Cache Miss - Acquire Lock
-    lock_key = f"lock:{normalized}"
+    # Step 3: Same geo already fetched for another timezone - re-bin its UTC profile
+    rebinned = predict_from_profile(normalized, timeframe, geo, tz)
+    if rebinned is not None:
+        return rebinned, "cache_fresh", None
+    
+    # Step 4: Known-empty keyword - answer 404 without taking the lock
+    check_negative_cache(normalized, timeframe, geo=geo)
+    
+    # Step 5: Cache Miss - Acquire Lock (one upstream fetch per geo, shared by all timezones)
+    lock = FetchLock(build_lock_key(normalized, timeframe, geo))
     
     try:
-        # Start with 60s lock - will extend before heavy operations
-        lock_acquired = redis_set_with_retry(lock_key, "1", nx=True, ex=60)
+        # Short TTL, renewed in the background for as long as the fetch runs
+        lock_acquired = lock.acquire()
     except (RedisError, RedisConnectionError) as e:
-        logger.error(f"Redis error during lock acquisition: {str(e)}")
+        logger.error("Redis error during lock acquisition: %s", e)
         # If Redis is down, proceed without locking (risky but better than total failure)
         lock_acquired = True
     
     if not lock_acquired:
         # Wait for lock holder to populate cache
-        logger.info(f"Lock acquisition failed, waiting for cache: {normalized}")
+        logger.info("Lock acquisition failed, waiting for cache: %s", normalized)
         for attempt in range(10):
             time.sleep(0.5)
+            # Lock holder found no data
+            check_negative_cache(normalized, timeframe, use_filter=False, geo=geo)
             try:
                 cached = redis_get_with_retry(cache_key)
                 if cached:
                     cache_data = json.loads(cached)
-                    logger.info(f"Cache populated by lock holder for: {normalized}")
+                    logger.info("Cache populated by lock holder for: %s", normalized)
                     return cache_data["data"], "cache_fresh", cache_data.get("stats")
+                # Lock holder may be serving another timezone of this geo
+                rebinned = predict_from_profile(normalized, timeframe, geo, tz)
+                if rebinned is not None:
+                    return rebinned, "cache_fresh", None
             except (RedisError, RedisConnectionError) as e:
-                logger.warning(f"Redis error while waiting for cache: {str(e)}")
+                logger.warning("Redis error while waiting for cache: %s", e)
                 continue
             except json.JSONDecodeError:
                 continue
         
         # Timeout - service unavailable
-        logger.error(f"Lock timeout for keyword: {normalized}")
+        logger.error("Lock timeout for keyword: %s", normalized)
         raise HTTPException(
             status_code=503,
             detail="Service temporarily unavailable. Please try again."
@@ -701,55 +2915,90 @@ def get_prediction_swr(
     
     # Lock acquired - fetch and cache data
     try:
-        logger.info(f"Lock acquired, fetching data for: {normalized}")
+        logger.info("Lock acquired (fence %s), fetching data for: %s", lock.fence, normalized)
         
-        # Try pytrends first (fast, 10-15s)
-        source = "apify"  # Default
+        # Another worker may have recorded the keyword as empty before this lock
+        check_negative_cache(normalized, timeframe, use_filter=False, geo=geo)
         
+        # Try pytrends first (fast, 10-15s), Apify as fallback
+        previous = load_profile(normalized, timeframe, geo)
+        started = time.time()
         try:
-            logger.info(f"Trying pytrends for: {normalized}")
-            timeline_data, stats = fetch_from_pytrends(keyword)
-            processed = process_data(timeline_data)
-            source = "pytrends"
-            logger.info(f"✅ Pytrends succeeded for: {normalized}")
-            
-        except PyTrendsUnavailableException as e:
-            # Pytrends failed - fallback to Apify
-            logger.warning(f"Pytrends failed ({str(e)}), falling back to Apify for: {normalized}")
-            
-            # Extend lock to 120s before heavy Apify operation (dynamic extension)
-            try:
-                redis_expire_with_retry(lock_key, 120)
-                logger.debug(f"Lock extended to 120s for Apify fetch: {normalized}")
-            except (RedisError, RedisConnectionError) as e:
-                logger.warning(f"Failed to extend lock, continuing with original TTL: {str(e)}")
-            
-            timeline_data, stats = fetch_from_apify(keyword)
-            processed = process_data(timeline_data)
-            source = "apify"
-            logger.info(f"✅ Apify fallback succeeded for: {normalized}")
+            # Admission control: bounded concurrent fetches, shed when the queue is full
+            with upstream_admission.slot(settings.UPSTREAM_QUEUE_TIMEOUT):
+                processed, source, stats, profile = compute_prediction(keyword, timeframe, previous, geo=geo, tz=tz)
+        except DataNotFoundException as e:
+            store_negative_cache(normalized, timeframe, e, int((time.time() - started) * 1000), geo)
+            raise
+        delta = round(time.time() - started, 3)
+        # Writes carry the lock's fence: if it expired mid-fetch, a newer holder's data wins
+        save_profile(normalized, profile, timeframe, geo, lock.fence)
+        logger.info("✅ %s succeeded for: %s", source, normalized)
         
-        # Prepare cache entry
+        # Prepare cache entry (delta = fetch seconds, used for early refresh)
         cache_entry = {
             "timestamp": time.time(),
             "data": processed,
-            "stats": stats
+            "stats": stats,
+            "delta": delta
         }
         
         # Save to Redis (TTL: 88200 seconds ≈ 24.5 hours)
         try:
-            redis_set_with_retry(cache_key, json.dumps(cache_entry), ex=88200)
-            logger.info(f"Data cached successfully for: {normalized}")
+            if redis_set_fenced_with_retry(cache_key, cache_entry, lock.fence, ex=88200):
+                cache_response_body(normalized, timeframe, processed, stats, geo=geo, tz=tz, delta=delta)
+                invalidate_negative_cache(normalized, timeframe, geo)
+                logger.info("Data cached successfully for: %s", normalized)
         except (RedisError, RedisConnectionError) as e:
-            logger.error(f"Failed to save to cache for {normalized}: {str(e)}")
+            logger.error("Failed to save to cache for %s: %s", normalized, e)
             # Continue and return data even if caching fails
         
         return processed, source, stats
         
     finally:
-        # Always release lock
+        # Always release lock (only deletes it if it is still ours)
         try:
-            redis_delete_with_retry(lock_key)
-            logger.info(f"Lock released for: {normalized}")
+            if lock.release():
+                logger.info("Lock released for: %s", normalized)
         except (RedisError, RedisConnectionError) as e:
-            logger.error(f"Failed to release lock for {normalized}: {str(e)}")
+            logger.error("Failed to release lock for %s: %s", normalized, e)
+
+
+def warmup() -> None:
+    """
+    Pre-load heavy dependencies and open Redis connections.
+    
+    Run in a background thread at startup so the first requests don't pay
+    for imports and connection setup. Failures are logged, never raised;
+    anything that fails is simply built on first use instead.
+    """
+    started = time.time()
+    
+    try:
+        for dependency in (np, pd, TrendReq):
+            resolve(dependency)
+        # First pandas datetime/groupby calls are noticeably slower than later ones
+        bin_timeline([{"date": "2026-01-01T00:00:00Z", "value": 1}])
+    except Exception as e:
+        logger.warning("Warmup: dependency import failed: %s", e)
+    
+    try:
+        client = resolve(redis_client)
+        client.ping()
+        if not settings.REDIS_CLUSTER_ENABLED:
+            pool = client.connection_pool
+            connections = [pool.get_connection("PING") for _ in range(settings.REDIS_WARMUP_CONNECTIONS)]
+            for connection in connections:
+                pool.release(connection)
+        # Connect to the replicas and run the first health check
+        replica_router.client()
+    except Exception as e:
+        logger.warning("Warmup: Redis unavailable: %s", e)
+    
+    if settings.APIFY_TOKEN:
+        try:
+            resolve(apify_client)
+        except Exception as e:
+            logger.warning("Warmup: Apify client init failed: %s", e)
+    
+    logger.info("Warmup completed in %sms", int((time.time() - started) * 1000), extra={"always": True})
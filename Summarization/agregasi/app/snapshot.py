@@ -0,0 +1,321 @@
+"""
+Cache snapshot export/import for warm starts and environment seeding.
+
+Export streams every `trend:*` entry (SCAN + pipelined GET/PTTL) into a
+gzip file of JSON lines, each with its absolute expiry time. Import loads
+the entries back in pipelined batches with their remaining TTL; entries
+that expired in the meantime are skipped. Keys are re-tagged for the
+target's cluster mode, so a single-node snapshot can seed a cluster and
+vice versa. The "fence" field of fenced entries is dropped on import: fence
+counters are not part of the snapshot, and a restored token above the
+target's counter would make every later write to that key look stale.
+
+Both directions checkpoint progress to `<file>.state` after every batch and
+continue from there with --resume. Export appends one gzip member per batch
+and truncates a partially written member before resuming.
+
+Usage:
+    python -m app.snapshot export trend_snapshot.jsonl.gz
+    python -m app.snapshot import trend_snapshot.jsonl.gz [--overwrite]
+
+    # Continue an interrupted run
+    python -m app.snapshot export trend_snapshot.jsonl.gz --resume
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from app import services
+from app.config import settings
+
+
+SNAPSHOT_FORMAT = "trend-snapshot"
+SNAPSHOT_VERSION = 1
+DEFAULT_MATCH = "trend:*"
+DEFAULT_BATCH = 500
+
+
+class SnapshotError(Exception):
+    """Custom exception for unreadable or incompatible snapshot files."""
+    pass
+
+
+class _Progress:
+    """Throughput reporter: prints keys/s and MB/s at most every `interval` seconds."""
+
+    def __init__(self, label: str, interval: float = 5.0, quiet: bool = False):
+        self.label = label
+        self.interval = interval
+        self.quiet = quiet
+        self.started = time.perf_counter()
+        self._last = self.started
+
+    def stats(self, keys: int, nbytes: int) -> Dict[str, float]:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return {
+            "keys": keys,
+            "bytes": nbytes,
+            "seconds": round(elapsed, 3),
+            "keys_per_sec": round(keys / elapsed, 1),
+            "mb_per_sec": round(nbytes / elapsed / 1_000_000, 3)
+        }
+
+    def update(self, keys: int, nbytes: int, force: bool = False) -> None:
+        now = time.perf_counter()
+        if self.quiet or (not force and now - self._last < self.interval):
+            return
+        self._last = now
+        s = self.stats(keys, nbytes)
+        print(f"{self.label}: {s['keys']} keys, {s['keys_per_sec']} keys/s, {s['mb_per_sec']} MB/s")
+
+
+def _state_path(path: str) -> str:
+    return f"{path}.state"
+
+
+def _load_state(path: str, mode: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_state_path(path)) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get("mode") == mode else None
+
+
+def _save_state(path: str, state: Dict[str, Any]) -> None:
+    # Write-then-rename so a crash never leaves a half-written checkpoint
+    tmp = f"{_state_path(path)}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, _state_path(path))
+
+
+def _clear_state(path: str) -> None:
+    try:
+        os.remove(_state_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def _scan_targets(client: Any) -> Dict[str, Any]:
+    """Clients to SCAN: every primary in cluster mode, else the single node."""
+    if settings.REDIS_CLUSTER_ENABLED:
+        return {node.name: client.get_redis_connection(node) for node in client.get_primaries()}
+    return {"default": client}
+
+
+def _retag(key: str) -> str:
+    """Rewrite `prefix:{keyword}:...` / `prefix:keyword:...` for the target's cluster mode."""
+    prefix, sep, rest = key.partition(":")
+    if not sep:
+        return key
+    keyword, sep, tail = rest.partition(":")
+    return f"{prefix}:{services.hash_tag(keyword.strip('{}'))}{sep}{tail}"
+
+
+def _unfenced(value: str) -> str:
+    """Drop the lock fencing token from a stored JSON entry, so the next fenced write replaces it."""
+    if '"fence"' not in value:
+        return value
+    try:
+        entry = json.loads(value)
+    except ValueError:
+        return value
+    if not isinstance(entry, dict) or entry.pop("fence", None) is None:
+        return value
+    return json.dumps(entry)
+
+
+def export_snapshot(
+    path: str,
+    match: str = DEFAULT_MATCH,
+    batch_size: int = DEFAULT_BATCH,
+    resume: bool = False,
+    quiet: bool = False
+) -> Dict[str, float]:
+    """
+    Stream matching keys with their values and expiry into a gzip snapshot.
+
+    Args:
+        path: Snapshot file (gzip, JSON lines)
+        match: SCAN pattern
+        batch_size: SCAN COUNT hint and pipeline size
+        resume: Continue from `<path>.state` instead of starting over
+        quiet: Suppress progress output
+
+    Returns:
+        Throughput stats for this run (keys, compressed bytes, seconds,
+        keys_per_sec, mb_per_sec) plus total_keys in the snapshot
+    """
+    client = services.redis_client
+    state = _load_state(path, "export") if resume else None
+    if state is None:
+        header = {"format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION, "created_at": time.time(), "match": match}
+        with gzip.open(path, "wb") as f:
+            f.write((json.dumps(header) + "\n").encode("utf-8"))
+        state = {"mode": "export", "cursors": {}, "done": [], "keys": 0, "offset": os.path.getsize(path)}
+        _save_state(path, state)
+    else:
+        # Drop a gzip member that was being written when the previous run stopped
+        with open(path, "r+b") as f:
+            f.truncate(state["offset"])
+
+    progress = _Progress("export", quiet=quiet)
+    start_keys, start_offset = state["keys"], state["offset"]
+    for name, node in _scan_targets(client).items():
+        if name in state["done"]:
+            continue
+        cursor = state["cursors"].get(name, 0)
+        while True:
+            cursor, keys = node.scan(cursor=cursor, match=match, count=batch_size)
+            if keys:
+                pipe = node.pipeline(transaction=False)
+                for key in keys:
+                    pipe.get(key)
+                    pipe.pttl(key)
+                results = pipe.execute()
+                now_ms = int(time.time() * 1000)
+                lines = [
+                    json.dumps({"key": key, "value": value, "expires_at_ms": now_ms + pttl if pttl >= 0 else None})
+                    for key, value, pttl in zip(keys, results[::2], results[1::2])
+                    if value is not None and pttl != -2
+                ]
+                if lines:
+                    with gzip.open(path, "ab") as f:
+                        f.write(("\n".join(lines) + "\n").encode("utf-8"))
+                    state["keys"] += len(lines)
+
+            state["cursors"][name] = cursor
+            state["offset"] = os.path.getsize(path)
+            if cursor == 0:
+                state["done"].append(name)
+            _save_state(path, state)
+            progress.update(state["keys"] - start_keys, state["offset"] - start_offset)
+            if cursor == 0:
+                break
+
+    _clear_state(path)
+    progress.update(state["keys"] - start_keys, state["offset"] - start_offset, force=True)
+    return {**progress.stats(state["keys"] - start_keys, state["offset"] - start_offset), "total_keys": state["keys"]}
+
+
+def _read_header(f: Any) -> Dict[str, Any]:
+    try:
+        header = json.loads(f.readline())
+    except ValueError as e:
+        raise SnapshotError(f"Not a snapshot file: {str(e)}")
+    if header.get("format") != SNAPSHOT_FORMAT or header.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format: {header.get('format')} v{header.get('version')}")
+    return header
+
+
+def import_snapshot(
+    path: str,
+    batch_size: int = DEFAULT_BATCH,
+    overwrite: bool = False,
+    resume: bool = False,
+    quiet: bool = False
+) -> Dict[str, float]:
+    """
+    Bulk-load a snapshot with the entries' remaining TTLs.
+
+    Args:
+        path: Snapshot file written by export_snapshot
+        batch_size: Entries per pipeline
+        overwrite: Replace existing keys (default keeps live entries, SET NX)
+        resume: Skip the entries recorded in `<path>.state`
+        quiet: Suppress progress output
+
+    Returns:
+        Throughput stats plus loaded, skipped_existing and skipped_expired counts
+
+    Raises:
+        SnapshotError: If the file is not a supported snapshot
+    """
+    client = services.redis_client
+    state = _load_state(path, "import") if resume else None
+    if state is None:
+        state = {"mode": "import", "records": 0, "loaded": 0, "existing": 0, "expired": 0}
+
+    progress = _Progress("import", quiet=quiet)
+    processed_bytes = 0
+
+    def flush(batch: List[Dict[str, Any]]) -> None:
+        now_ms = int(time.time() * 1000)
+        pipe = client.pipeline(transaction=False)
+        queued = 0
+        for record in batch:
+            expires_at = record.get("expires_at_ms")
+            remaining = expires_at - now_ms if expires_at is not None else None
+            if remaining is not None and remaining <= 0:
+                state["expired"] += 1
+                continue
+            pipe.set(_retag(record["key"]), _unfenced(record["value"]), px=remaining, nx=not overwrite)
+            queued += 1
+        loaded = sum(1 for result in pipe.execute() if result) if queued else 0
+        state["loaded"] += loaded
+        state["existing"] += queued - loaded
+        state["records"] += len(batch)
+        _save_state(path, state)
+        progress.update(state["loaded"], processed_bytes)
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        _read_header(f)
+        batch: List[Dict[str, Any]] = []
+        for index, line in enumerate(f):
+            if index < state["records"] or not line.strip():
+                continue
+            batch.append(json.loads(line))
+            processed_bytes += len(line)
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+
+    _clear_state(path)
+    progress.update(state["loaded"], processed_bytes, force=True)
+    return {
+        **progress.stats(state["loaded"], processed_bytes),
+        "loaded": state["loaded"],
+        "skipped_existing": state["existing"],
+        "skipped_expired": state["expired"]
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export/import trend cache snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = sub.add_parser("export", help="Write matching keys to a snapshot file")
+    export_parser.add_argument("path", help="Snapshot file (.jsonl.gz)")
+    export_parser.add_argument("--match", default=DEFAULT_MATCH, help="SCAN pattern")
+
+    import_parser = sub.add_parser("import", help="Load a snapshot file into Redis")
+    import_parser.add_argument("path", help="Snapshot file (.jsonl.gz)")
+    import_parser.add_argument("--overwrite", action="store_true", help="Replace keys that already exist")
+
+    for p in (export_parser, import_parser):
+        p.add_argument("--batch-size", type=int, default=DEFAULT_BATCH, help="Keys per SCAN/pipeline batch")
+        p.add_argument("--resume", action="store_true", help="Continue from the last checkpoint")
+        p.add_argument("--quiet", action="store_true", help="Only print the final summary")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "export":
+            stats = export_snapshot(args.path, args.match, args.batch_size, args.resume, args.quiet)
+        else:
+            stats = import_snapshot(args.path, args.batch_size, args.overwrite, args.resume, args.quiet)
+    except SnapshotError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Request-scoped trace IDs.
+
+Each request gets a trace ID at ingress, either the caller's (TRACE_HEADER,
+"X-Request-ID" by default) or a new one. It is held in a contextvar, so it
+follows the request into threadpool calls and background tasks. Async jobs
+store it, log records and metric exemplars carry it, and Apify runs receive
+it in their input, so one ID links the API request, the job, the upstream
+attempts and the Apify run.
+"""
+import contextvars
+import re
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+# Accepted caller IDs: short and log/header safe; anything else is replaced
+_VALID_TRACE_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+_trace_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("trace_id", default=None)
+
+
+def new_trace_id() -> str:
+    """Generate a trace ID (32 hex chars, W3C trace-id sized)."""
+    return uuid.uuid4().hex
+
+
+def accept_trace_id(value: Optional[str]) -> str:
+    """The caller's trace ID if it is well-formed, else a new one."""
+    if value and _VALID_TRACE_ID.match(value):
+        return value
+    return new_trace_id()
+
+
+def current_trace_id() -> Optional[str]:
+    """Trace ID of the request or job being handled (None outside one)."""
+    return _trace_id.get()
+
+
+def set_trace_id(trace_id: Optional[str]) -> contextvars.Token:
+    """Bind a trace ID to the current context; returns a token for reset_trace_id."""
+    return _trace_id.set(trace_id)
+
+
+def reset_trace_id(token: contextvars.Token) -> None:
+    """Restore the trace ID that was bound before set_trace_id."""
+    _trace_id.reset(token)
+
+
+@contextmanager
+def trace_context(trace_id: Optional[str]) -> Iterator[str]:
+    """Run a block (e.g. a background job) under `trace_id`, or a new one if None."""
+    token = set_trace_id(trace_id or new_trace_id())
+    try:
+        yield current_trace_id()
+    finally:
+        reset_trace_id(token)
+
+
+class TraceMiddleware:
+    """
+    ASGI middleware: bind the trace ID for the request and echo it back.
+
+    Plain ASGI (no BaseHTTPMiddleware) so the cache-hit path pays no extra
+    task or body buffering.
+    """
+
+    def __init__(self, app, header: str = "X-Request-ID"):
+        self.app = app
+        self.header = header
+        self._header_key = header.lower().encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope.get("headers", ()):
+            if name == self._header_key:
+                incoming = value.decode("latin-1")
+                break
+        trace_id = accept_trace_id(incoming)
+
+        async def send_with_trace_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append((self._header_key, trace_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = set_trace_id(trace_id)
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            reset_trace_id(token)
@@ -0,0 +1,121 @@
+"""
+Per-request logging overhead: synchronous f-string logging vs the queued,
+lazily formatted JSON pipeline in app.logging_setup.
+
+A "request" emits the same mix of calls as a cache-hit /predict request
+(four INFO lines, one DEBUG line). Output goes to os.devnull so the numbers
+measure the request thread's cost, not the terminal; --sink-latency-us
+simulates a slow stderr (e.g. a blocked container log pipe) to show what the
+queue takes off the request path.
+
+Usage:
+    python -m benchmarks.bench_logging --requests 20000
+    python -m benchmarks.bench_logging --sink-latency-us 200
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import time
+from typing import Callable, Dict, List
+
+os.environ.setdefault("APIFY_TOKEN", "bench_dummy_token")
+
+from app.logging_setup import begin_request, configure_logging, shutdown_logging
+
+
+logger = logging.getLogger("bench.request")
+KEYWORD = "skin care"
+PAYLOAD = {"keyword": KEYWORD, "geo": "ID", "timeframe": "now 7-d", "points": list(range(24))}
+
+
+def request_fstring() -> None:
+    logger.info(f"Received prediction request for keyword: {KEYWORD}")
+    logger.info(f"Cache hit for {KEYWORD} (geo=ID, timeframe=now 7-d)")
+    logger.debug(f"Payload: {PAYLOAD}")
+    logger.info(f"Generated 3 recommendations for {KEYWORD}")
+    logger.info(f"Completed request for {KEYWORD} in 1.23 ms")
+
+
+def request_lazy() -> None:
+    logger.info("Received prediction request for keyword: %s", KEYWORD)
+    logger.info("Cache hit for %s (geo=%s, timeframe=%s)", KEYWORD, "ID", "now 7-d")
+    logger.debug("Payload: %s", PAYLOAD)
+    logger.info("Generated %d recommendations for %s", 3, KEYWORD)
+    logger.info("Completed request for %s in %.2f ms", KEYWORD, 1.23)
+
+
+class SlowSink:
+    """Writable that sleeps on every write, like a backed-up log pipe."""
+
+    def __init__(self, stream, latency_us: float):
+        self.stream = stream
+        self.latency = latency_us / 1_000_000
+
+    def write(self, data: str) -> int:
+        if self.latency:
+            time.sleep(self.latency)
+        return self.stream.write(data)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+def _reset_root() -> None:
+    shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def measure(setup: Callable[[], None], request: Callable[[], None], requests: int, sample_rate: float = 1.0) -> Dict[str, float]:
+    """Median/p95 microseconds per request on the calling thread."""
+    _reset_root()
+    setup()
+    timings: List[float] = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        begin_request(sample_rate)
+        request()
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    _reset_root()
+    timings.sort()
+    return {
+        "median_us": round(statistics.median(timings), 2),
+        "p95_us": round(timings[int(len(timings) * 0.95)], 2)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Logging overhead per request")
+    parser.add_argument("--requests", type=int, default=20000, help="Simulated requests per case")
+    parser.add_argument("--sink-latency-us", type=float, default=0.0, help="Simulated latency per log write")
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    sink = SlowSink(devnull, args.sink_latency_us)
+
+    def sync_text(level: int = logging.INFO) -> None:
+        # The previous setup: logging.basicConfig writing formatted text synchronously
+        logging.basicConfig(level=level, stream=sink, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", force=True)
+
+    cases = {
+        "sync_fstring": measure(sync_text, request_fstring, args.requests),
+        "queued_lazy": measure(lambda: configure_logging("INFO", 1.0, stream=sink), request_lazy, args.requests),
+        "queued_lazy_warning_level": measure(lambda: configure_logging("WARNING", 1.0, stream=sink), request_lazy, args.requests),
+        "queued_lazy_sampled_10pct": measure(
+            lambda: configure_logging("INFO", 0.1, stream=sink), request_lazy, args.requests, sample_rate=0.1
+        )
+    }
+    devnull.close()
+
+    baseline = cases["sync_fstring"]["median_us"]
+    for stats in cases.values():
+        stats["speedup_vs_sync"] = round(baseline / stats["median_us"], 2) if stats["median_us"] else None
+    print(json.dumps({"requests": args.requests, "sink_latency_us": args.sink_latency_us, "cases": cases}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
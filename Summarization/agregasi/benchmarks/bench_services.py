@@ -0,0 +1,224 @@
+"""
+Microbenchmarks for the CPU hot path in app.services.
+
+Covers process_data on 7-day hourly, 30-day hourly, sparse and
+duplicate-timestamp inputs plus normalize_keyword on a realistic keyword mix.
+Each case records median/min time per call and tracemalloc peak memory.
+Results are appended to a history file (one JSON line per run, tagged with
+the git commit) and compared against a saved baseline with a regression
+threshold.
+
+Usage:
+    # Record the reference numbers (e.g. on main)
+    python -m benchmarks.bench_services --save-baseline
+
+    # Compare the working tree; exits 1 on regression
+    python -m benchmarks.bench_services --threshold 0.25
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+os.environ.setdefault("APIFY_TOKEN", "bench_dummy_token")
+
+from app.services import normalize_keyword, process_data
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, "services_baseline.json")
+DEFAULT_HISTORY = os.path.join(RESULTS_DIR, "services_history.jsonl")
+
+
+def hourly_series(days: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Hourly UTC series in the pytrends/Apify timeline format."""
+    rng = random.Random(seed)
+    end = datetime(2026, 1, 15, tzinfo=timezone.utc)
+    start = end - timedelta(hours=days * 24)
+    return [
+        {
+            "date": (start + timedelta(hours=i)).isoformat(),
+            "value": max(0, min(100, 50 + int(40 * ((i % 24) / 23.0)) + rng.randint(-15, 15)))
+        }
+        for i in range(days * 24)
+    ]
+
+
+def sparse_series(seed: int = 11) -> List[Dict[str, Any]]:
+    """7-day series with ~60% of hours missing plus nulls and invalid rows."""
+    rng = random.Random(seed)
+    points = [p for p in hourly_series(7, seed) if rng.random() > 0.6]
+    for p in points[::9]:
+        p["value"] = None
+    points.append({"date": "not-a-date", "value": 10})
+    points.append({"date": points[0]["date"], "value": -5})
+    return points
+
+
+def duplicate_series(seed: int = 13) -> List[Dict[str, Any]]:
+    """7-day series where every timestamp appears twice (multi-timeline Apify output)."""
+    rng = random.Random(seed)
+    points = []
+    for p in hourly_series(7, seed):
+        points.append(p)
+        points.append({"date": p["date"], "value": max(0, p["value"] + rng.randint(-5, 5))})
+    return points
+
+
+def keyword_mix(count: int = 1000, seed: int = 17) -> List[str]:
+    """Realistic mix of raw keywords: casing, punctuation, unicode, whitespace."""
+    rng = random.Random(seed)
+    samples = [
+        "skincare", "Skin-Care Product 2024!", "  baju lebaran  ", "iPhone 16 Pro Max",
+        "resep ayam geprek", "K-POP", "promo 12.12", "hello@world#123", "스킨케어",
+        "kopi susu gula aren", "Harga emas hari ini", "best time to post on IG?",
+        "café", "UMKM   Indonesia", "#ootd", "tiket konser coldplay jakarta"
+    ]
+    return [rng.choice(samples) for _ in range(count)]
+
+
+def _measure(func: Callable[[], Any], repeat: int, number: int) -> Dict[str, float]:
+    """Time func (seconds per call) and record its tracemalloc peak."""
+    func()  # warm-up (imports, caches)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 4),
+        "min_ms": round(min(timings) * 1000, 4),
+        "peak_kib": round(peak / 1024, 1)
+    }
+
+
+def build_cases() -> Dict[str, Callable[[], Any]]:
+    """Benchmark cases keyed by name."""
+    week = hourly_series(7)
+    month = hourly_series(30)
+    sparse = sparse_series()
+    dupes = duplicate_series()
+    keywords = keyword_mix()
+    return {
+        "process_data_7d_hourly": lambda: process_data(week),
+        "process_data_30d_hourly": lambda: process_data(month),
+        "process_data_sparse": lambda: process_data(sparse),
+        "process_data_duplicate_ts": lambda: process_data(dupes),
+        "normalize_keyword_x1000": lambda: [normalize_keyword(k) for k in keywords],
+    }
+
+
+def run_benchmarks(repeat: int = 5, number: int = 10, only: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+    """Run all (or the selected) cases and return their measurements."""
+    results = {}
+    for name, func in build_cases().items():
+        if only and name not in only:
+            continue
+        results[name] = _measure(func, repeat, number)
+    return results
+
+
+def compare_results(
+    current: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float
+) -> List[str]:
+    """
+    Compare measurements against a baseline.
+
+    Returns:
+        Human-readable regression messages (empty when within threshold)
+    """
+    regressions = []
+    for name, metrics in current.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        for metric in ("median_ms", "peak_kib"):
+            base_value = reference.get(metric)
+            if not base_value:
+                continue
+            ratio = metrics[metric] / base_value
+            if ratio > 1 + threshold:
+                regressions.append(
+                    f"{name}.{metric}: {metrics[metric]} vs baseline {base_value} (+{(ratio - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for app.services hot path")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions per case")
+    parser.add_argument("--number", type=int, default=10, help="Calls per repetition")
+    parser.add_argument("--case", action="append", help="Run only this case (repeatable)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="History JSONL file (appended)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown ratio, e.g. 0.25 = +25%%")
+    parser.add_argument("--save-baseline", action="store_true", help="Overwrite the baseline with this run")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    warnings.simplefilter("ignore")
+    results = run_benchmarks(args.repeat, args.number, args.case)
+    record = {
+        "commit": _git_commit(),
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "results": results
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+    with open(args.history, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    print(json.dumps(record, indent=2))
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(record, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare_results(results, baseline.get("results", {}), args.threshold)
+    if regressions:
+        print(f"Regressions vs baseline {baseline.get('commit')}:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print(f"No regressions vs baseline {baseline.get('commit')} (threshold +{args.threshold * 100:.0f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Throughput vs latency of summary micro-batching (app.inference.SummaryPool).
+
+Sends /predict/summary-shaped requests (3 hourly_summary entries each) at a
+fixed arrival rate and reports throughput and p50/p95 latency for a grid of
+SUMMARY_MAX_BATCH x SUMMARY_BATCH_WAIT_MS settings.
+
+By default the workers run a simulated generate whose cost is
+`--base-ms + --per-item-ms * entries`, i.e. a fixed per-call cost (beam
+search steps, Python overhead) that batching amortizes plus a per-entry
+cost. Calibrate both from inference/bench_generate_batch.py on the target
+CPU, or pass --real to load the T5 summarizer in the workers.
+
+Usage:
+    python -m benchmarks.bench_summary_batching --rate 4 --requests 60
+    python -m benchmarks.bench_summary_batching --batches 1,6,12 --waits 0,20,100
+    python -m benchmarks.bench_summary_batching --real --workers 2 --rate 0.5 --requests 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from typing import Any, Dict, List
+
+os.environ.setdefault("APIFY_TOKEN", "bench_dummy_token")
+
+from app.inference import SummaryPool, generate, load_summarizer, summary_pool
+
+
+HOURLY_SUMMARY = [
+    {"rank": rank, "day": day, "time_window": window, "score": score, "daily_avg": 61.3,
+     "peak_hour": peak, "peak_value": score + 4, "hourly": "06(45), 07(50), 08(58), 09(63), 10(66), 11(70)"}
+    for rank, (day, window, score, peak) in enumerate([
+        ("Monday", "17:00 - 20:00", 85.2, 18),
+        ("Saturday", "09:00 - 12:00", 79.0, 9),
+        ("Wednesday", "12:00 - 15:00", 72.4, 13)
+    ], start=1)
+]
+
+# Simulated cost model (set in each worker by _simulated_init)
+_cost = {"base": 0.4, "per_item": 0.06}
+
+
+def _simulated_init(base_s: float, per_item_s: float) -> None:
+    _cost.update(base=base_s, per_item=per_item_s)
+
+
+def simulated_generate(hourly_summaries: List[Dict[str, Any]], max_length: int, num_beams: int) -> List[str]:
+    time.sleep(_cost["base"] + _cost["per_item"] * len(hourly_summaries))
+    return [f"summary for {item['day']}" for item in hourly_summaries]
+
+
+async def _run_load(pool: SummaryPool, rate: float, requests: int, seed: int) -> Dict[str, float]:
+    """Poisson arrivals at `rate` req/s; returns throughput and latency percentiles."""
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    rejected = 0
+
+    async def one() -> None:
+        nonlocal rejected
+        started = time.perf_counter()
+        try:
+            await pool.summarize(HOURLY_SUMMARY)
+        except Exception:
+            rejected += 1
+            return
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    tasks = []
+    for _ in range(requests):
+        tasks.append(asyncio.ensure_future(one()))
+        await asyncio.sleep(rng.expovariate(rate))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "completed": len(latencies),
+        "rejected": rejected,
+        "throughput_rps": round(len(latencies) / elapsed, 3),
+        "p50_s": round(statistics.median(latencies), 3) if latencies else None,
+        "p95_s": round(latencies[int(len(latencies) * 0.95) - 1], 3) if latencies else None
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Summary micro-batching benchmark")
+    parser.add_argument("--rate", type=float, default=4.0, help="Request arrival rate (req/s)")
+    parser.add_argument("--requests", type=int, default=60, help="Requests per configuration")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument("--batches", default="1,3,6,12", help="SUMMARY_MAX_BATCH values (entries)")
+    parser.add_argument("--waits", default="0,20,100", help="SUMMARY_BATCH_WAIT_MS values")
+    parser.add_argument("--base-ms", type=float, default=400.0, help="Simulated fixed cost per generate call")
+    parser.add_argument("--per-item-ms", type=float, default=60.0, help="Simulated cost per entry")
+    parser.add_argument("--real", action="store_true", help="Run the T5 summarizer instead of the simulation")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.real:
+        initializer, initargs, task = load_summarizer, summary_pool.initargs, generate
+    else:
+        initializer, initargs, task = _simulated_init, (args.base_ms / 1000, args.per_item_ms / 1000), simulated_generate
+
+    results = []
+    for max_batch in (int(b) for b in args.batches.split(",")):
+        for wait_ms in (float(w) for w in args.waits.split(",")):
+            pool = SummaryPool(
+                args.workers, args.requests, 3600,
+                initializer=initializer, initargs=initargs, task=task,
+                max_batch_size=max_batch, max_wait=wait_ms / 1000
+            )
+            pool.start()
+            try:
+                stats = asyncio.run(_run_load(pool, args.rate, args.requests, args.seed))
+            finally:
+                pool.shutdown()
+            results.append({"max_batch": max_batch, "wait_ms": wait_ms, **stats})
+            print(json.dumps(results[-1]))
+
+    best = max(results, key=lambda r: (r["throughput_rps"], -(r["p95_s"] or 0)))
+    print(json.dumps({"rate": args.rate, "workers": args.workers, "best": best}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
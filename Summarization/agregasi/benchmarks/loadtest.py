@@ -0,0 +1,473 @@
+"""
+Offline load-testing harness for the prediction API.
+
+Starts the FastAPI app in-process (uvicorn on a local port) against either a
+local Redis or an in-memory fakeredis stand-in, replaces pytrends and Apify
+with simulated upstreams that have configurable latency and error
+distributions, drives a mixed hit/miss/async-job workload and writes a
+machine-readable JSON baseline.
+
+Usage:
+    python -m benchmarks.loadtest --requests 500 --concurrency 16 \\
+        --mix hit=0.7,miss=0.2,async=0.1 --output loadtest_baseline.json
+
+    # Against a local Redis (uses the given DB, keys are NOT cleaned up)
+    python -m benchmarks.loadtest --redis-url redis://localhost:6379/15
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from unittest.mock import patch
+
+os.environ.setdefault("APIFY_TOKEN", "loadtest_dummy_token")
+
+import httpx
+import pandas as pd
+import uvicorn
+
+from app import jobs, services
+from app.config import settings
+from app.main import app
+
+
+OPERATIONS = ("hit", "miss", "async")
+
+
+@dataclass
+class UpstreamProfile:
+    """Latency and failure distribution of a simulated upstream."""
+    distribution: str = "lognormal"  # fixed | uniform | lognormal
+    latency_ms: float = 50.0
+    jitter_ms: float = 20.0
+    error_rate: float = 0.0
+    empty_rate: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "UpstreamProfile":
+        """
+        Parse a profile spec such as "lognormal:800:300:0.05:0.01".
+
+        Fields are distribution, mean latency (ms), jitter (ms), error rate
+        and empty-result rate; trailing fields may be omitted.
+        """
+        parts = spec.split(":")
+        profile = cls()
+        if parts[0]:
+            profile.distribution = parts[0]
+        for attr, raw in zip(("latency_ms", "jitter_ms", "error_rate", "empty_rate"), parts[1:]):
+            setattr(profile, attr, float(raw))
+        if profile.distribution not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {profile.distribution}")
+        return profile
+
+
+@dataclass
+class UpstreamCounters:
+    """Thread-safe call counters for a simulated upstream."""
+    calls: int = 0
+    errors: int = 0
+    empty: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self.calls += 1
+            if outcome == "error":
+                self.errors += 1
+            elif outcome == "empty":
+                self.empty += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = self.errors = self.empty = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "errors": self.errors, "empty": self.empty}
+
+
+class SimulatedUpstream:
+    """
+    Simulated upstream with a latency/error distribution.
+
+    Faults can be switched off (used while warming the cache) so the warm-up
+    phase is deterministic regardless of the configured error rates.
+    """
+
+    def __init__(self, name: str, profile: UpstreamProfile, seed: int) -> None:
+        self.name = name
+        self.profile = profile
+        self.counters = UpstreamCounters()
+        self.faults_enabled = True
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def _sample(self) -> Tuple[float, float]:
+        with self._rng_lock:
+            p = self.profile
+            if p.distribution == "fixed":
+                latency = p.latency_ms
+            elif p.distribution == "uniform":
+                latency = self._rng.uniform(max(0.0, p.latency_ms - p.jitter_ms), p.latency_ms + p.jitter_ms)
+            else:
+                latency = self._rng.lognormvariate(0, 1) * p.jitter_ms + max(0.0, p.latency_ms - p.jitter_ms)
+            return max(0.0, latency) / 1000.0, self._rng.random()
+
+    def call(self) -> str:
+        """Sleep for one sampled latency and return the outcome: ok, error or empty."""
+        latency, roll = self._sample()
+        time.sleep(latency)
+        outcome = "ok"
+        if self.faults_enabled:
+            if roll < self.profile.error_rate:
+                outcome = "error"
+            elif roll < self.profile.error_rate + self.profile.empty_rate:
+                outcome = "empty"
+        self.counters.record(outcome)
+        return outcome
+
+
+def synthetic_series(keyword: str, hours: int = 168) -> List[Tuple[datetime, int]]:
+    """Deterministic hourly series (UTC) with a daily cycle for a keyword."""
+    rng = random.Random(keyword)
+    end = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    start = end - timedelta(hours=hours - 1)
+    peak = rng.randint(0, 23)
+    series = []
+    for i in range(hours):
+        ts = start + timedelta(hours=i)
+        distance = min(abs(ts.hour - peak), 24 - abs(ts.hour - peak))
+        value = max(0, min(100, 100 - distance * 7 + rng.randint(-10, 10)))
+        series.append((ts, value))
+    return series
+
+
+class FakeTrendReq:
+    """Stand-in for pytrends.request.TrendReq backed by a SimulatedUpstream."""
+
+    upstream: SimulatedUpstream = None
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self._keyword = None
+
+    def build_payload(self, kw_list: List[str], **kwargs: Any) -> None:
+        self._keyword = kw_list[0]
+
+    def interest_over_time(self) -> pd.DataFrame:
+        outcome = self.upstream.call()
+        if outcome == "error":
+            raise RuntimeError("The request failed: Google returned a response with code 429")
+        if outcome == "empty":
+            return pd.DataFrame()
+        series = synthetic_series(self._keyword)
+        index = pd.DatetimeIndex([ts.replace(tzinfo=None) for ts, _ in series], name="date")
+        return pd.DataFrame({self._keyword: [v for _, v in series], "isPartial": False}, index=index)
+
+
+class _FakeDataset:
+    def __init__(self, items: List[Dict[str, Any]]) -> None:
+        self._items = items
+
+    def iterate_items(self):
+        return iter(self._items)
+
+
+class _FakeActor:
+    def __init__(self, client: "FakeApifyClient") -> None:
+        self._client = client
+
+    def call(self, run_input: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+        upstream = self._client.upstream
+        outcome = upstream.call()
+        if outcome == "error":
+            raise RuntimeError("Actor run failed with status FAILED")
+        keyword = run_input["searchTerms"][0]
+        items = []
+        if outcome != "empty":
+            items = [{
+                "interestOverTime_timelineData": [
+                    {"time": str(int(ts.timestamp())), "value": [value]}
+                    for ts, value in synthetic_series(keyword)
+                ]
+            }]
+        dataset_id = self._client.store_dataset(items)
+        return {
+            "defaultDatasetId": dataset_id,
+            "stats": {
+                "durationMillis": int(upstream.profile.latency_ms),
+                "computeUnits": 0.05
+            }
+        }
+
+
+class FakeApifyClient:
+    """Stand-in for apify_client.ApifyClient backed by a SimulatedUpstream."""
+
+    def __init__(self, upstream: SimulatedUpstream) -> None:
+        self.upstream = upstream
+        self._datasets: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def store_dataset(self, items: List[Dict[str, Any]]) -> str:
+        with self._lock:
+            dataset_id = f"dataset-{len(self._datasets)}"
+            self._datasets[dataset_id] = items
+        return dataset_id
+
+    def actor(self, actor_id: str) -> _FakeActor:
+        return _FakeActor(self)
+
+    def dataset(self, dataset_id: str) -> _FakeDataset:
+        with self._lock:
+            return _FakeDataset(self._datasets.get(dataset_id, []))
+
+
+def make_redis(redis_url: Optional[str]):
+    """Return a Redis client for the harness: real Redis if a URL is given, fakeredis otherwise."""
+    if redis_url:
+        from redis import Redis
+        return Redis.from_url(redis_url, decode_responses=True)
+    from fakeredis import FakeRedis, FakeServer
+    return FakeRedis(server=FakeServer(), decode_responses=True)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize_latencies(latencies: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    values = sorted(v * 1000.0 for v in latencies)
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+    return {
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "p99": round(percentile(values, 99), 2),
+        "mean": round(sum(values) / len(values), 2),
+        "max": round(values[-1], 2)
+    }
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse a workload mix such as "hit=0.7,miss=0.2,async=0.1"."""
+    mix = {op: 0.0 for op in OPERATIONS}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in mix:
+            raise ValueError(f"Unknown operation in mix: {name}")
+        mix[name] = float(weight)
+    if sum(mix.values()) <= 0:
+        raise ValueError("Workload mix must have a positive total weight")
+    return mix
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class AppServer:
+    """Runs the FastAPI app with uvicorn on a background thread."""
+
+    def __init__(self, port: int) -> None:
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    def __enter__(self) -> "AppServer":
+        self.thread.start()
+        deadline = time.time() + 10
+        while not self.server.started:
+            if time.time() > deadline:
+                raise RuntimeError("uvicorn did not start within 10s")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+class Workload:
+    """Executes single operations against the running server."""
+
+    def __init__(self, base_url: str, hot_keywords: List[str], job_timeout: float, poll_interval: float) -> None:
+        self.base_url = base_url
+        self.hot_keywords = hot_keywords
+        self.job_timeout = job_timeout
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+
+    def _client(self) -> httpx.Client:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = httpx.Client(base_url=self.base_url, timeout=self.job_timeout)
+            self._local.client = client
+        return client
+
+    def run(self, op: str, index: int) -> Tuple[str, str, float]:
+        """Run one operation and return (op, outcome, latency_seconds)."""
+        client = self._client()
+        start = time.perf_counter()
+        try:
+            if op == "hit":
+                keyword = self.hot_keywords[index % len(self.hot_keywords)]
+                outcome = str(client.get("/predict", params={"keyword": keyword}).status_code)
+            elif op == "miss":
+                outcome = str(client.get("/predict", params={"keyword": f"miss {index}"}).status_code)
+            else:
+                outcome = self._run_job(client, f"async {index}")
+        except httpx.HTTPError as e:
+            outcome = type(e).__name__
+        return op, outcome, time.perf_counter() - start
+
+    def _run_job(self, client: httpx.Client, keyword: str) -> str:
+        response = client.post("/predict/async", params={"keyword": keyword})
+        if response.status_code != 202:
+            return str(response.status_code)
+        job_id = response.json()["job_id"]
+        deadline = time.perf_counter() + self.job_timeout
+        while time.perf_counter() < deadline:
+            status = client.get(f"/job/{job_id}").json().get("status")
+            if status in ("completed", "failed"):
+                return status
+            time.sleep(self.poll_interval)
+        return "timeout"
+
+
+def run_loadtest(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the configured workload and return the report dictionary."""
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix)
+    pytrends = SimulatedUpstream("pytrends", UpstreamProfile.parse(args.pytrends), args.seed + 1)
+    apify = SimulatedUpstream("apify", UpstreamProfile.parse(args.apify), args.seed + 2)
+    FakeTrendReq.upstream = pytrends
+    redis_client = make_redis(args.redis_url)
+    hot_keywords = [f"hot keyword {i}" for i in range(args.hot_keywords)]
+
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(services, "TrendReq", FakeTrendReq))
+        stack.enter_context(patch.object(services, "apify_client", FakeApifyClient(apify)))
+        stack.enter_context(patch.object(services, "redis_client", redis_client))
+        stack.enter_context(patch.object(jobs, "redis_client", redis_client))
+        if not args.respect_rate_limit:
+            stack.enter_context(patch.object(settings, "GLOBAL_RATE_LIMIT", 10 ** 9))
+            stack.enter_context(patch.object(settings, "CLIENT_RATE_LIMIT_ENABLED", False))
+        server = stack.enter_context(AppServer(args.port or _free_port()))
+
+        workload = Workload(server.base_url, hot_keywords, args.job_timeout, args.poll_interval)
+
+        # Warm the hot set through the API with faults disabled
+        pytrends.faults_enabled = apify.faults_enabled = False
+        for keyword in hot_keywords:
+            httpx.get(f"{server.base_url}/predict", params={"keyword": keyword}, timeout=args.job_timeout)
+        pytrends.faults_enabled = apify.faults_enabled = True
+        pytrends.counters.reset()
+        apify.counters.reset()
+
+        names = list(mix.keys())
+        weights = [mix[name] for name in names]
+        ops = rng.choices(names, weights=weights, k=args.requests)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(lambda item: workload.run(item[1], item[0]), enumerate(ops)))
+        elapsed = time.perf_counter() - started
+
+    operations: Dict[str, Any] = {}
+    for op in OPERATIONS:
+        op_results = [r for r in results if r[0] == op]
+        outcomes: Dict[str, int] = {}
+        for _, outcome, _ in op_results:
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        ok = {"200", "completed"}
+        operations[op] = {
+            "count": len(op_results),
+            "errors": sum(n for outcome, n in outcomes.items() if outcome not in ok),
+            "outcomes": outcomes,
+            "latency_ms": summarize_latencies([r[2] for r in op_results])
+        }
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mix": mix,
+            "hot_keywords": args.hot_keywords,
+            "seed": args.seed,
+            "redis": args.redis_url or "fakeredis",
+            "pytrends": asdict(pytrends.profile),
+            "apify": asdict(apify.profile)
+        },
+        "duration_s": round(elapsed, 3),
+        "rps": round(len(results) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": summarize_latencies([r[2] for r in results]),
+        "operations": operations,
+        "upstream": {
+            "pytrends": pytrends.counters.snapshot(),
+            "apify": apify.counters.snapshot()
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform()
+        }
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Offline load test for the prediction API")
+    parser.add_argument("--requests", type=int, default=300, help="Total operations to run")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent client threads")
+    parser.add_argument("--mix", default="hit=0.7,miss=0.2,async=0.1", help="Workload mix weights")
+    parser.add_argument("--hot-keywords", type=int, default=20, help="Keywords pre-warmed for cache hits")
+    parser.add_argument("--redis-url", default=None, help="Local Redis URL (default: in-memory fakeredis)")
+    parser.add_argument("--pytrends", default="lognormal:800:300:0.05:0",
+                        help="pytrends profile distribution:latency_ms:jitter_ms:error_rate:empty_rate")
+    parser.add_argument("--apify", default="lognormal:3000:1000:0.02:0.01",
+                        help="Apify profile distribution:latency_ms:jitter_ms:error_rate:empty_rate")
+    parser.add_argument("--job-timeout", type=float, default=120.0, help="Seconds to wait for an async job")
+    parser.add_argument("--poll-interval", type=float, default=0.2, help="Job polling interval in seconds")
+    parser.add_argument("--respect-rate-limit", action="store_true", help="Keep GLOBAL_RATE_LIMIT and per-client limits in effect")
+    parser.add_argument("--port", type=int, default=0, help="Port for the in-process server (default: random)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for workload and upstreams")
+    parser.add_argument("--log-level", default="WARNING", help="Application log level during the run")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.getLogger().setLevel(args.log_level)
+    report = run_loadtest(args)
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered + "\n")
+    print(rendered)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
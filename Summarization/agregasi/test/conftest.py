@@ -21,6 +21,14 @@ def mock_external_services():
     pass
 
 
+@pytest.fixture(autouse=True)
+def reset_source_selector():
+    """Start every test from the source selector's priors."""
+    from app.services import source_selector
+    source_selector.reset()
+    yield
+
+
 @pytest.fixture
 def client():
     """FastAPI test client fixture."""
@@ -119,16 +127,18 @@ def mock_cached_data():
 def mock_apify_client():
     """Mock Apify client."""
     with patch('app.services.apify_client') as mock:
-        # Setup actor call mock
-        mock_run = Mock()
-        mock_run.return_value = {
+        # Setup actor start / run wait mocks
+        mock_run = {
+            "id": "test_run_123",
             "defaultDatasetId": "test_dataset_123",
+            "status": "SUCCEEDED",
             "stats": {
                 "durationMillis": 12500,
                 "computeUnits": 0.12
             }
         }
-        mock.actor.return_value.call = mock_run
+        mock.actor.return_value.start.return_value = {**mock_run, "status": "READY"}
+        mock.run.return_value.wait_for_finish.return_value = mock_run
         
         # Setup dataset mock
         mock_dataset = Mock()
@@ -230,7 +230,7 @@ class TestJobLifecycle:
     """Test complete job lifecycle from creation to completion."""
     
     @patch('app.services.fetch_from_apify')
-    @patch('app.services.process_data')
+    @patch('app.services.build_recommendations')
     def test_complete_job_lifecycle_success(
         self, 
         mock_process, 
@@ -239,10 +239,10 @@ class TestJobLifecycle:
         mock_redis_for_jobs
     ):
         """Test full job lifecycle: create → process → complete."""
-        # Mock Apify response
+        # Mock Apify response (timeline format returned by fetch_from_apify)
         mock_fetch.return_value = (
-            [{"time": "1234567890", "value": [50]}],
-            {"computeUnits": 0.5}
+            [{"date": "2009-02-13T23:31:30", "value": 50}],
+            {"compute_units": 0.5}
         )
         
         # Mock processed data
@@ -440,5 +440,263 @@ class TestResponseSchema:
         assert 0 <= data["progress"] <= 100
 
 
+class TestTracing:
+    """Test trace ID propagation from the request through the job and upstream calls."""
+    
+    def test_request_id_header_stored_on_job(self, client, mock_redis_for_jobs, mock_background_tasks):
+        """Test that a caller's X-Request-ID is echoed and stored on the job."""
+        response = client.post("/predict/async?keyword=test", headers={"X-Request-ID": "req-42"})
+        job = client.get(f"/job/{response.json()['job_id']}").json()
+        
+        assert response.headers["X-Request-ID"] == "req-42"
+        assert job["trace_id"] == "req-42"
+        assert mock_background_tasks.args[-1] == "req-42"
+    
+    def test_invalid_or_missing_header_gets_generated_id(self, client, mock_redis_for_jobs, mock_background_tasks):
+        """Test that malformed IDs are replaced and missing ones generated."""
+        bad = client.post("/predict/async?keyword=test", headers={"X-Request-ID": "not valid\"id"})
+        missing = client.post("/predict/async?keyword=test")
+        
+        for response in (bad, missing):
+            trace_id = response.headers["X-Request-ID"]
+            assert len(trace_id) == 32 and int(trace_id, 16) >= 0
+            assert client.get(f"/job/{response.json()['job_id']}").json()["trace_id"] == trace_id
+        assert bad.headers["X-Request-ID"] != missing.headers["X-Request-ID"]
+    
+    @patch('app.services.fetch_from_apify')
+    @patch('app.services.fetch_from_pytrends')
+    def test_job_run_keeps_trace_id_for_upstream_calls(self, mock_pytrends, mock_apify, client, mock_redis_for_jobs):
+        """Test that the background job runs under the creating request's trace ID."""
+        from app.services import PyTrendsUnavailableException
+        from app.tracing import current_trace_id
+        seen = []
+        
+        def pytrends_down(*args, **kwargs):
+            seen.append(current_trace_id())
+            raise PyTrendsUnavailableException("down")
+        
+        def apify_ok(*args, **kwargs):
+            seen.append(current_trace_id())
+            return [{"date": "2024-01-01T00:00:00", "value": 50}], {"compute_units": 0.1}
+        
+        mock_pytrends.side_effect = pytrends_down
+        mock_apify.side_effect = apify_ok
+        
+        client.post("/predict/async?keyword=test", headers={"X-Request-ID": "job-trace"})
+        
+        assert seen and set(seen) == {"job-trace"}
+    
+    @patch('app.services.apify_client')
+    def test_trace_id_passed_in_apify_run_input(self, mock_apify_client):
+        """Test that the Apify run input carries the trace ID."""
+        from app.services import fetch_from_apify
+        from app.tracing import trace_context
+        mock_apify_client.actor.return_value.start.return_value = {"id": "run1", "defaultDatasetId": "ds1", "status": "READY"}
+        mock_apify_client.run.return_value.wait_for_finish.return_value = {
+            "id": "run1", "defaultDatasetId": "ds1", "status": "SUCCEEDED", "stats": {}
+        }
+        mock_apify_client.dataset.return_value.iterate_items.return_value = [
+            {"interestOverTime_timelineData": [{"time": "1704067200", "value": [50]}]}
+        ]
+        
+        with trace_context("apify-trace"), \
+             patch('app.services.settings.APIFY_RUN_REUSE_ENABLED', False):
+            fetch_from_apify("test")
+        
+        run_input = mock_apify_client.actor.return_value.start.call_args.kwargs["run_input"]
+        assert run_input["traceId"] == "apify-trace"
+
+
+class TestNonBlockingApify:
+    """Test that jobs await Apify runs off-thread and report run progress."""
+    
+    @staticmethod
+    def _async_apify(statuses, item_count=1):
+        """Mock asyncio Apify client whose run reports `statuses` on successive polls."""
+        from unittest.mock import AsyncMock
+        
+        client = MagicMock()
+        run_client = MagicMock()
+        run_client.wait_for_finish = AsyncMock(side_effect=[
+            {"id": "run1", "defaultDatasetId": "ds1", "status": status, "stats": {"computeUnits": 0.3}}
+            for status in statuses
+        ])
+        run_client.abort = AsyncMock(return_value={"status": "ABORTING"})
+        client.run.return_value = run_client
+        client.dataset.return_value.get = AsyncMock(return_value={"itemCount": item_count})
+        return client, run_client
+    
+    @staticmethod
+    def _pending(started=True):
+        from app.services import ApifyRunPending, build_apify_run_key
+        run = {"id": "run1", "defaultDatasetId": "ds1", "status": "READY"}
+        return ApifyRunPending(build_apify_run_key("test", "now 7-d", "ID"), run, started, "test", "now 7-d", "ID")
+    
+    def test_run_status_mapped_to_job_progress(self, mock_redis_for_jobs):
+        """Test that polls of a running run move job progress and report item counts."""
+        import asyncio
+        from app.jobs import watch_apify_run
+        
+        job_id = JobManager.create_job("test")
+        client, _ = self._async_apify(["READY", "RUNNING", "SUCCEEDED"], item_count=1)
+        progress = []
+        original = JobManager.set_progress
+        with patch('app.services.apify_async_client', client), \
+             patch.object(JobManager, 'set_progress', side_effect=lambda *a: progress.append(a) or original(*a)):
+            run = asyncio.run(watch_apify_run(job_id, self._pending()))
+        
+        assert run["status"] == "SUCCEEDED"
+        assert [p for _, p, _ in progress] == sorted(p for _, p, _ in progress)
+        assert all(35 <= p <= 75 for _, p, _ in progress)
+        assert "running" in progress[-1][2] and "1 items" in progress[-1][2]
+    
+    def test_expired_job_aborts_its_run(self, mock_redis_for_jobs):
+        """Test that a run started by an expired job is aborted and unregistered."""
+        import asyncio
+        from app.jobs import watch_apify_run
+        from app.metrics import metrics
+        from app.services import build_apify_run_key
+        
+        metrics.reset()
+        job_id = JobManager.create_job("test")
+        JobManager.update_job(job_id, {"created_at": time.time() - JobManager.JOB_TTL - 1})
+        mock_redis_for_jobs.set(build_apify_run_key("test", "now 7-d", "ID"), json.dumps({"run_id": "run1", "status": "RUNNING"}))
+        client, run_client = self._async_apify(["RUNNING"])
+        
+        with patch('app.services.apify_async_client', client):
+            assert asyncio.run(watch_apify_run(job_id, self._pending())) is None
+        
+        run_client.abort.assert_awaited_once()
+        assert metrics.get("apify_runs_aborted_total") == 1
+        assert mock_redis_for_jobs.get(build_apify_run_key("test", "now 7-d", "ID")) is None
+    
+    def test_joined_run_is_not_aborted(self, mock_redis_for_jobs):
+        """Test that an expired job leaves runs started by others alone."""
+        import asyncio
+        from app.jobs import watch_apify_run
+        
+        job_id = JobManager.create_job("test")
+        mock_redis_for_jobs.delete(JobManager.job_key(job_id))
+        client, run_client = self._async_apify(["RUNNING"])
+        
+        with patch('app.services.apify_async_client', client):
+            assert asyncio.run(watch_apify_run(job_id, self._pending(started=False))) is None
+        
+        run_client.abort.assert_not_awaited()
+    
+    @patch('app.services.fetch_from_pytrends')
+    def test_job_completes_without_blocking_wait(self, mock_pytrends, client, mock_redis_for_jobs):
+        """Test that a job starts the actor, awaits it asynchronously and reads its dataset."""
+        from app.services import PyTrendsUnavailableException
+        mock_pytrends.side_effect = PyTrendsUnavailableException("down")
+        
+        sync_client = MagicMock()
+        sync_client.actor.return_value.start.return_value = {"id": "run1", "defaultDatasetId": "ds1", "status": "READY"}
+        sync_client.dataset.return_value.iterate_items.return_value = [
+            {"interestOverTime_timelineData": [{"time": str(1704067200 + 3600 * h), "value": [h % 100]} for h in range(48)]}
+        ]
+        async_client, _ = self._async_apify(["RUNNING", "SUCCEEDED"])
+        
+        with patch('app.services.apify_client', sync_client), \
+             patch('app.services.apify_async_client', async_client):
+            job_id = client.post("/predict/async?keyword=test").json()["job_id"]
+        job = client.get(f"/job/{job_id}").json()
+        
+        assert job["status"] == "completed"
+        assert job["result"]["meta"]["apify_stats"]["compute_units"] == 0.3
+        sync_client.actor.return_value.start.assert_called_once()
+        sync_client.run.return_value.wait_for_finish.assert_not_called()
+    
+    @patch('app.services.fetch_from_pytrends')
+    def test_stitched_job_starts_each_slice_run_once(self, mock_pytrends, client, mock_redis_for_jobs):
+        """Test that deferred passes keep finished slices instead of fetching them again."""
+        from app.services import PyTrendsUnavailableException
+        mock_pytrends.side_effect = PyTrendsUnavailableException("down")
+        slices = ["2026-01-08T00 2026-01-15T00", "2026-01-01T00 2026-01-08T00"]
+        
+        sync_client = MagicMock()
+        sync_client.actor.return_value.start.side_effect = [
+            {"id": f"run{i}", "defaultDatasetId": f"ds{i}", "status": "READY"} for i in range(len(slices))
+        ]
+        sync_client.dataset.return_value.iterate_items.return_value = [
+            {"interestOverTime_timelineData": [{"time": str(1704067200 + 3600 * h), "value": [h % 100]} for h in range(48)]}
+        ]
+        async_client, _ = self._async_apify(["SUCCEEDED"] * len(slices))
+        
+        with patch('app.services.settings.APIFY_RUN_REUSE_ENABLED', False), \
+             patch('app.services.timeframe_slices', return_value=slices), \
+             patch('app.services.apify_client', sync_client), \
+             patch('app.services.apify_async_client', async_client):
+            job_id = client.post("/predict/async?keyword=test&timeframe=30d").json()["job_id"]
+        job = client.get(f"/job/{job_id}").json()
+        
+        assert job["status"] == "completed"
+        started = [c.kwargs["run_input"]["customTimeRange"] for c in sync_client.actor.return_value.start.call_args_list]
+        assert started == slices
+        assert mock_pytrends.call_count == len(slices)
+        assert job["result"]["meta"]["apify_stats"]["compute_units"] == pytest.approx(0.6)
+    
+    def test_job_awaits_fetch_slot_on_event_loop(self, mock_redis_for_jobs):
+        """Test that a job queued behind busy fetch slots does not hold a threadpool thread."""
+        import asyncio
+        from app.main import _predict_for_job
+        from app.services import FetchAdmission
+        
+        admission = FetchAdmission(max_concurrent=1, max_queue=0)
+        admission.acquire()
+        prediction = ({"recommendations": []}, "pytrends", None)
+        
+        async def run_job():
+            job = asyncio.ensure_future(_predict_for_job("job-1", "test", "7d", "ID", None))
+            await asyncio.sleep(0.05)
+            queued = (mock_predict.called, admission.waiting)
+            admission.release()
+            return queued, await asyncio.wait_for(job, 5)
+        
+        with patch('app.services.upstream_admission', admission), \
+             patch('app.services.get_prediction', return_value=prediction) as mock_predict:
+            queued, result = asyncio.run(run_job())
+        
+        assert queued == (False, 1)
+        assert result == prediction
+        assert mock_predict.call_args.kwargs == {"admitted": True}
+        assert admission.active == 0
+    
+    def test_job_state_writes_run_off_the_event_loop(self, mock_redis_for_jobs):
+        """Test that a job's blocking Redis writes (with retries) never run on the loop thread."""
+        import asyncio
+        import threading
+        from app.main import _run_job
+        from app.jobs import watch_apify_run
+        
+        job_id = JobManager.create_job("test")
+        callers = []
+        
+        def record(name):
+            original = getattr(JobManager, name)
+            return patch.object(JobManager, name, side_effect=lambda *a: callers.append(threading.get_ident()) or original(*a))
+        
+        client, _ = self._async_apify(["RUNNING", "SUCCEEDED"])
+        prediction = ({"recommendations": []}, "pytrends", None)
+        with record("set_processing"), record("set_progress"), record("set_completed"), record("is_expired"), \
+             patch('app.services.apify_async_client', client), \
+             patch('app.services.get_prediction', return_value=prediction):
+            asyncio.run(watch_apify_run(job_id, self._pending()))
+            asyncio.run(_run_job(job_id, "test", "7d", "ID", None))
+        
+        assert JobManager.get_job(job_id)["status"] == "completed"
+        assert len(callers) >= 5
+        assert threading.get_ident() not in callers
+    
+    def test_progress_mapping_bounds(self):
+        """Test that progress stays in range and grows with elapsed time."""
+        from app.jobs import apify_progress
+        
+        assert apify_progress("READY", 100, 120) == 35
+        values = [apify_progress("RUNNING", t, 120) for t in (0, 30, 120, 600, 10_000)]
+        assert values == sorted(values)
+        assert values[0] == 40 and values[-1] <= 75
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--cov=app", "--cov-report=html"])
@@ -0,0 +1,59 @@
+"""
+Tests for the services microbenchmark helpers.
+"""
+from benchmarks.bench_services import (
+    compare_results,
+    duplicate_series,
+    hourly_series,
+    run_benchmarks,
+)
+
+
+class TestBenchmarkInputs:
+    """Test benchmark input generators."""
+
+    def test_hourly_series_length(self):
+        """Test that hourly series have one point per hour."""
+        assert len(hourly_series(7)) == 168
+        assert len(hourly_series(30)) == 720
+
+    def test_duplicate_series_repeats_timestamps(self):
+        """Test that every timestamp appears twice."""
+        points = duplicate_series()
+        dates = [p["date"] for p in points]
+        assert len(dates) == 2 * len(set(dates))
+
+
+class TestCompareResults:
+    """Test regression detection against a baseline."""
+
+    def test_within_threshold(self):
+        """Test that small slowdowns are not reported."""
+        baseline = {"case": {"median_ms": 10.0, "peak_kib": 100.0}}
+        current = {"case": {"median_ms": 11.0, "peak_kib": 100.0}}
+        assert compare_results(current, baseline, 0.25) == []
+
+    def test_time_regression_reported(self):
+        """Test that slowdowns beyond the threshold are reported."""
+        baseline = {"case": {"median_ms": 10.0, "peak_kib": 100.0}}
+        current = {"case": {"median_ms": 14.0, "peak_kib": 100.0}}
+        regressions = compare_results(current, baseline, 0.25)
+        assert len(regressions) == 1
+        assert "case.median_ms" in regressions[0]
+
+    def test_memory_regression_reported(self):
+        """Test that peak memory growth beyond the threshold is reported."""
+        baseline = {"case": {"median_ms": 10.0, "peak_kib": 100.0}}
+        current = {"case": {"median_ms": 10.0, "peak_kib": 200.0}}
+        assert "case.peak_kib" in compare_results(current, baseline, 0.25)[0]
+
+    def test_new_case_without_baseline_ignored(self):
+        """Test that cases missing from the baseline are skipped."""
+        assert compare_results({"new": {"median_ms": 1.0, "peak_kib": 1.0}}, {}, 0.25) == []
+
+
+def test_run_single_case():
+    """Test that a selected case runs and reports all metrics."""
+    results = run_benchmarks(repeat=1, number=1, only=["normalize_keyword_x1000"])
+    assert set(results) == {"normalize_keyword_x1000"}
+    assert set(results["normalize_keyword_x1000"]) == {"median_ms", "min_ms", "peak_kib"}
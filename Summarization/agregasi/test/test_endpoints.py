@@ -14,6 +14,106 @@ class TestHealthEndpoint:
         assert response.json() == {"status": "ok"}
 
 
+class TestReadinessEndpoints:
+    """Test cases for /health/live and /health/ready."""
+    
+    @pytest.fixture
+    def fake_redis(self):
+        import fakeredis
+        from app.jobs import JobManager
+        
+        server = fakeredis.FakeRedis(decode_responses=True)
+        with patch('app.services.redis_client', server), \
+             patch('app.health._cached', {"at": 0.0, "report": None}), \
+             patch.object(JobManager, '_backlog', 0):
+            yield server
+    
+    def test_liveness_has_no_dependencies(self, client):
+        """Test that liveness answers without touching Redis."""
+        with patch('app.services.redis_client') as mock_client:
+            response = client.get("/health/live")
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "alive"
+        mock_client.ping.assert_not_called()
+    
+    def test_ready_reports_dependencies_and_caches_probes(self, client, fake_redis):
+        """Test that readiness reports each check and reuses the probe result."""
+        from datetime import datetime
+        fake_redis.set(f"usage:global:{datetime.now():%Y-%m-%d}", 500)
+        
+        with patch.object(fake_redis, 'ping', wraps=fake_redis.ping) as ping:
+            first = client.get("/health/ready")
+            second = client.get("/health/ready")
+        
+        assert first.status_code == 200
+        body = first.json()
+        assert body["status"] == "ready" and body["cached"] is False
+        assert body["checks"]["redis"]["latency_ms"] >= 0
+        assert body["checks"]["redis_pool"]["max"] == fake_redis.connection_pool.max_connections
+        assert body["checks"]["quota"]["breaker"] == "open"
+        assert body["checks"]["jobs"]["backlog"] == 0
+        assert second.json()["cached"] is True
+        assert ping.call_count == 1
+    
+    def test_not_ready_when_redis_unreachable(self, client, fake_redis):
+        """Test that a failing Redis ping returns 503."""
+        from redis import ConnectionError as RedisConnectionError
+        
+        with patch.object(fake_redis, 'ping', side_effect=RedisConnectionError("refused")):
+            response = client.get("/health/ready")
+        
+        assert response.status_code == 503
+        assert response.json()["checks"]["redis"]["ok"] is False
+    
+    def test_not_ready_when_pool_exhausted_or_backlog_high(self, client, fake_redis):
+        """Test that pool saturation and a large job backlog take the worker out of rotation."""
+        from app.jobs import JobManager
+        
+        with patch('app.health.settings.HEALTH_MAX_POOL_UTILIZATION', 0.0), \
+             patch.object(JobManager, '_backlog', 101):
+            response = client.get("/health/ready")
+        
+        assert response.status_code == 503
+        checks = response.json()["checks"]
+        assert checks["redis_pool"]["ok"] is False
+        assert checks["jobs"] == {"ok": False, "backlog": 101, "max": 100}
+
+
+class TestMetricsEndpoint:
+    """Test cases for /metrics endpoint."""
+    
+    def test_metrics_rendered_as_prometheus_text(self, client):
+        """Test that recorded counters are exposed in text format."""
+        from app.metrics import metrics
+        metrics.reset()
+        metrics.inc("negative_cache_compute_units_saved_total", 0.25)
+        
+        response = client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE negative_cache_compute_units_saved_total counter" in response.text
+        assert "negative_cache_compute_units_saved_total 0.25" in response.text
+    
+    def test_openmetrics_includes_trace_exemplars(self, client):
+        """Test that counters carry the trace ID exemplar in OpenMetrics output."""
+        from app.metrics import metrics
+        from app.tracing import trace_context
+        metrics.reset()
+        with trace_context("trace-9"):
+            metrics.inc("negative_cache_hits_total")
+        
+        plain = client.get("/metrics").text
+        response = client.get("/metrics", headers={"Accept": "application/openmetrics-text"})
+        
+        assert response.headers["content-type"].startswith("application/openmetrics-text")
+        assert "# TYPE negative_cache_hits counter" in response.text
+        assert 'negative_cache_hits_total 1 # {trace_id="trace-9"} 1 ' in response.text
+        assert response.text.endswith("# EOF\n")
+        assert "trace-9" not in plain
+
+
 class TestPredictEndpoint:
     """Test cases for /predict endpoint."""
     
@@ -24,10 +124,13 @@ class TestPredictEndpoint:
         with patch('app.services.apify_client') as mock_apify:
             # Mock Apify response
             mock_run = {
+                "id": "test_run",
                 "defaultDatasetId": "test_dataset",
+                "status": "SUCCEEDED",
                 "stats": {"durationMillis": 12500, "computeUnits": 0.12}
             }
-            mock_apify.actor.return_value.call.return_value = mock_run
+            mock_apify.actor.return_value.start.return_value = {**mock_run, "status": "READY"}
+            mock_apify.run.return_value.wait_for_finish.return_value = mock_run
             
             # Mock dataset - use correct Apify field name
             mock_dataset_items = [{"interestOverTime_timelineData": mock_apify_response["timeline_data"]}]
@@ -105,15 +208,42 @@ class TestPredictEndpoint:
         
         assert response.status_code == 422
     
+    def test_predict_with_invalid_timeframe_fails(self, client):
+        """Test that unsupported timeframe returns validation error."""
+        response = client.get("/predict?keyword=skincare&timeframe=1y")
+        
+        assert response.status_code == 422
+    
+    def test_predict_with_invalid_geo_or_tz_fails(self, client):
+        """Test that unknown geo codes and timezones return validation errors."""
+        assert client.get("/predict?keyword=skincare&geo=XX").status_code == 422
+        assert client.get("/predict?keyword=skincare&tz=Mars/Olympus").status_code == 422
+        assert client.post("/predict/async?keyword=skincare&geo=XX").status_code == 422
+    
+    def test_predict_passes_geo_and_tz(self, client):
+        """Test that geo/tz reach the service and are echoed in meta."""
+        with patch('app.main.check_rate_limits'), \
+             patch('app.main.get_cached_response_body', return_value=None), \
+             patch('app.main.get_prediction_swr', return_value=({"recommendations": []}, "pytrends", None)) as mock_swr:
+            response = client.get("/predict?keyword=skincare&geo=ph")
+        
+        assert response.status_code == 200
+        assert mock_swr.call_args.args[3:5] == ("PH", "Asia/Manila")
+        assert response.json()["meta"]["geo"] == "PH"
+        assert response.json()["meta"]["tz"] == "Asia/Manila"
+    
     @pytest.mark.skip(reason="Complex normalization with Apify mock - better tested in integration tests")
     def test_predict_with_special_characters_normalized(self, client, mock_redis, mock_apify_client, mock_apify_response):
         """Test that keywords with special characters are normalized."""
         with patch('app.services.apify_client') as mock_apify:
             mock_run = {
+                "id": "test_run",
                 "defaultDatasetId": "test_dataset",
+                "status": "SUCCEEDED",
                 "stats": {"durationMillis": 12500, "computeUnits": 0.12}
             }
-            mock_apify.actor.return_value.call.return_value = mock_run
+            mock_apify.actor.return_value.start.return_value = {**mock_run, "status": "READY"}
+            mock_apify.run.return_value.wait_for_finish.return_value = mock_run
             # Use correct Apify field name
             mock_dataset_items = [{"interestOverTime_timelineData": mock_apify_response["timeline_data"]}]
             mock_apify.dataset.return_value.iterate_items.return_value = iter(mock_dataset_items)
@@ -126,22 +256,26 @@ class TestPredictEndpoint:
     
     def test_predict_rate_limit_exceeded(self, client, mock_redis):
         """Test that rate limit is enforced."""
-        # Mock Redis to return rate limit exceeded
-        with patch('app.services.redis_get_with_retry', return_value="501"):
-            response = client.get("/predict?keyword=test")
+        # Mock Redis to return rate limit exceeded (global count, expire, client count, expire, previous window)
+        mock_redis.pipeline.return_value.execute.return_value = [501, True, 1, True, None]
+        response = client.get("/predict?keyword=test")
         
         assert response.status_code == 429
         data = response.json()
         assert "rate limit" in data["detail"].lower()
+        assert int(response.headers["retry-after"]) > 0
     
     def test_predict_with_no_apify_data(self, client, mock_redis):
         """Test handling when Apify returns no data."""
         with patch('app.services.apify_client') as mock_apify:
             mock_run = {
+                "id": "test_run",
                 "defaultDatasetId": "test_dataset",
+                "status": "SUCCEEDED",
                 "stats": {"durationMillis": 12500, "computeUnits": 0.12}
             }
-            mock_apify.actor.return_value.call.return_value = mock_run
+            mock_apify.actor.return_value.start.return_value = {**mock_run, "status": "READY"}
+            mock_apify.run.return_value.wait_for_finish.return_value = mock_run
             
             # Return empty dataset
             mock_apify.dataset.return_value.iterate_items.return_value = iter([])
@@ -153,6 +287,246 @@ class TestPredictEndpoint:
         assert data["status"] == "error"
 
 
+class TestResponseCache:
+    """Test pre-serialized /predict bodies served on fresh cache hits."""
+    
+    @pytest.fixture
+    def fake_redis(self):
+        import fakeredis
+        server = fakeredis.FakeRedis(decode_responses=True)
+        with patch('app.services.redis_client', server):
+            yield server
+    
+    @pytest.fixture
+    def processed(self):
+        return {
+            "recommendations": [
+                {"rank": 1, "day": "Friday", "time_window": "19:00 - 22:00", "score": 91.5}
+            ],
+            "chart_data": [{"hour": 19, "value": 91.5}]
+        }
+    
+    def test_fresh_hit_served_from_serialized_body(self, client, fake_redis, processed):
+        """Test that a stored body is returned as-is with the raw keyword spliced in."""
+        from app.services import cache_response_body
+        cache_response_body("skin_care", "7d", processed, {"duration_ms": 1200})
+        
+        with patch('app.services.get_prediction_swr') as mock_swr:
+            response = client.get("/predict?keyword=Skin-Care!")
+        
+        mock_swr.assert_not_called()
+        assert response.status_code == 200
+        assert response.headers["x-cache"] == "hit"
+        assert response.headers["content-type"] == "application/json"
+        data = response.json()
+        assert data["meta"]["keyword"] == "Skin-Care!"
+        assert data["meta"]["source"] == "cache_fresh"
+        assert data["meta"]["apify_stats"] == {"duration_ms": 1200}
+        assert "score" not in data["data"]["recommendations"][0]
+        assert "chart_data" not in data["data"]
+    
+    def test_serialized_body_matches_slow_path(self, client, fake_redis, processed):
+        """Test that the fast path returns the same JSON as the validated slow path."""
+        from app.services import cache_response_body
+        
+        with patch('app.main.get_cached_response_body', return_value=None), \
+             patch('app.main.get_prediction_swr', return_value=(json.loads(json.dumps(processed)), "cache_fresh", None)):
+            slow = client.get("/predict?keyword=skincare").json()
+        
+        cache_response_body("skincare", "7d", processed, None)
+        fast = client.get("/predict?keyword=skincare").json()
+        
+        assert fast == slow
+    
+    def test_cached_body_lookup_runs_off_the_event_loop(self, client, fake_redis, processed):
+        """Test that the blocking Redis lookup of the fast path is not run on the loop thread."""
+        import asyncio
+        from app.services import cache_response_body, get_cached_response_body
+        cache_response_body("skincare", "7d", processed, None)
+        loops = []
+        
+        def lookup(*args):
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                pass
+            return get_cached_response_body(*args)
+        
+        with patch('app.main.get_cached_response_body', side_effect=lookup) as mock_lookup:
+            response = client.get("/predict?keyword=skincare")
+        
+        assert response.headers["x-cache"] == "hit"
+        assert mock_lookup.called and loops == []
+    
+    def test_serialized_body_scoped_to_timeframe(self, client, fake_redis, processed):
+        """Test that a 7d body is not served for a 30d request."""
+        from app.services import cache_response_body, get_cached_response_body
+        cache_response_body("skincare", "7d", processed, None)
+        
+        assert get_cached_response_body("skincare", "7d") is not None
+        assert get_cached_response_body("skincare", "30d") is None
+    
+    def test_fast_path_still_enforces_rate_limit(self, client, fake_redis, processed):
+        """Test that cached bodies do not bypass the global rate limit."""
+        from app.services import cache_response_body
+        cache_response_body("skincare", "7d", processed, None)
+        
+        with patch('app.services.settings.GLOBAL_RATE_LIMIT', 1):
+            assert client.get("/predict?keyword=skincare").status_code == 200
+            assert client.get("/predict?keyword=skincare").status_code == 429
+
+
+class TestRateLimiting:
+    """Test per-client sliding-window limits combined with the global quota."""
+    
+    TIERS = {"anonymous": {"limit": 2, "window": 60}, "premium": {"limit": 5, "window": 60}}
+    
+    @pytest.fixture
+    def fake_redis(self):
+        import fakeredis
+        server = fakeredis.FakeRedis(decode_responses=True)
+        with patch('app.services.redis_client', server), \
+             patch('app.services.settings.RATE_LIMIT_TIERS', self.TIERS), \
+             patch('app.services.settings.API_KEYS', {"k-premium": "premium"}), \
+             patch('app.main.get_cached_response_body', return_value=b'{"status": "success"}'):
+            yield server
+    
+    def test_client_limited_with_retry_after(self, client, fake_redis):
+        """Test that a client over its tier limit gets 429 and Retry-After."""
+        statuses = [client.get("/predict?keyword=skincare").status_code for _ in range(3)]
+        
+        assert statuses == [200, 200, 429]
+        response = client.get("/predict?keyword=skincare")
+        assert 1 <= int(response.headers["retry-after"]) <= 120
+        assert "anonymous" in response.json()["detail"]
+    
+    def test_clients_limited_independently(self, client, fake_redis):
+        """Test that one noisy IP does not throttle another IP or an API key."""
+        for _ in range(3):
+            client.get("/predict?keyword=skincare", headers={"X-Real-IP": "10.0.0.1"})
+        
+        assert client.get("/predict?keyword=skincare", headers={"X-Real-IP": "10.0.0.2"}).status_code == 200
+        premium = [
+            client.get("/predict?keyword=skincare", headers={"X-API-Key": "k-premium"}).status_code
+            for _ in range(5)
+        ]
+        assert premium == [200] * 5
+    
+    def test_limits_checked_off_the_event_loop(self, client):
+        """Test that every endpoint runs the rate-limit pipeline in the threadpool."""
+        import asyncio
+        from fastapi import HTTPException
+        loops = []
+        
+        def limited(*args, **kwargs):
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                pass
+            raise HTTPException(status_code=429, detail="limited")
+        
+        with patch('app.main.check_rate_limits', side_effect=limited) as mock_check:
+            statuses = [
+                client.get("/predict?keyword=skincare").status_code,
+                client.get("/predict/summary?keyword=skincare").status_code,
+                client.post("/predict/async?keyword=skincare").status_code,
+                client.post("/predict/summary/async?keyword=skincare").status_code,
+            ]
+        
+        assert statuses == [429] * 4
+        assert mock_check.call_count == 4 and loops == []
+    
+    def test_rejected_requests_do_not_consume_global_quota(self, client, fake_redis):
+        """Test that client rejections are un-counted from the global usage."""
+        from datetime import datetime
+        for _ in range(5):
+            client.get("/predict?keyword=skincare")
+        
+        assert fake_redis.get(f"usage:global:{datetime.now():%Y-%m-%d}") == "2"
+    
+    def test_limits_checked_in_one_roundtrip(self, client, fake_redis):
+        """Test that an allowed request costs a single pipeline for both checks."""
+        with patch.object(fake_redis, 'pipeline', wraps=fake_redis.pipeline) as spy:
+            client.get("/predict?keyword=skincare")
+        
+        assert spy.call_count == 1
+    
+    def test_cluster_mode_rejection_returns_429(self, client, fake_redis):
+        """Test that over-limit requests are un-counted without MULTI in cluster mode."""
+        from datetime import datetime
+        from redis.exceptions import RedisClusterException
+        pipeline = fake_redis.pipeline
+    
+        def cluster_pipeline(transaction=True):
+            # RedisCluster refuses transactional pipelines
+            if transaction:
+                raise RedisClusterException("method pipeline() does not support transaction")
+            return pipeline(transaction=False)
+    
+        with patch('app.services.settings.REDIS_CLUSTER_ENABLED', True), \
+             patch.object(fake_redis, 'pipeline', side_effect=cluster_pipeline):
+            statuses = [client.get("/predict?keyword=skincare").status_code for _ in range(3)]
+    
+        assert statuses == [200, 200, 429]
+        assert fake_redis.get(f"usage:global:{datetime.now():%Y-%m-%d}") == "2"
+
+    def test_sliding_window_retry_after(self):
+        """Test the wait until the weighted previous window makes room."""
+        from app.services import _sliding_window_retry_after
+        
+        # Previous window full, 30s into a 60s window: 10 * 0.5 = 5 in flight, limit 5
+        assert _sliding_window_retry_after(10, 0, 5, 60, 30.0) == 6
+        # Current window already at the limit: wait for the next window to decay
+        assert _sliding_window_retry_after(0, 5, 5, 60, 50.0) == 22
+
+
+class TestLoadShedding:
+    """Test /predict behaviour when upstream fetch capacity is exhausted."""
+    
+    def test_shed_miss_returns_503_with_retry_after(self, client, mock_redis):
+        """Test that a shed miss fails fast with 503."""
+        from app.services import UpstreamOverloadedException
+        
+        with patch('app.main.get_cached_response_body', return_value=None), \
+             patch('app.main.get_prediction_swr', side_effect=UpstreamOverloadedException("full", retry_after=7)):
+            response = client.get("/predict?keyword=skincare")
+        
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "7"
+        assert response.json()["status"] == "error"
+    
+    def test_shed_miss_converted_to_async_job(self, client, mock_redis):
+        """Test that a shed miss becomes an async job when enabled."""
+        from app.services import UpstreamOverloadedException
+        
+        with patch('app.main.settings.OVERLOAD_CONVERT_TO_ASYNC', True), \
+             patch('app.main.get_cached_response_body', return_value=None), \
+             patch('app.main.get_prediction_swr', side_effect=UpstreamOverloadedException("full")), \
+             patch('app.main.JobManager.create_job', return_value="job-123") as mock_create, \
+             patch('app.main.process_job_async') as mock_process:
+            response = client.get("/predict?keyword=skincare")
+        
+        assert response.status_code == 202
+        assert response.json()["polling_url"] == "/job/job-123"
+        mock_create.assert_called_once()
+        mock_process.assert_called_once()
+    
+    def test_exhausted_budget_not_converted_to_job(self, client):
+        """Test that a spent daily budget returns its own 503 instead of an async job."""
+        from app.services import UpstreamBudgetExhaustedException
+        
+        with patch('app.main.settings.OVERLOAD_CONVERT_TO_ASYNC', True), \
+             patch('app.main.get_cached_response_body', return_value=None), \
+             patch('app.main.get_prediction_swr', side_effect=UpstreamBudgetExhaustedException("spent", retry_after=3600)), \
+             patch('app.main.JobManager.create_job') as mock_create:
+            response = client.get("/predict?keyword=skincare")
+        
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "3600"
+        assert "budget" in response.json()["detail"]
+        mock_create.assert_not_called()
+
+
 class TestCORS:
     """Test CORS middleware."""
     
@@ -173,10 +547,13 @@ class TestErrorHandling:
         """Test that data validation errors are handled properly."""
         with patch('app.services.apify_client') as mock_apify:
             mock_run = {
+                "id": "test_run",
                 "defaultDatasetId": "test_dataset",
+                "status": "SUCCEEDED",
                 "stats": {"durationMillis": 12500, "computeUnits": 0.12}
             }
-            mock_apify.actor.return_value.call.return_value = mock_run
+            mock_apify.actor.return_value.start.return_value = {**mock_run, "status": "READY"}
+            mock_apify.run.return_value.wait_for_finish.return_value = mock_run
             
             # Return invalid data (missing required fields) with correct field name
             mock_dataset_items = [{"interestOverTime_timelineData": [{"invalid": "data"}]}]
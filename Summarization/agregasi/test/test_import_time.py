@@ -0,0 +1,93 @@
+"""
+Cold-start tests: importing the app must stay cheap.
+
+Each check runs in a fresh interpreter without APIFY_TOKEN. The time budget
+can be raised on slow machines with IMPORT_TIME_BUDGET (seconds).
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_TIME_BUDGET = float(os.environ.get("IMPORT_TIME_BUDGET", "1.0"))
+HEAVY_MODULES = ("numpy", "pandas", "pytrends", "apify_client")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "elapsed": elapsed,
+    "heavy": [m for m in %r if m in sys.modules]
+}))
+""" % (HEAVY_MODULES,)
+
+
+def _probe_import():
+    env = {k: v for k, v in os.environ.items() if k != "APIFY_TOKEN"}
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=APP_DIR, env=env,
+        capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestColdStart:
+    """Test import cost of app.main."""
+
+    def test_import_without_apify_token_skips_heavy_modules(self):
+        """Test that the app imports without APIFY_TOKEN and defers heavy dependencies."""
+        probe = _probe_import()
+
+        assert probe["heavy"] == []
+
+    def test_import_time_within_budget(self):
+        """Test that importing app.main stays under the budget (best of 3 runs)."""
+        best = min(_probe_import()["elapsed"] for _ in range(3))
+
+        assert best < IMPORT_TIME_BUDGET, f"import app.main took {best:.3f}s (budget {IMPORT_TIME_BUDGET}s)"
+
+
+class TestLazyClients:
+    """Test deferred construction of module-level clients."""
+
+    def test_lazy_object_rebinds_global_on_first_use(self):
+        """Test that the proxy builds once and replaces itself in the namespace."""
+        from app.lazy import LazyObject
+
+        namespace = {}
+        calls = []
+        namespace["client"] = LazyObject(lambda: calls.append(1) or {"ok": True}, namespace, "client")
+
+        assert calls == []
+        assert namespace["client"].get("ok") is True
+        assert namespace["client"] == {"ok": True}
+        assert calls == [1]
+
+    def test_apify_client_requires_token_on_first_use(self):
+        """Test that a missing APIFY_TOKEN only fails when Apify is used."""
+        from unittest.mock import patch
+        from app.services import _create_apify_client
+
+        with patch('app.services.settings.APIFY_TOKEN', ""):
+            with pytest.raises(RuntimeError, match="APIFY_TOKEN"):
+                _create_apify_client()
+
+    def test_warmup_never_raises(self):
+        """Test that warmup logs and continues when Redis is unreachable."""
+        from unittest.mock import MagicMock, patch
+        from redis import ConnectionError as RedisConnectionError
+        from app.services import warmup
+
+        broken = MagicMock()
+        broken.ping.side_effect = RedisConnectionError("refused")
+        with patch('app.services.redis_client', broken):
+            warmup()
+
+        broken.ping.assert_called_once()
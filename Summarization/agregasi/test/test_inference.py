@@ -0,0 +1,337 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.inference import SummaryPool, SummaryUnavailableException
+from app.main import app
+
+
+# Worker-side stand-ins for the T5 summarizer (module level so spawned workers can import them)
+_prefix = None
+
+
+def _fake_init(prefix):
+    global _prefix
+    _prefix = prefix
+
+
+def _failing_init():
+    raise RuntimeError("no model")
+
+
+def _fake_generate(hourly_summaries, max_length, num_beams):
+    time.sleep(hourly_summaries[0].get("delay", 0))
+    return [f"{_prefix}{item['day']}/{num_beams}" for item in hourly_summaries]
+
+
+def _batch_size_generate(hourly_summaries, max_length, num_beams):
+    time.sleep(hourly_summaries[0].get("delay", 0))
+    return [f"{item['day']}#{len(hourly_summaries)}" for item in hourly_summaries]
+
+
+HOURLY = [
+    {"rank": 1, "day": "Monday", "time_window": "17:00 - 20:00"},
+    {"rank": 2, "day": "Friday", "time_window": "19:00 - 22:00"}
+]
+
+
+class TestSummaryPool:
+    """Test cases for the inference worker process pool."""
+
+    def test_summaries_generated_on_worker_process(self):
+        """Test that a batch runs in a worker initialized once with the model."""
+        pool = SummaryPool(1, 0, 30, initializer=_fake_init, initargs=("w:",), task=_fake_generate)
+        try:
+            first = asyncio.run(pool.summarize(HOURLY, num_beams=2))
+            second = asyncio.run(pool.summarize(HOURLY[:1]))
+        finally:
+            pool.shutdown()
+
+        assert first == ["w:Monday/2", "w:Friday/2"]
+        assert second == ["w:Monday/4"]
+        assert pool.in_flight == 0
+
+    def test_full_pool_rejects_instead_of_queueing(self):
+        """Test that requests beyond workers + queue depth fail fast."""
+        from app.metrics import metrics
+
+        pool = SummaryPool(1, 0, 30, initializer=_fake_init, initargs=("w:",), task=_fake_generate)
+        slow = [{**HOURLY[0], "delay": 1.0}]
+
+        async def burst():
+            return await asyncio.gather(pool.summarize(slow), pool.summarize(slow), return_exceptions=True)
+
+        try:
+            results = asyncio.run(burst())
+        finally:
+            pool.shutdown()
+
+        assert results[0] == ["w:Monday/4"]
+        assert isinstance(results[1], SummaryUnavailableException)
+        assert metrics.get("summary_requests_total", outcome="rejected") >= 1
+
+    def test_broken_workers_surface_as_unavailable(self):
+        """Test that workers failing to load the model give a 503-able error, not a hang."""
+        pool = SummaryPool(1, 0, 30, initializer=_failing_init, task=_fake_generate)
+        try:
+            with pytest.raises(SummaryUnavailableException):
+                asyncio.run(pool.summarize(HOURLY))
+        finally:
+            pool.shutdown()
+
+        assert pool.in_flight == 0
+
+    def test_empty_input_skips_workers(self):
+        """Test that no process is spawned for an empty hourly_summary."""
+        pool = SummaryPool(1, 0, 30, initializer=_failing_init, task=_fake_generate)
+
+        assert asyncio.run(pool.summarize([])) == []
+        assert pool._executor is None
+
+
+class TestMicroBatching:
+    """Test cases for batching concurrent summary requests."""
+
+    def test_concurrent_requests_share_one_generate(self):
+        """Test that requests arriving within the wait window run as one batch."""
+        from app.metrics import metrics
+
+        metrics.reset()
+        pool = SummaryPool(1, 4, 30, initializer=_fake_init, initargs=("",), task=_batch_size_generate,
+                           max_batch_size=8, max_wait=0.2)
+
+        async def burst():
+            return await asyncio.gather(pool.summarize(HOURLY), pool.summarize(HOURLY[:1]))
+
+        try:
+            first, second = asyncio.run(burst())
+        finally:
+            pool.shutdown()
+
+        assert first == ["Monday#3", "Friday#3"]
+        assert second == ["Monday#3"]
+        assert metrics.get("summary_batches_total") == 1
+        assert metrics.get("summary_batch_items_total") == 3
+
+    def test_full_batch_dispatched_without_waiting(self):
+        """Test that a batch reaching the size limit does not wait out the timer."""
+        pool = SummaryPool(1, 4, 30, initializer=_fake_init, initargs=("",), task=_batch_size_generate,
+                           max_batch_size=2, max_wait=30.0)
+
+        async def burst():
+            return await asyncio.wait_for(
+                asyncio.gather(pool.summarize(HOURLY[:1]), pool.summarize(HOURLY[1:])), 20
+            )
+
+        try:
+            results = asyncio.run(burst())
+        finally:
+            pool.shutdown()
+
+        assert results == [["Monday#2"], ["Friday#2"]]
+
+    def test_batches_never_exceed_max_size(self):
+        """Test that a request that would overflow the open batch starts a new one."""
+        from app.metrics import metrics
+
+        metrics.reset()
+        pool = SummaryPool(1, 4, 30, initializer=_fake_init, initargs=("",), task=_batch_size_generate,
+                           max_batch_size=3, max_wait=0.2)
+
+        async def burst():
+            return await asyncio.gather(pool.summarize(HOURLY), pool.summarize(HOURLY), pool.summarize(HOURLY[:1]))
+
+        try:
+            first, second, third = asyncio.run(burst())
+        finally:
+            pool.shutdown()
+
+        assert first == ["Monday#3", "Friday#3"]
+        assert second == ["Monday#2", "Friday#2"]
+        assert third == ["Monday#3"]
+        assert metrics.get("summary_batches_total") == 2
+
+    def test_requests_coalesce_while_workers_are_busy(self):
+        """Test that requests queued behind a running batch are dispatched as one batch."""
+        pool = SummaryPool(1, 4, 30, initializer=_fake_init, initargs=("",), task=_batch_size_generate,
+                           max_batch_size=8, max_wait=0.0)
+
+        async def burst():
+            running = asyncio.ensure_future(pool.summarize([{**HOURLY[0], "delay": 0.5}]))
+            await asyncio.sleep(0.05)
+            queued = await asyncio.gather(pool.summarize(HOURLY[:1]), pool.summarize(HOURLY[1:]))
+            return await running, queued
+
+        try:
+            running, queued = asyncio.run(burst())
+        finally:
+            pool.shutdown()
+
+        assert running == ["Monday#1"]
+        assert queued == [["Monday#2"], ["Friday#2"]]
+
+    def test_different_decoding_options_not_mixed(self):
+        """Test that only requests with the same beams/length are batched together."""
+        pool = SummaryPool(1, 4, 30, initializer=_fake_init, initargs=("",), task=_batch_size_generate,
+                           max_batch_size=8, max_wait=0.2)
+
+        async def burst():
+            return await asyncio.gather(pool.summarize(HOURLY, num_beams=2), pool.summarize(HOURLY, num_beams=4))
+
+        try:
+            results = asyncio.run(burst())
+        finally:
+            pool.shutdown()
+
+        assert results == [["Monday#2", "Friday#2"], ["Monday#2", "Friday#2"]]
+
+
+class TestSummaryCache:
+    """Test cases for the content-addressed summary cache."""
+
+    ENTRY = {"rank": 1, "day": "Monday", "time_window": "17:00 - 20:00", "score": 85.2, "daily_avg": 69.0,
+             "peak_hour": 18, "peak_value": 89.0, "hourly": "17(84), 18(89), 19(83)"}
+
+    @pytest.fixture
+    def fake_redis(self):
+        import fakeredis
+        from app.metrics import metrics
+
+        server = fakeredis.FakeRedis(decode_responses=True)
+        metrics.reset()
+        with patch('app.services.redis_client', server):
+            yield server
+
+    def _pool(self, cache):
+        return SummaryPool(1, 4, 30, initializer=_fake_init, initargs=("w:",), task=_fake_generate, cache=cache)
+
+    def test_key_built_from_model_input_fields(self):
+        """Test that keys cover the fields the model reads and nothing else."""
+        from app.inference import SummaryCache
+
+        cache = SummaryCache(16, "v1", redis_enabled=False)
+
+        assert cache.key(self.ENTRY, 512, 4) == cache.key(dict(self.ENTRY, rank=3), 512, 4)
+        assert cache.key(self.ENTRY, 512, 4) == cache.key(dict(reversed(list(self.ENTRY.items()))), 512, 4)
+        assert cache.key(self.ENTRY, 512, 4) != cache.key(self.ENTRY, 512, 2)
+        assert cache.key(self.ENTRY, 512, 4) != SummaryCache(16, "v2").key(self.ENTRY, 512, 4)
+        assert cache.key(self.ENTRY, 512, 4) != cache.key(dict(self.ENTRY, score=85.4), 512, 4)
+        assert cache.key(self.ENTRY, 512, 4) != cache.key(dict(self.ENTRY, hourly="17(84)"), 512, 4)
+
+    def test_missing_inference_package_is_unavailable(self, fake_redis):
+        """Test that keys need no inference dir, so a pool that cannot load gives 503-able errors."""
+        from app.inference import SummaryCache
+
+        pool = SummaryPool(1, 0, 30, initializer=_failing_init, task=_fake_generate,
+                           cache=SummaryCache(16, "v1", redis_enabled=False))
+        try:
+            with patch('app.inference.settings.SUMMARY_INFERENCE_DIR', "/nonexistent_inference"), \
+                 pytest.raises(SummaryUnavailableException):
+                asyncio.run(pool.summarize([self.ENTRY]))
+        finally:
+            pool.shutdown()
+
+    def test_repeat_served_from_memory(self, fake_redis):
+        """Test that a repeated entry skips the workers and reports saved seconds."""
+        from app.inference import SummaryCache
+        from app.metrics import metrics
+
+        pool = self._pool(SummaryCache(16, "v1", redis_enabled=False))
+        try:
+            first = asyncio.run(pool.summarize([self.ENTRY]))
+            second = asyncio.run(pool.summarize([self.ENTRY]))
+        finally:
+            pool.shutdown()
+
+        assert first == second == ["w:Monday/4"]
+        assert metrics.get("summary_batches_total") == 1
+        assert metrics.get("summary_cache_lookups_total", result="memory") == 1
+        assert metrics.get("summary_cache_lookups_total", result="miss") == 1
+        assert metrics.get("summary_cache_saved_seconds_total") >= 0
+
+    def test_redis_tier_shared_across_workers(self, fake_redis):
+        """Test that another worker's cache finds the entry in Redis without generating."""
+        from app.inference import SummaryCache
+        from app.metrics import metrics
+
+        writer = self._pool(SummaryCache(16, "v1"))
+        try:
+            asyncio.run(writer.summarize([self.ENTRY]))
+        finally:
+            writer.shutdown()
+
+        reader = self._pool(SummaryCache(16, "v1"))
+        result = asyncio.run(reader.summarize([self.ENTRY]))
+
+        assert result == ["w:Monday/4"]
+        assert reader._executor is None
+        assert metrics.get("summary_cache_lookups_total", result="redis") == 1
+        assert any(key.startswith("summary:") for key in fake_redis.keys())
+
+    def test_lru_evicts_oldest(self):
+        """Test that the in-process tier is bounded."""
+        from app.inference import SummaryCache
+
+        cache = SummaryCache(2, "v1", redis_enabled=False)
+        for key in ("a", "b", "c"):
+            cache.put_local(key, {"text": key, "seconds": 1.0})
+
+        assert cache.get_local("a") is None
+        assert cache.get_local("c")["text"] == "c"
+
+
+class TestSummaryEndpoints:
+    """Test cases for /predict/summary and /predict/summary/async."""
+
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    @pytest.fixture
+    def prediction(self):
+        data = {
+            "recommendations": [{"rank": 1, "day": "Monday", "time_window": "17:00 - 20:00", "score": 85.2}],
+            "chart_data": [],
+            "hourly_summary": HOURLY[:1]
+        }
+        return data, "cache_fresh", None
+
+    def test_summary_endpoint_returns_summaries(self, client, mock_redis, prediction):
+        """Test that summaries are attached per recommendation."""
+        with patch('app.main.get_prediction_swr', return_value=prediction), \
+             patch('app.main.summary_pool.summarize', AsyncMock(return_value=["Monday evenings..."])) as mock_summarize:
+            response = client.get("/predict/summary?keyword=skincare")
+
+        assert response.status_code == 200
+        summaries = response.json()["data"]["summaries"]
+        assert summaries == [{"rank": 1, "day": "Monday", "time_window": "17:00 - 20:00", "summary": "Monday evenings..."}]
+        assert "chart_data" not in response.json()["data"]
+        mock_summarize.assert_awaited_once()
+
+    def test_busy_pool_returns_503(self, client, mock_redis, prediction):
+        """Test that a full inference pool sheds with Retry-After."""
+        busy = AsyncMock(side_effect=SummaryUnavailableException("busy", retry_after=9))
+        with patch('app.main.get_prediction_swr', return_value=prediction), \
+             patch('app.main.summary_pool.summarize', busy):
+            response = client.get("/predict/summary?keyword=skincare")
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "9"
+
+    def test_async_summary_job_completes_with_summaries(self, client, prediction):
+        """Test that the async variant stores summaries in the job result."""
+        import fakeredis
+
+        fake = fakeredis.FakeRedis(decode_responses=True)
+        with patch('app.jobs.redis_client', fake), \
+             patch('app.services.redis_client', fake), \
+             patch('app.services.get_prediction', return_value=prediction), \
+             patch('app.main.summary_pool.summarize', AsyncMock(return_value=["Monday evenings..."])):
+            job_id = client.post("/predict/summary/async?keyword=skincare").json()["job_id"]
+            job = client.get(f"/job/{job_id}").json()
+
+        assert job["status"] == "completed"
+        assert job["result"]["data"]["summaries"][0]["summary"] == "Monday evenings..."
@@ -0,0 +1,70 @@
+"""
+Smoke tests for the offline load-testing harness.
+"""
+import pytest
+
+from benchmarks.loadtest import (
+    build_parser,
+    parse_mix,
+    percentile,
+    run_loadtest,
+    UpstreamProfile,
+)
+
+
+class TestHarnessHelpers:
+    """Test parsing and statistics helpers."""
+
+    def test_parse_mix(self):
+        """Test that workload mix weights are parsed per operation."""
+        mix = parse_mix("hit=0.5,miss=0.5")
+        assert mix == {"hit": 0.5, "miss": 0.5, "async": 0.0}
+
+    def test_parse_mix_rejects_unknown_operation(self):
+        """Test that unknown operations are rejected."""
+        with pytest.raises(ValueError):
+            parse_mix("hit=1,delete=1")
+
+    def test_upstream_profile_parse(self):
+        """Test that upstream profiles accept partial specs."""
+        profile = UpstreamProfile.parse("fixed:250")
+        assert profile.distribution == "fixed"
+        assert profile.latency_ms == 250.0
+        assert profile.error_rate == 0.0
+
+    def test_percentile_nearest_rank(self):
+        """Test nearest-rank percentile on a sorted list."""
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 99) == 99.0
+        assert percentile([], 95) == 0.0
+
+
+class TestLoadtestRun:
+    """Run a tiny workload end-to-end against fakeredis."""
+
+    def test_small_workload_report(self):
+        """Test that a small mixed workload produces a complete report."""
+        args = build_parser().parse_args([
+            "--requests", "12",
+            "--concurrency", "2",
+            "--hot-keywords", "2",
+            "--mix", "hit=0.5,miss=0.25,async=0.25",
+            "--pytrends", "fixed:0",
+            "--apify", "fixed:0",
+            "--job-timeout", "20",
+            "--poll-interval", "0.05",
+        ])
+        report = run_loadtest(args)
+
+        assert report["rps"] > 0
+        assert set(report["operations"]) == {"hit", "miss", "async"}
+        assert sum(op["count"] for op in report["operations"].values()) == 12
+        assert report["operations"]["hit"]["errors"] == 0
+        for key in ("p50", "p95", "p99"):
+            assert key in report["latency_ms"]
+
+        # Every miss and async job reaches pytrends exactly once (no faults configured)
+        expected_calls = report["operations"]["miss"]["count"] + report["operations"]["async"]["count"]
+        assert report["upstream"]["pytrends"]["calls"] == expected_calls
+        assert report["upstream"]["apify"]["calls"] == 0
@@ -0,0 +1,144 @@
+import io
+import json
+import logging
+import queue
+
+import pytest
+
+from app.config import settings
+from app.logging_setup import (
+    JsonFormatter,
+    SamplingFilter,
+    DroppingQueueHandler,
+    begin_request,
+    configure_logging,
+    shutdown_logging
+)
+
+
+@pytest.fixture
+def log_stream():
+    stream = io.StringIO()
+    configure_logging("INFO", 1.0, stream=stream)
+    yield stream
+    configure_logging(settings.LOG_LEVEL, settings.LOG_SAMPLE_RATE, settings.LOG_QUEUE_SIZE)
+
+
+def _record(level=logging.INFO, msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord("app.services", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestStructuredLogging:
+    """Test cases for the JSON log format and the queued writer."""
+    
+    def test_json_lines_with_extra_fields(self, log_stream):
+        """Test that records are valid JSON (even with quotes) and carry extra fields."""
+        logging.getLogger("app.services").info('Cache hit for "%s"', "skin care", extra={"keyword": "skin_care"})
+        shutdown_logging()
+        
+        entry = json.loads(log_stream.getvalue().strip().splitlines()[-1])
+        assert entry["message"] == 'Cache hit for "skin care"'
+        assert entry["level"] == "INFO" and entry["logger"] == "app.services"
+        assert entry["keyword"] == "skin_care"
+    
+    def test_exception_rendered_as_field(self, log_stream):
+        """Test that tracebacks end up in an exception field, not the message."""
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("app.main").exception("Job failed")
+        shutdown_logging()
+        
+        entry = json.loads(log_stream.getvalue().strip().splitlines()[-1])
+        assert entry["message"] == "Job failed"
+        assert "ValueError: boom" in entry["exception"]
+    
+    def test_sampled_out_records_are_never_formatted(self):
+        """Test that arguments of records dropped by sampling are not rendered."""
+        class Expensive:
+            calls = 0
+            
+            def __str__(self):
+                Expensive.calls += 1
+                return "expensive"
+        
+        handler = DroppingQueueHandler(queue.Queue())
+        handler.addFilter(SamplingFilter(0.1))
+        begin_request(0.0)
+        handler.handle(_record(msg="Sampled out: %s", args=(Expensive(),)))
+        
+        assert Expensive.calls == 0
+        assert handler.queue.empty()
+    
+    def test_full_queue_drops_instead_of_blocking(self):
+        """Test that a full log queue drops records and counts them."""
+        from app.metrics import metrics
+        metrics.reset()
+        handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+        
+        handler.handle(_record())
+        handler.handle(_record())
+        
+        assert handler.queue.qsize() == 1
+        assert metrics.get("log_records_dropped_total") == 1
+
+
+    def test_shutdown_with_full_queue_flushes(self, log_stream):
+        """Test that shutdown waits for the writer when the queue is full."""
+        configure_logging("INFO", 1.0, queue_size=2, stream=log_stream)
+        logger = logging.getLogger("app.services")
+        for i in range(50):
+            logger.warning("burst %d", i)
+        shutdown_logging()
+        
+        assert "burst" in log_stream.getvalue()
+
+
+    def test_records_carry_bound_trace_id(self, log_stream):
+        """Test that logs written under a trace context include trace_id."""
+        from app.tracing import trace_context
+        logger = logging.getLogger("app.services")
+        with trace_context("trace-1"):
+            logger.info("inside")
+        logger.info("outside")
+        shutdown_logging()
+        
+        inside, outside = [json.loads(line) for line in log_stream.getvalue().strip().splitlines()[-2:]]
+        assert inside["trace_id"] == "trace-1"
+        assert "trace_id" not in outside
+
+
+class TestLogSampling:
+    """Test cases for per-request sampling of INFO logs."""
+    
+    def test_sampling_keeps_warnings_and_forced_records(self):
+        """Test that warnings and always=True records pass an unsampled request."""
+        sampler = SamplingFilter(0.1)
+        begin_request(0.0)
+        
+        assert not sampler.filter(_record(logging.INFO))
+        assert sampler.filter(_record(logging.WARNING))
+        assert sampler.filter(_record(logging.INFO, always=True))
+    
+    def test_decision_is_per_request(self):
+        """Test that a request's INFO logs are all kept or all dropped."""
+        import random
+        random.seed(3)
+        sampler = SamplingFilter(0.5)
+        outcomes = []
+        for _ in range(200):
+            begin_request(0.5)
+            kept = {sampler.filter(_record()) for _ in range(5)}
+            assert len(kept) == 1
+            outcomes.append(kept.pop())
+        
+        assert 60 < sum(outcomes) < 140
+    
+    def test_formatter_output_is_one_line(self):
+        """Test that multi-line messages stay on one JSON line."""
+        line = JsonFormatter().format(_record(msg="a\nb", args=()))
+        
+        assert "\n" not in line
+        assert json.loads(line)["message"] == "a\nb"
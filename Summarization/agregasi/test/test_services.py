@@ -218,3 +218,1009 @@ class TestRedisHelpers:
         
         assert result is True
         mock_redis.setex.assert_called_once_with("test_key", 60, "test_value")
+
+
+class TestTimeframes:
+    """Test cases for lookback windows and stitched aggregation."""
+    
+    def test_default_timeframe_uses_native_range(self):
+        """Test that 7d maps to the native pytrends range."""
+        from app.services import timeframe_slices
+        
+        assert timeframe_slices("7d") == ["now 7-d"]
+    
+    def test_long_timeframe_split_into_weekly_slices(self):
+        """Test that 30d/90d are split into hourly slices of at most 7 days."""
+        from datetime import datetime
+        from app.services import timeframe_slices
+        
+        now = datetime(2026, 1, 31, 12, 30)
+        slices = timeframe_slices("30d", now=now)
+        
+        assert len(slices) == 5
+        assert slices[0] == "2026-01-24T12 2026-01-31T12"
+        assert slices[-1] == "2026-01-01T12 2026-01-03T12"
+        assert len(timeframe_slices("90d", now=now)) == 13
+    
+    def test_invalid_timeframe_raises(self):
+        """Test that unsupported timeframes are rejected."""
+        from app.services import timeframe_slices
+        
+        with pytest.raises(ValueError):
+            timeframe_slices("1y")
+    
+    def test_cache_key_per_timeframe(self):
+        """Test that each timeframe gets its own cache key."""
+        from app.services import build_cache_key, build_lock_key
+        
+        assert build_cache_key("skincare") == "trend:skincare"
+        assert build_cache_key("skincare", "30d") == "trend:skincare:30d"
+        assert build_lock_key("skincare", "90d") == "lock:skincare:90d"
+    
+    def test_merged_profiles_match_single_pass(self):
+        """Test that merging binned halves equals binning the whole series."""
+        from app.services import bin_timeline, build_recommendations
+        
+        series = [
+            {"date": f"2026-01-{day:02d}T{hour:02d}:00:00Z", "value": (day * 7 + hour * 3) % 100}
+            for day in range(1, 15) for hour in range(24)
+        ]
+        merged = bin_timeline(series[:150]).merge(bin_timeline(series[150:]))
+        
+        assert build_recommendations(merged) == process_data(series)
+    
+    @patch('app.services.fetch_from_apify')
+    @patch('app.services.fetch_from_pytrends')
+    def test_compute_prediction_stitches_slices(self, mock_pytrends, mock_apify):
+        """Test that long windows fetch every slice and merge the results."""
+        from app.services import compute_prediction, PyTrendsUnavailableException
+        
+        week = [
+            {"date": f"2026-01-{day:02d}T{hour:02d}:00:00Z", "value": hour * 4}
+            for day in range(5, 12) for hour in range(24)
+        ]
+        mock_pytrends.side_effect = [
+            (week, {"duration_ms": 100, "compute_units": 0.0, "source": "pytrends"}),
+            PyTrendsUnavailableException("429"),
+        ] + [(week, {"duration_ms": 100, "compute_units": 0.0, "source": "pytrends"})] * 3
+        mock_apify.return_value = (week, {"duration_ms": 2000, "compute_units": 0.2})
+        fallback_calls = []
+        
+        processed, source, stats, profile = compute_prediction(
+            "skincare", "30d", on_apify_fallback=lambda: fallback_calls.append(1)
+        )
+        
+        assert mock_pytrends.call_count == 5
+        assert mock_apify.call_count == 1
+        assert fallback_calls == [1]
+        assert source == "apify"
+        assert stats["slices"] == 5
+        assert stats["duration_ms"] == 2400
+        assert stats["compute_units"] == pytest.approx(0.2)
+        assert processed == process_data(week)
+
+
+class TestIncrementalRefresh:
+    """Test cases for incremental profile refresh."""
+    
+    @staticmethod
+    def _series(start_hour, hours, scale=1.0):
+        from datetime import datetime, timedelta
+        base = datetime(2026, 1, 1)
+        return [
+            {
+                "date": (base + timedelta(hours=h)).isoformat() + "Z",
+                "value": round(((h % 24) * 4 + 5) * scale, 4)
+            }
+            for h in range(start_hour, start_hour + hours)
+        ]
+    
+    def test_profile_round_trip(self):
+        """Test that profiles survive JSON serialization."""
+        import json
+        from app.services import bin_timeline, TrendProfile
+        
+        profile = bin_timeline(self._series(0, 168))
+        restored = TrendProfile.from_dict(json.loads(json.dumps(profile.to_dict())))
+        
+        assert restored.total_points == 168
+        assert restored.last_ts == profile.last_ts
+        assert restored.tail == profile.tail
+        assert len(restored.tail) == 24
+    
+    def test_from_dict_rejects_bad_shape(self):
+        """Test that malformed stored profiles are rejected."""
+        from app.services import TrendProfile
+        
+        with pytest.raises(ValueError):
+            TrendProfile.from_dict({"sums": [[0]], "counts": [[0]]})
+    
+    @patch('app.services.fetch_from_pytrends')
+    def test_refresh_bins_only_new_rescaled_points(self, mock_pytrends):
+        """Test that a delta fetch adds only new hours, rescaled to the stored tail."""
+        from app.services import bin_timeline, refresh_profile
+        
+        stored = bin_timeline(self._series(0, 168))
+        expected = bin_timeline(self._series(0, 174))
+        # Delta overlaps the last 24 stored hours and is reported at half scale
+        mock_pytrends.return_value = (self._series(144, 30, scale=0.5), {"duration_ms": 50, "compute_units": 0.0})
+        
+        profile, source, stats = refresh_profile("skincare", stored)
+        
+        assert source == "pytrends"
+        assert stats["incremental"] is True
+        assert stats["new_points"] == 6
+        assert stats["scale"] == pytest.approx(2.0)
+        assert profile.total_points == 174
+        assert profile.sums == pytest.approx(expected.sums)
+        assert profile.last_ts == expected.last_ts
+    
+    def test_can_refresh_incrementally_limits(self):
+        """Test that stale or over-long profiles require a full fetch."""
+        from app.services import bin_timeline, can_refresh_incrementally, TrendProfile
+        
+        profile = bin_timeline(self._series(0, 168))
+        recent = profile.last_ts + 3600
+        
+        assert can_refresh_incrementally(profile, "7d", now=recent)
+        # Spans more than 1.5x the window
+        assert not can_refresh_incrementally(profile, "7d", now=profile.first_ts + 11 * 86400)
+        # Newest point too old for a single delta range
+        assert not can_refresh_incrementally(profile, "30d", now=profile.last_ts + 7 * 86400)
+        assert not can_refresh_incrementally(TrendProfile(), "7d", now=recent)
+    
+    @patch('app.services.fetch_from_pytrends')
+    def test_compute_prediction_falls_back_to_full_fetch(self, mock_pytrends):
+        """Test that a failed delta fetch triggers a full fetch."""
+        from app.services import bin_timeline, compute_prediction, DataValidationException
+        
+        stored = bin_timeline(self._series(0, 168))
+        full = self._series(6, 168)
+        mock_pytrends.side_effect = [
+            ([{"date": "invalid", "value": 1}], {"duration_ms": 1}),
+            (full, {"duration_ms": 10, "compute_units": 0.0}),
+        ]
+        
+        with patch('app.services.time.time', return_value=stored.last_ts + 3600):
+            processed, source, stats, profile = compute_prediction("skincare", "7d", stored)
+        
+        assert mock_pytrends.call_count == 2
+        assert "incremental" not in stats
+        assert processed == process_data(full)
+
+
+class TestNegativeCache:
+    """Test cases for negative caching of keywords without trend data."""
+    
+    @pytest.fixture
+    def fake_redis(self):
+        import fakeredis
+        from app.metrics import metrics
+        from app.services import _empty_filter
+        
+        server = fakeredis.FakeRedis(decode_responses=True)
+        metrics.reset()
+        _empty_filter.clear()
+        with patch('app.services.redis_client', server):
+            yield server
+        _empty_filter.clear()
+    
+    def test_bloom_filter_membership(self):
+        """Test that added items are always reported and the filter resets when full."""
+        from app.services import BloomFilter
+        
+        bloom = BloomFilter(capacity=100, error_rate=0.01)
+        items = [f"empty:kw{i}" for i in range(100)]
+        for item in items:
+            bloom.add(item)
+        
+        assert all(item in bloom for item in items)
+        false_positives = sum(f"other:{i}" in bloom for i in range(1000))
+        assert false_positives < 50
+        
+        bloom.add("empty:overflow")
+        assert bloom.count == 1
+        assert "empty:overflow" in bloom
+    
+    @patch('app.services.fetch_from_apify')
+    @patch('app.services.fetch_from_pytrends')
+    def test_empty_keyword_fetched_once(self, mock_pytrends, mock_apify, fake_redis):
+        """Test that a keyword with no data is answered from the negative cache."""
+        from fastapi import BackgroundTasks
+        from app.metrics import metrics
+        from app.services import get_prediction_swr, PyTrendsUnavailableException
+        
+        mock_pytrends.side_effect = PyTrendsUnavailableException("down")
+        mock_apify.side_effect = DataNotFoundException("empty", compute_units=0.4)
+        
+        for _ in range(3):
+            with pytest.raises(DataNotFoundException):
+                get_prediction_swr("asdfqwerzxcv", BackgroundTasks())
+        
+        assert mock_apify.call_count == 1
+        assert fake_redis.ttl("empty:asdfqwerzxcv") > 0
+        assert fake_redis.get("lock:asdfqwerzxcv") is None
+        assert metrics.get("negative_cache_hits_total") == 2
+        assert metrics.get("negative_cache_compute_units_saved_total") == pytest.approx(0.8)
+    
+    def test_other_worker_entry_checked_under_lock(self, fake_redis):
+        """Test that an entry written by another worker is honoured despite an empty local filter."""
+        import json
+        from fastapi import BackgroundTasks
+        from app.services import get_prediction_swr
+        
+        fake_redis.set("empty:asdfqwerzxcv", json.dumps({"compute_units": 0.4, "duration_ms": 9000}))
+        
+        with patch('app.services.compute_prediction') as mock_compute:
+            with pytest.raises(DataNotFoundException):
+                get_prediction_swr("asdfqwerzxcv", BackgroundTasks())
+        
+        mock_compute.assert_not_called()
+        assert fake_redis.get("lock:asdfqwerzxcv") is None
+    
+    def test_fill_with_data_invalidates_entry(self, fake_redis):
+        """Test that a later successful fill removes the negative entry."""
+        import json
+        from app.metrics import metrics
+        from app.services import update_cache_background
+        
+        fake_redis.set("empty:skincare", json.dumps({"compute_units": 0.4}))
+        timeline = TestIncrementalRefresh._series(0, 168)
+        
+        with patch('app.services.fetch_from_pytrends', return_value=(timeline, {"duration_ms": 10})):
+            update_cache_background("skincare")
+        
+        assert fake_redis.get("empty:skincare") is None
+        assert fake_redis.get("trend:skincare") is not None
+        assert metrics.get("negative_cache_invalidations_total") == 1
+
+
+class TestGeoAndTimezone:
+    """Test cases for geo-scoped fetching and per-timezone binning."""
+    
+    @staticmethod
+    def _series(days=7):
+        return [
+            {"date": f"2026-01-{day:02d}T{hour:02d}:00:00Z", "value": (day * 11 + hour * 5) % 100}
+            for day in range(5, 5 + days) for hour in range(24)
+        ]
+    
+    @staticmethod
+    def _reference(series, tz):
+        """Bin by converting every point to tz (the per-point path localized() replaces)."""
+        from app.services import TrendProfile, build_recommendations
+        
+        df = pd.DataFrame(series)
+        dates = pd.to_datetime(df['date']).dt.tz_convert(tz)
+        local = TrendProfile()
+        local.add_points(dates.dt.dayofweek.to_numpy(), dates.dt.hour.to_numpy(), df['value'].to_numpy(dtype=float))
+        # Already local - report as UTC so no further shift is applied
+        return build_recommendations(local, "UTC")
+    
+    def test_resolve_locale_defaults_and_validation(self):
+        """Test that tz defaults to the geo's timezone and unknown values are rejected."""
+        from app.services import resolve_locale
+        
+        assert resolve_locale() == ("ID", "Asia/Jakarta")
+        assert resolve_locale("my") == ("MY", "Asia/Kuala_Lumpur")
+        assert resolve_locale("PH", "Asia/Manila") == ("PH", "Asia/Manila")
+        with pytest.raises(ValueError):
+            resolve_locale("XX")
+        with pytest.raises(ValueError):
+            resolve_locale("ID", "Mars/Olympus")
+    
+    def test_keys_scoped_by_geo_and_timezone(self):
+        """Test that geo partitions every key and tz only the per-timezone ones."""
+        from app.services import build_cache_key, build_lock_key, build_profile_key
+        
+        assert build_cache_key("skincare", "7d", "ID", "Asia/Jakarta") == "trend:skincare"
+        assert build_cache_key("skincare", "7d", "MY", "Asia/Kuala_Lumpur") == "trend:skincare:MY"
+        assert build_cache_key("skincare", "30d", "ID", "Asia/Manila") == "trend:skincare:30d:Asia/Manila"
+        assert build_lock_key("skincare", "7d", "PH") == "lock:skincare:PH"
+        assert build_profile_key("skincare", "7d", "PH") == "profile:skincare:PH"
+    
+    @pytest.mark.parametrize("tz", ["Asia/Jakarta", "Asia/Manila", "Asia/Kolkata", "America/St_Johns", "UTC"])
+    def test_localized_matches_per_point_conversion(self, tz):
+        """Test that re-binning the UTC profile equals converting each point."""
+        from app.services import bin_timeline, build_recommendations
+        
+        series = self._series()
+        
+        assert build_recommendations(bin_timeline(series), tz) == self._reference(series, tz)
+    
+    def test_pytrends_uses_geo_in_utc(self):
+        """Test that the requested geo reaches pytrends and the series is fetched in UTC."""
+        from app.services import fetch_from_pytrends
+        
+        index = pd.date_range("2026-01-05", periods=24, freq="h")
+        with patch('app.services.TrendReq') as mock_trendreq:
+            mock_trendreq.return_value.interest_over_time.return_value = pd.DataFrame({"skincare": range(24)}, index=index)
+            fetch_from_pytrends("skincare", "now 7-d", "MY")
+        
+        assert mock_trendreq.call_args.kwargs["tz"] == 0
+        assert mock_trendreq.return_value.build_payload.call_args.kwargs["geo"] == "MY"
+    
+    @patch('app.services.fetch_from_pytrends')
+    def test_other_timezone_reuses_fetched_series(self, mock_pytrends):
+        """Test that a second timezone of the same geo is re-binned without refetching."""
+        import fakeredis
+        from fastapi import BackgroundTasks
+        from app.services import get_prediction_swr
+        
+        series = self._series()
+        mock_pytrends.return_value = (series, {"duration_ms": 10, "compute_units": 0.0})
+        
+        with patch('app.services.redis_client', fakeredis.FakeRedis(decode_responses=True)) as fake:
+            jakarta, source_first, _ = get_prediction_swr("skincare", BackgroundTasks())
+            manila, source_second, _ = get_prediction_swr("skincare", BackgroundTasks(), tz="Asia/Manila")
+            
+            assert fake.get("trend:skincare:Asia/Manila") is not None
+        
+        assert mock_pytrends.call_count == 1
+        assert source_first == "pytrends"
+        assert source_second == "cache_fresh"
+        assert jakarta == self._reference(series, "Asia/Jakarta")
+        assert manila == self._reference(series, "Asia/Manila")
+    
+    @patch('app.services.fetch_from_pytrends')
+    def test_rebinned_entry_keeps_stored_fence(self, mock_pytrends):
+        """Test that re-binning over a fenced entry keeps its fence."""
+        import json
+        import fakeredis
+        from fastapi import BackgroundTasks
+        from app.services import get_prediction, get_prediction_swr, redis_set_fenced_with_retry
+        
+        mock_pytrends.return_value = (self._series(), {"duration_ms": 10, "compute_units": 0.0})
+        
+        with patch('app.services.redis_client', fakeredis.FakeRedis(decode_responses=True)) as fake:
+            get_prediction_swr("skincare", BackgroundTasks())
+            redis_set_fenced_with_retry("trend:skincare:Asia/Manila", {"timestamp": 0, "data": {}}, 3, ex=60)
+            manila, source, _ = get_prediction("skincare", tz="Asia/Manila")
+            
+            stored = json.loads(fake.get("trend:skincare:Asia/Manila"))
+        
+        assert mock_pytrends.call_count == 1 and source == "cache"
+        assert stored["data"] == manila and stored["fence"] == 3
+    
+    @patch('app.services.fetch_from_pytrends')
+    def test_other_geo_fetches_separately(self, mock_pytrends):
+        """Test that a different geo does not reuse another geo's data."""
+        import fakeredis
+        from fastapi import BackgroundTasks
+        from app.services import get_prediction_swr
+        
+        mock_pytrends.return_value = (self._series(), {"duration_ms": 10, "compute_units": 0.0})
+        
+        with patch('app.services.redis_client', fakeredis.FakeRedis(decode_responses=True)):
+            get_prediction_swr("skincare", BackgroundTasks())
+            get_prediction_swr("skincare", BackgroundTasks(), geo="MY")
+        
+        assert mock_pytrends.call_count == 2
+        assert mock_pytrends.call_args.args[2] == "MY"
+
+
+class TestAdmissionControl:
+    """Test cases for the upstream fetch concurrency limiter."""
+    
+    def test_bounded_concurrency_and_queue(self):
+        """Test that fetches beyond slots + queue are shed immediately."""
+        import threading
+        from app.metrics import metrics
+        from app.services import FetchAdmission, UpstreamOverloadedException
+        
+        admission = FetchAdmission(max_concurrent=1, max_queue=1)
+        release = threading.Event()
+        peak = []
+        
+        def fetch():
+            with admission.slot(timeout=5):
+                peak.append(admission.active)
+                release.wait(5)
+        
+        holder = threading.Thread(target=fetch)
+        holder.start()
+        while admission.active < 1:
+            time.sleep(0.01)
+        queued = threading.Thread(target=fetch)
+        queued.start()
+        while admission.waiting < 1:
+            time.sleep(0.01)
+        
+        assert metrics.get("upstream_fetch_queue_depth") == 1
+        with pytest.raises(UpstreamOverloadedException):
+            admission.acquire(timeout=5)
+        
+        release.set()
+        holder.join()
+        queued.join()
+        assert max(peak) == 1
+        assert admission.active == 0 and admission.waiting == 0
+    
+    def test_queued_fetch_shed_after_timeout(self):
+        """Test that a queued fetch gives up once its wait exceeds the timeout."""
+        from app.services import FetchAdmission, UpstreamOverloadedException
+        
+        admission = FetchAdmission(max_concurrent=1, max_queue=4)
+        admission.acquire()
+        
+        with pytest.raises(UpstreamOverloadedException):
+            admission.acquire(timeout=0.05)
+        
+        assert admission.waiting == 0
+        admission.release()
+        admission.acquire(timeout=0.05)
+        assert admission.active == 1
+    
+    def test_async_waiter_gets_slot_without_a_thread(self):
+        """Test that acquire_async waits on the event loop and is woken by a release from any thread."""
+        import asyncio
+        import threading
+        from app.services import FetchAdmission
+        
+        admission = FetchAdmission(max_concurrent=1, max_queue=0)
+        admission.acquire()
+        
+        async def wait_for_slot():
+            waiter = asyncio.ensure_future(admission.acquire_async())
+            await asyncio.sleep(0.05)
+            queued = (waiter.done(), admission.waiting, threading.active_count())
+            threading.Thread(target=admission.release).start()
+            await asyncio.wait_for(waiter, 2)
+            return queued
+        
+        threads = threading.active_count()
+        assert asyncio.run(wait_for_slot()) == (False, 1, threads)
+        assert admission.active == 1 and admission.waiting == 0
+    
+    def test_cancelled_async_waiter_passes_slot_on(self):
+        """Test that a waiter cancelled after its wakeup hands the free slot to the next one."""
+        import asyncio
+        from app.services import FetchAdmission
+        
+        admission = FetchAdmission(max_concurrent=1, max_queue=0)
+        admission.acquire()
+        
+        async def cancel_first():
+            first = asyncio.ensure_future(admission.acquire_async())
+            second = asyncio.ensure_future(admission.acquire_async())
+            await asyncio.sleep(0.01)
+            admission.release()
+            first.cancel()
+            await asyncio.wait_for(second, 2)
+            return first.cancelled()
+        
+        assert asyncio.run(cancel_first())
+        assert admission.active == 1 and admission.waiting == 0
+    
+    def test_swr_miss_releases_lock_when_shed(self):
+        """Test that a shed miss does not fetch and frees the keyword lock."""
+        import fakeredis
+        from fastapi import BackgroundTasks
+        from app.services import get_prediction_swr, FetchAdmission, UpstreamOverloadedException
+        
+        full = FetchAdmission(max_concurrent=0, max_queue=0)
+        with patch('app.services.redis_client', fakeredis.FakeRedis(decode_responses=True)) as fake, \
+             patch('app.services.upstream_admission', full), \
+             patch('app.services.compute_prediction') as mock_compute:
+            with pytest.raises(UpstreamOverloadedException):
+                get_prediction_swr("skincare", BackgroundTasks())
+            
+            assert fake.get("lock:skincare") is None
+        
+        mock_compute.assert_not_called()
+
+
+class TestEarlyRefresh:
+    """Test cases for probabilistic early expiration (XFetch)."""
+    
+    def test_xfetch_due_depends_on_remaining_time_and_delta(self):
+        """Test that refresh becomes likely only close to expiry, earlier for slow fetches."""
+        from app.services import xfetch_due, CACHE_FRESH_SECONDS
+        
+        now = 1_000_000.0
+        fresh = now - 3600
+        near = now - (CACHE_FRESH_SECONDS - 10)
+        
+        assert not xfetch_due(fresh, 15.0, now=now, beta=1.0, rand=0.5)
+        assert xfetch_due(near, 15.0, now=now, beta=1.0, rand=0.5)
+        # 10s left: a 2s fetch is not due yet at the same draw, a 60s fetch is
+        assert not xfetch_due(near, 2.0, now=now, beta=1.0, rand=0.5)
+        assert xfetch_due(now - (CACHE_FRESH_SECONDS - 30), 60.0, now=now, beta=1.0, rand=0.5)
+        
+        with patch('app.services.settings.XFETCH_ENABLED', False):
+            assert not xfetch_due(near, 15.0, now=now, rand=0.5)
+    
+    def test_xfetch_refresh_probability(self):
+        """Test that a read with `delta` seconds left refreshes with probability ~1/e."""
+        import math
+        import random
+        from app.services import xfetch_due, CACHE_FRESH_SECONDS
+        
+        random.seed(42)
+        now = 1_000_000.0
+        written_at = now - (CACHE_FRESH_SECONDS - 20)
+        hits = sum(xfetch_due(written_at, 20.0, now=now, beta=1.0) for _ in range(20000))
+        
+        assert abs(hits / 20000 - math.exp(-1)) < 0.02
+    
+    def test_fresh_hit_near_expiry_schedules_single_refresh(self):
+        """Test that concurrent early picks collapse into one locked background refresh."""
+        import json
+        import fakeredis
+        from fastapi import BackgroundTasks
+        from app.metrics import metrics
+        from app.services import get_prediction_swr, update_cache_background, CACHE_FRESH_SECONDS
+        
+        metrics.reset()
+        fake = fakeredis.FakeRedis(decode_responses=True)
+        entry = {"timestamp": time.time() - CACHE_FRESH_SECONDS + 5, "data": {"x": 1}, "stats": None, "delta": 12.0}
+        fake.set("trend:skincare", json.dumps(entry))
+        
+        with patch('app.services.redis_client', fake), \
+             patch('app.services.check_rate_limits'), \
+             patch('app.services.xfetch_due', return_value=True):
+            first, second = BackgroundTasks(), BackgroundTasks()
+            data, source, _ = get_prediction_swr("skincare", first)
+            get_prediction_swr("skincare", second)
+            
+            assert data == {"x": 1} and source == "cache_fresh"
+            assert [t.func for t in first.tasks] == [update_cache_background]
+            assert second.tasks == []
+            lock = first.tasks[0].kwargs["lock"]
+            assert fake.get("lock:skincare") == lock.token
+            lock.release()
+        
+        assert metrics.get("cache_early_refresh_total", outcome="scheduled") == 1
+        assert metrics.get("cache_early_refresh_total", outcome="in_progress") == 1
+    
+    def test_serialized_hit_schedules_refresh_and_records_delta(self):
+        """Test that the fast path reads the stored fetch duration and can refresh early."""
+        import fakeredis
+        from fastapi import BackgroundTasks
+        from app.services import cache_response_body, get_cached_response_body
+        
+        with patch('app.services.redis_client', fakeredis.FakeRedis(decode_responses=True)), \
+             patch('app.services.xfetch_due', return_value=True) as mock_due:
+            cache_response_body("skincare", "7d", {"recommendations": []}, None, ttl=30, delta=12.5)
+            tasks = BackgroundTasks()
+            body = get_cached_response_body("Skincare", "7d", background_tasks=tasks)
+        
+        assert b'"keyword":"Skincare"' in body
+        written_at, delta = mock_due.call_args[0]
+        assert delta == 12.5
+        assert abs(written_at - (time.time() - 86400 + 30)) < 5
+        assert len(tasks.tasks) == 1
+    
+    def test_background_refresh_releases_lock_and_stores_delta(self):
+        """Test that the early refresh frees the lock and records its fetch duration."""
+        import json
+        import fakeredis
+        from app.services import update_cache_background, FetchLock, TrendProfile
+        
+        fake = fakeredis.FakeRedis(decode_responses=True)
+        with patch('app.services.redis_client', fake), \
+             patch('app.services.compute_prediction',
+                   return_value=({"recommendations": []}, "pytrends", None, TrendProfile())):
+            lock = FetchLock("lock:skincare")
+            assert lock.acquire()
+            update_cache_background("skincare", lock=lock)
+        
+        assert fake.get("lock:skincare") is None
+        assert "delta" in json.loads(fake.get("trend:skincare"))
+
+
+class TestFetchLock:
+    """Test cases for the renewable, fenced fetch lock."""
+    
+    @pytest.fixture
+    def fake_redis(self):
+        import fakeredis
+        from app.metrics import metrics
+        
+        server = fakeredis.FakeRedis(decode_responses=True)
+        metrics.reset()
+        with patch('app.services.redis_client', server):
+            yield server
+    
+    def test_release_only_deletes_own_lock(self, fake_redis):
+        """Test that a holder whose lock expired does not delete the next holder's lock."""
+        from app.services import FetchLock
+        
+        first = FetchLock("lock:skincare", renew_interval=60)
+        assert first.acquire()
+        fake_redis.delete("lock:skincare")  # expired mid-fetch
+        second = FetchLock("lock:skincare", renew_interval=60)
+        assert second.acquire()
+        
+        assert second.fence > first.fence
+        assert not first.release()
+        assert fake_redis.get("lock:skincare") == second.token
+        assert second.release()
+        assert fake_redis.get("lock:skincare") is None
+    
+    def test_renewal_keeps_lock_past_ttl(self, fake_redis):
+        """Test that background renewal holds the lock for longer than its TTL."""
+        from app.services import FetchLock
+        
+        lock = FetchLock("lock:skincare", ttl=1, renew_interval=0.2)
+        assert lock.acquire()
+        assert not FetchLock("lock:skincare").acquire()
+        
+        time.sleep(1.5)
+        
+        assert lock.held
+        assert fake_redis.get("lock:skincare") == lock.token
+        lock.release()
+    
+    def test_lost_lock_detected_by_renewal(self, fake_redis):
+        """Test that renewal stops and reports when the lock changed owner."""
+        from app.metrics import metrics
+        from app.services import FetchLock
+        
+        lock = FetchLock("lock:skincare", renew_interval=0.05)
+        assert lock.acquire()
+        fake_redis.set("lock:skincare", "99:someone-else")
+        
+        deadline = time.time() + 2
+        while lock.held and time.time() < deadline:
+            time.sleep(0.02)
+        
+        assert not lock.held
+        assert metrics.get("fetch_lock_lost_total") == 1
+        assert not lock.release()
+        assert fake_redis.get("lock:skincare") == "99:someone-else"
+    
+    def test_stale_holder_cannot_overwrite_newer_entry(self, fake_redis):
+        """Test that writes fenced with an older token are rejected."""
+        import json
+        from app.metrics import metrics
+        from app.services import redis_set_fenced_with_retry
+        
+        assert redis_set_fenced_with_retry("trend:skincare", {"data": "new"}, 7, ex=60)
+        assert not redis_set_fenced_with_retry("trend:skincare", {"data": "old"}, 6, ex=60)
+        assert redis_set_fenced_with_retry("trend:skincare", {"data": "newer"}, 8, ex=60)
+        
+        stored = json.loads(fake_redis.get("trend:skincare"))
+        assert stored == {"data": "newer", "fence": 8}
+        assert metrics.get("fenced_writes_rejected_total") == 1
+    
+    def test_unlocked_writes_keep_stored_fence(self, fake_redis):
+        """Test that job and re-bin cache writes do not let a stale holder overwrite them."""
+        import json
+        from app.services import get_prediction, redis_set_fenced_with_retry, save_profile, TrendProfile
+        
+        assert redis_set_fenced_with_retry("trend:skincare", {"timestamp": 0, "data": "locked"}, 7, ex=60)
+        save_profile("skincare", TrendProfile(), fence=7)
+        with patch('app.services.compute_prediction',
+                   return_value=({"recommendations": []}, "pytrends", None, TrendProfile())):
+            get_prediction("skincare")
+        
+        assert json.loads(fake_redis.get("trend:skincare"))["fence"] == 7
+        assert json.loads(fake_redis.get("profile:skincare"))["fence"] == 7
+        assert not redis_set_fenced_with_retry("trend:skincare", {"data": "stale"}, 6, ex=60)
+        assert redis_set_fenced_with_retry("trend:skincare", {"data": "next"}, 8, ex=60)
+    
+    def test_swr_fill_uses_fence_and_releases(self, fake_redis):
+        """Test that the lock holder stores its fence with the entry and frees the lock."""
+        import json
+        from fastapi import BackgroundTasks
+        from app.services import get_prediction_swr, TrendProfile
+        
+        with patch('app.services.check_rate_limits'), \
+             patch('app.services.compute_prediction',
+                   return_value=({"recommendations": []}, "pytrends", None, TrendProfile())):
+            get_prediction_swr("skincare", BackgroundTasks())
+        
+        assert json.loads(fake_redis.get("trend:skincare"))["fence"] == int(fake_redis.get("lock:skincare:fence"))
+        assert fake_redis.get("lock:skincare") is None
+        assert fake_redis.ttl("lock:skincare:fence") > 88200
+    
+    def test_fence_counter_outlives_fenced_profiles(self, fake_redis):
+        """Test that an idle keyword's counter does not reset below its stored profile's fence."""
+        from app.services import FetchLock, TrendProfile, build_lock_key, build_profile_key, save_profile
+    
+        lock = FetchLock(build_lock_key("skincare", "90d"), renew_interval=60)
+        assert lock.acquire()
+        save_profile("skincare", TrendProfile(), "90d", fence=lock.fence)
+        lock.release()
+    
+        assert fake_redis.ttl(f"{lock.key}:fence") >= fake_redis.ttl(build_profile_key("skincare", "90d"))
+
+
+class TestClusterAndReplicas:
+    """Test cases for Redis Cluster key layout and replica read routing."""
+    
+    def test_keyword_keys_share_a_slot_in_cluster_mode(self):
+        """Test that trend, lock, fence and job keys of a keyword hash to one slot."""
+        from redis.crc import key_slot
+        from app.jobs import JobManager
+        from app.services import build_cache_key, build_lock_key, build_response_key, FetchLock
+        
+        with patch('app.services.settings.REDIS_CLUSTER_ENABLED', True), \
+             patch('app.jobs.settings.REDIS_CLUSTER_ENABLED', True), \
+             patch('app.jobs.redis_client'):
+            job_id = JobManager.create_job("Skin Care", "30d", "PH")
+            keys = [
+                build_cache_key("skin_care", "30d", "PH"),
+                build_response_key("skin_care", "30d", "PH", "Asia/Manila"),
+                build_lock_key("skin_care", "30d", "PH"),
+                f"{FetchLock(build_lock_key('skin_care')).key}:fence",
+                JobManager.job_key(job_id),
+            ]
+        
+        assert keys[0] == "trend:{skin_care}:30d:PH"
+        assert job_id.startswith("skin_care.")
+        assert len({key_slot(k.encode()) for k in keys}) == 1
+    
+    def test_single_node_job_ids_unchanged(self):
+        """Test that job ids and keys keep the plain uuid form outside cluster mode."""
+        from app.jobs import JobManager
+        
+        assert JobManager.job_key("0b9f-uuid") == "job:0b9f-uuid"
+    
+    def test_rate_limit_pipeline_not_transactional_in_cluster(self):
+        """Test that the cross-slot rate limit pipeline does not use MULTI in cluster mode."""
+        from app.services import redis_rate_limit_with_retry
+        
+        with patch('app.services.settings.REDIS_CLUSTER_ENABLED', True), \
+             patch('app.services.redis_client') as mock_client:
+            redis_rate_limit_with_retry("usage:global:2026-01-01", None, 60)
+        
+        mock_client.pipeline.assert_called_once_with(transaction=False)
+    
+    @pytest.mark.parametrize("info,expected_lag,routed", [
+        ({"role": "slave", "master_link_status": "up", "master_last_io_seconds_ago": 2}, 2, True),
+        ({"role": "slave", "master_link_status": "up", "master_last_io_seconds_ago": 30}, 30, False),
+        ({"role": "slave", "master_link_status": "down", "master_last_io_seconds_ago": 1}, -1, False),
+    ])
+    def test_replica_router_enforces_lag_bound(self, info, expected_lag, routed):
+        """Test that replicas are used only while their lag is within the bound."""
+        from app.metrics import metrics
+        from app.services import ReplicaRouter
+        
+        replica = Mock()
+        replica.info.return_value = info
+        router = ReplicaRouter(lambda: replica, max_lag=10, check_interval=60)
+        
+        assert (router.client() is replica) == routed
+        assert metrics.get("redis_replica_lag_seconds") == expected_lag
+    
+    def test_replica_read_falls_back_to_primary(self, mock_redis):
+        """Test that a failing replica read is retried on the primary and pauses replica reads."""
+        from redis import ConnectionError as RedisConnectionError
+        from app.services import redis_get_with_retry, ReplicaRouter
+        
+        replica = Mock()
+        replica.info.return_value = {"role": "slave", "master_link_status": "up", "master_last_io_seconds_ago": 0}
+        replica.get.side_effect = RedisConnectionError("replica down")
+        mock_redis.get.return_value = "primary-value"
+        router = ReplicaRouter(lambda: replica, max_lag=10, check_interval=60)
+        
+        with patch('app.services.settings.REDIS_READ_FROM_REPLICAS', True), \
+             patch('app.services.replica_router', router):
+            assert redis_get_with_retry("trend:skincare", replica_ok=True) == "primary-value"
+            assert router.client() is None
+            # Writes-related reads never touch the replica
+            redis_get_with_retry("lock:skincare")
+        
+        assert replica.get.call_count == 1
+
+
+class TestApifyRunRegistry:
+    """Test cases for sharing Apify runs and datasets across callers."""
+    
+    @pytest.fixture
+    def fake_redis(self):
+        import fakeredis
+        from app.metrics import metrics
+        
+        server = fakeredis.FakeRedis(decode_responses=True)
+        metrics.reset()
+        with patch('app.services.redis_client', server):
+            yield server
+    
+    @staticmethod
+    def _apify(status="SUCCEEDED", delay=0.0):
+        """Mock Apify client whose runs finish with `status` after `delay` seconds."""
+        from unittest.mock import MagicMock
+        
+        client = MagicMock()
+        started = []
+        
+        def start(**kwargs):
+            started.append(kwargs)
+            run_id = f"run{len(started)}"
+            return {"id": run_id, "defaultDatasetId": f"ds-{run_id}", "status": "READY"}
+        
+        def run(run_id):
+            run_client = MagicMock()
+            
+            def wait_for_finish(wait_secs=None):
+                time.sleep(delay)
+                return {
+                    "id": run_id,
+                    "defaultDatasetId": f"ds-{run_id}",
+                    "status": status,
+                    "stats": {"computeUnits": 0.4, "durationMillis": 900}
+                }
+            run_client.wait_for_finish.side_effect = wait_for_finish
+            return run_client
+        
+        client.actor.return_value.start.side_effect = start
+        client.run.side_effect = run
+        client.dataset.return_value.iterate_items.return_value = [
+            {"interestOverTime_timelineData": [{"time": "1704067200", "value": [50]}]}
+        ]
+        return client, started
+    
+    def test_recent_dataset_is_reused(self, fake_redis):
+        """Test that a second fetch reads the first run's dataset instead of starting a run."""
+        from app.metrics import metrics
+        from app.services import fetch_from_apify
+        
+        client, started = self._apify()
+        with patch('app.services.apify_client', client):
+            first_data, first_stats = fetch_from_apify("skincare")
+            second_data, second_stats = fetch_from_apify("SkinCare")
+        
+        assert len(started) == 1
+        assert first_data == second_data
+        assert first_stats["compute_units"] == 0.4
+        assert second_stats["compute_units"] == 0.0
+        assert second_stats["shared_run_id"] == "run1"
+        assert metrics.get("apify_runs_total", outcome="reused_dataset") == 1
+        assert metrics.get("apify_compute_units_saved_total") == 0.4
+    
+    def test_in_flight_run_is_joined(self, fake_redis):
+        """Test that a fetch waits on a registered running run."""
+        import json
+        from app.metrics import metrics
+        from app.services import fetch_from_apify, build_apify_run_key
+        
+        fake_redis.set(
+            build_apify_run_key("skincare", "now 7-d", "ID"),
+            json.dumps({"run_id": "run-other", "dataset_id": "ds-other", "status": "RUNNING", "started_at": time.time()})
+        )
+        client, started = self._apify()
+        with patch('app.services.apify_client', client):
+            _, stats = fetch_from_apify("skincare")
+        
+        assert started == []
+        client.run.assert_called_once_with("run-other")
+        assert stats["shared_run_id"] == "run-other"
+        assert metrics.get("apify_runs_total", outcome="joined") == 1
+    
+    def test_concurrent_misses_start_one_run(self, fake_redis):
+        """Test that simultaneous fetches of the same slice share one actor run."""
+        import threading
+        from app.services import fetch_from_apify
+        
+        client, started = self._apify(delay=1.0)
+        results = []
+        with patch('app.services.apify_client', client):
+            threads = [threading.Thread(target=lambda: results.append(fetch_from_apify("skincare"))) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        assert len(started) == 1
+        assert len(results) == 3
+        assert sum(stats["compute_units"] for _, stats in results) == 0.4
+    
+    def test_failed_run_is_not_reused(self, fake_redis):
+        """Test that unsuccessful runs are dropped from the registry."""
+        from app.services import fetch_from_apify, build_apify_run_key
+        
+        client, started = self._apify(status="FAILED")
+        with patch('app.services.apify_client', client):
+            fetch_from_apify("skincare")
+            fetch_from_apify("skincare")
+        
+        assert len(started) == 2
+        assert fake_redis.get(build_apify_run_key("skincare", "now 7-d", "ID")) is None
+    
+    def test_stuck_starting_marker_is_taken_over(self, fake_redis):
+        """Test that a caller stops waiting for a run that never got started."""
+        import json
+        from app.services import fetch_from_apify, build_apify_run_key, APIFY_STARTING
+        
+        fake_redis.set(
+            build_apify_run_key("skincare", "now 7-d", "ID"),
+            json.dumps({"status": APIFY_STARTING, "started_at": time.time()})
+        )
+        client, started = self._apify()
+        with patch('app.services.apify_client', client), \
+             patch('app.services.settings.APIFY_JOIN_START_TIMEOUT', 0.0):
+            fetch_from_apify("skincare")
+        
+        assert len(started) == 1
+
+
+class TestSourceSelection:
+    """Test cases for cost-aware ordering of pytrends and Apify."""
+    
+    @pytest.fixture
+    def fake_redis(self):
+        import fakeredis
+        from app.metrics import metrics
+        
+        server = fakeredis.FakeRedis(decode_responses=True)
+        metrics.reset()
+        with patch('app.services.redis_client', server), \
+             patch('app.services.source_selector.explore_rate', 0.0):
+            yield server
+    
+    def test_default_plan_tries_pytrends_first(self, fake_redis):
+        """Test that the priors favour the free source with Apify as fallback."""
+        from app.metrics import metrics
+        from app.services import source_selector
+        
+        assert source_selector.plan() == ("pytrends", "apify")
+        assert metrics.get("source_plan_total", plan="pytrends,apify", tier="all") == 1
+    
+    def test_failing_pytrends_switches_to_apify_direct(self, fake_redis):
+        """Test that repeated slow pytrends failures make Apify the first choice."""
+        from app.metrics import metrics
+        from app.services import source_selector
+        
+        for _ in range(10):
+            source_selector.record("pytrends", "all", False, 60000)
+        
+        assert source_selector.plan() == ("apify",)
+        assert source_selector.plan("new") == ("pytrends", "apify")
+        assert metrics.get("source_success_rate", source="pytrends", tier="all") < 0.1
+    
+    def test_fetch_timeline_falls_back_and_records(self, fake_redis):
+        """Test that a pytrends failure falls through to Apify and both outcomes are recorded."""
+        from app.services import fetch_timeline, source_selector, PyTrendsUnavailableException
+        
+        fallback = Mock()
+        with patch('app.services.fetch_from_pytrends', side_effect=PyTrendsUnavailableException("429")), \
+             patch('app.services.fetch_from_apify', return_value=([{"time": "1"}], {"compute_units": 0.3, "duration_ms": 50000})):
+            data, stats, source = fetch_timeline("skincare", "now 7-d", on_apify_fallback=fallback)
+        
+        assert source == "apify"
+        fallback.assert_called_once()
+        assert source_selector.estimate("pytrends")["success"] < 0.7
+        assert source_selector.estimate("apify")["latency_ms"] < 90000
+        assert source_selector.spent_today() == 0.3
+    
+    def test_exhausted_budget_uses_pytrends_only(self, fake_redis):
+        """Test that no Apify run starts once the daily budget is spent."""
+        from app.metrics import metrics
+        from app.services import fetch_timeline, source_selector, PyTrendsUnavailableException, UpstreamBudgetExhaustedException
+        
+        source_selector.record("apify", "all", True, 90000, 1.0)
+        apify = Mock()
+        with patch('app.services.source_selector.daily_budget', 1.0), \
+             patch('app.services.fetch_from_pytrends', side_effect=PyTrendsUnavailableException("429")), \
+             patch('app.services.fetch_from_apify', apify):
+            with pytest.raises(UpstreamBudgetExhaustedException) as exc_info:
+                fetch_timeline("skincare", "now 7-d")
+        
+        apify.assert_not_called()
+        assert exc_info.value.retry_after > 0
+        assert metrics.get("apify_budget_exhausted_total") == 1
+        assert metrics.get("apify_budget_spent_cu") == 1.0
+    
+    def test_budget_pressure_keeps_pytrends_first(self, fake_redis):
+        """Test that a nearly spent budget outweighs a latency gain from going direct."""
+        from app.services import source_selector
+        
+        for _ in range(5):
+            source_selector.record("pytrends", "all", False, 40000)
+        assert source_selector.plan() == ("apify",)
+        
+        source_selector.record("apify", "all", True, 90000, 0.95)
+        with patch('app.services.source_selector.daily_budget', 1.0):
+            assert source_selector.plan() == ("pytrends", "apify")
+    
+    def test_popularity_tier(self):
+        """Test that tiers are only used when enabled."""
+        from app.services import popularity_tier
+        
+        assert popularity_tier(None) == "all"
+        with patch('app.services.settings.SOURCE_POLICY_TIERS', True):
+            assert popularity_tier(None) == "new"
+            assert popularity_tier(Mock()) == "known"
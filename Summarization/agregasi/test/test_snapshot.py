@@ -0,0 +1,143 @@
+import json
+import time
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+from redis import ConnectionError as RedisConnectionError
+
+from app.snapshot import export_snapshot, import_snapshot, main, SnapshotError
+
+
+@pytest.fixture
+def fake_redis():
+    server = fakeredis.FakeRedis(decode_responses=True)
+    with patch('app.services.redis_client', server):
+        yield server
+
+
+def _seed(server, count):
+    for i in range(count):
+        server.set(f"trend:kw{i}", json.dumps({"timestamp": time.time(), "data": {"i": i}}), ex=3600)
+
+
+class TestSnapshotRoundTrip:
+    """Test cases for cache snapshot export and import."""
+    
+    def test_export_then_import_restores_values_and_ttls(self, fake_redis, tmp_path):
+        """Test that a flushed cache is restored with its remaining TTLs."""
+        path = str(tmp_path / "snap.jsonl.gz")
+        _seed(fake_redis, 25)
+        fake_redis.set("trend:no_ttl", "{}")
+        fake_redis.set("lock:kw1", "1:owner")
+        
+        exported = export_snapshot(path, batch_size=7, quiet=True)
+        fake_redis.flushall()
+        imported = import_snapshot(path, batch_size=10, quiet=True)
+        
+        assert exported["keys"] == 26 and exported["keys_per_sec"] > 0
+        assert imported["loaded"] == 26
+        assert json.loads(fake_redis.get("trend:kw3"))["data"] == {"i": 3}
+        assert 3500 < fake_redis.ttl("trend:kw3") <= 3600
+        assert fake_redis.ttl("trend:no_ttl") == -1
+        assert fake_redis.get("lock:kw1") is None
+    
+    def test_import_skips_expired_and_keeps_live_entries(self, fake_redis, tmp_path):
+        """Test that expired entries are dropped and existing keys win unless --overwrite."""
+        path = str(tmp_path / "snap.jsonl.gz")
+        _seed(fake_redis, 3)
+        export_snapshot(path, quiet=True)
+        fake_redis.flushall()
+        fake_redis.set("trend:kw0", "live")
+        
+        with patch('app.snapshot.time.time', return_value=time.time() + 7200):
+            expired = import_snapshot(path, quiet=True)
+        kept = import_snapshot(path, quiet=True)
+        
+        assert expired["skipped_expired"] == 3
+        assert kept["loaded"] == 2 and kept["skipped_existing"] == 1
+        assert fake_redis.get("trend:kw0") == "live"
+        assert import_snapshot(path, overwrite=True, quiet=True)["loaded"] == 3
+    
+    def test_imported_entries_accept_next_lock_holder(self, fake_redis, tmp_path):
+        """Test that restored fences do not block writes once the fence counters are gone."""
+        from app.services import FetchLock, build_lock_key, redis_set_fenced_with_retry
+        path = str(tmp_path / "snap.jsonl.gz")
+        assert redis_set_fenced_with_retry("trend:skincare", {"data": "old"}, 5, ex=3600)
+        export_snapshot(path, quiet=True)
+        fake_redis.flushall()
+        import_snapshot(path, quiet=True)
+        
+        lock = FetchLock(build_lock_key("skincare"), renew_interval=60)
+        assert lock.acquire() and lock.fence == 1
+        assert redis_set_fenced_with_retry("trend:skincare", {"data": "new"}, lock.fence, ex=3600)
+        lock.release()
+        
+        assert json.loads(fake_redis.get("trend:skincare")) == {"data": "new", "fence": 1}
+    
+    def test_keys_retagged_for_cluster_mode(self, fake_redis, tmp_path):
+        """Test that single-node keys are imported with hash tags into a cluster."""
+        path = str(tmp_path / "snap.jsonl.gz")
+        fake_redis.set("trend:skin_care:30d:PH", "{}", ex=60)
+        export_snapshot(path, quiet=True)
+        fake_redis.flushall()
+        
+        with patch('app.services.settings.REDIS_CLUSTER_ENABLED', True):
+            import_snapshot(path, quiet=True)
+        
+        assert fake_redis.keys("trend:*") == ["trend:{skin_care}:30d:PH"]
+    
+    def test_rejects_foreign_file(self, fake_redis, tmp_path):
+        """Test that a non-snapshot file is reported instead of loaded."""
+        import gzip
+        path = str(tmp_path / "other.gz")
+        with gzip.open(path, "wt") as f:
+            f.write('{"hello": 1}\n')
+        
+        with pytest.raises(SnapshotError):
+            import_snapshot(path, quiet=True)
+        assert main(["import", path, "--quiet"]) == 1
+
+
+class TestSnapshotResume:
+    """Test cases for resuming interrupted snapshot runs."""
+    
+    def test_export_resumes_from_checkpoint(self, fake_redis, tmp_path):
+        """Test that an interrupted export continues from its SCAN cursor without duplicates."""
+        path = str(tmp_path / "snap.jsonl.gz")
+        _seed(fake_redis, 40)
+        real_scan = fake_redis.scan
+        calls = []
+        
+        def flaky_scan(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 3:
+                raise RedisConnectionError("connection lost")
+            return real_scan(*args, **kwargs)
+        
+        with patch.object(fake_redis, 'scan', side_effect=flaky_scan):
+            with pytest.raises(RedisConnectionError):
+                export_snapshot(path, batch_size=5, quiet=True)
+        
+        stats = export_snapshot(path, batch_size=5, resume=True, quiet=True)
+        fake_redis.flushall()
+        imported = import_snapshot(path, quiet=True)
+        
+        assert stats["total_keys"] == 40 and stats["keys"] < 40
+        assert imported["loaded"] == 40 and imported["skipped_existing"] == 0
+        assert not (tmp_path / "snap.jsonl.gz.state").exists()
+    
+    def test_import_resumes_after_last_batch(self, fake_redis, tmp_path):
+        """Test that a resumed import skips the entries already loaded."""
+        path = str(tmp_path / "snap.jsonl.gz")
+        _seed(fake_redis, 12)
+        export_snapshot(path, quiet=True)
+        fake_redis.flushall()
+        (tmp_path / "snap.jsonl.gz.state").write_text(json.dumps(
+            {"mode": "import", "records": 10, "loaded": 10, "existing": 0, "expired": 0}
+        ))
+        
+        stats = import_snapshot(path, resume=True, quiet=True)
+        
+        assert stats["loaded"] == 12
+        assert len(fake_redis.keys("trend:*")) == 2
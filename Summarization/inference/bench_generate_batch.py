@@ -0,0 +1,115 @@
+"""CPU benchmark: three sequential ``generate`` calls vs one ``generate_batch``.
+
+Uses the three ``hourly_summary`` entries a ``process_data`` response
+contains and reports per-request latency (p50/p95) and summaries/second for
+both paths, plus whether the batched outputs match the sequential ones.
+
+Usage:
+    python bench_generate_batch.py --iterations 5
+    python bench_generate_batch.py --model-path ../models/t5-posting-time-summarizer --threads 4
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+# CPU only: hide GPUs before torch is imported
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import torch
+
+from model_loader import get_model_loader
+from summarizer import Summarizer
+
+
+HOURLY_SUMMARIES: List[Dict[str, Any]] = [
+    {
+        "day": "Saturday",
+        "time_window": "09:00 - 12:00",
+        "score": 79,
+        "daily_avg": 55.7,
+        "peak_hour": 9,
+        "peak_value": 97.0,
+        "hourly": "01(30), 02(28), 03(30), 04(37), 05(44), 06(48), 07(65), 08(84), 09(97), 10(84), 11(77), 12(73)"
+    },
+    {
+        "day": "Monday",
+        "time_window": "17:00 - 20:00",
+        "score": 85.2,
+        "daily_avg": 69.0,
+        "peak_hour": 18,
+        "peak_value": 89.0,
+        "hourly": "06(52), 07(58), 08(62), 12(75), 13(74), 17(84), 18(89), 19(83), 20(71), 21(66), 22(60), 23(55)"
+    },
+    {
+        "day": "Wednesday",
+        "time_window": "12:00 - 15:00",
+        "score": 72.4,
+        "daily_avg": 61.3,
+        "peak_hour": 13,
+        "peak_value": 78.0,
+        "hourly": "06(45), 07(50), 08(58), 09(63), 10(66), 11(70), 12(72), 13(78), 14(67), 15(61), 16(59), 17(60)"
+    }
+]
+
+
+def _measure(fn: Callable[[], List[str]], iterations: int) -> Dict[str, float]:
+    """Time ``iterations`` runs of ``fn`` (one request = all three summaries)."""
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "p50_s": round(statistics.median(latencies), 3),
+        "p95_s": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+        "summaries_per_s": round(len(HOURLY_SUMMARIES) * iterations / total, 3)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-path", default=None, help="Local model dir or Hub ID")
+    parser.add_argument("--subfolder", default="stage2", help="stage1 or stage2")
+    parser.add_argument("--iterations", type=int, default=5, help="Timed requests per path")
+    parser.add_argument("--num-beams", type=int, default=4, help="Beam width")
+    parser.add_argument("--max-length", type=int, default=512, help="Max generated tokens")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    get_model_loader(model_path=args.model_path, subfolder=args.subfolder)
+    summarizer = Summarizer()
+    options = {"max_length": args.max_length, "num_beams": args.num_beams}
+
+    def sequential() -> List[str]:
+        return [summarizer.generate(item, **options) for item in HOURLY_SUMMARIES]
+
+    def batched() -> List[str]:
+        return summarizer.generate_batch(HOURLY_SUMMARIES, **options)
+
+    # Warm up both paths (allocator, oneDNN kernels) and compare outputs
+    sequential_outputs = sequential()
+    batched_outputs = batched()
+
+    results = {
+        "device": summarizer.device,
+        "threads": torch.get_num_threads(),
+        "num_beams": args.num_beams,
+        "sequential": _measure(sequential, args.iterations),
+        "batched": _measure(batched, args.iterations),
+        "outputs_match": sequential_outputs == batched_outputs
+    }
+    results["speedup"] = round(results["sequential"]["p50_s"] / results["batched"]["p50_s"], 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
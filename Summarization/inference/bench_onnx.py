@@ -0,0 +1,63 @@
+"""CPU latency benchmark: PyTorch vs ONNX Runtime backend.
+
+Runs ``generate_batch`` on the three benchmark inputs with both backends
+(greedy and beam search) and reports p50/p95 latency, summaries/second,
+the speedup and whether the outputs are identical.
+
+Usage:
+    python bench_onnx.py --onnx-path ../models/onnx-stage2 --iterations 5
+    python bench_onnx.py --onnx-path ../models/onnx-stage2 --model-path ../models/t5-posting-time-summarizer --threads 4
+"""
+
+import argparse
+import json
+
+import torch
+
+from bench_generate_batch import HOURLY_SUMMARIES, _measure
+from model_loader import SummarizationModelLoader
+from summarizer import Summarizer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--onnx-path", required=True, help="Directory written by export_onnx.py")
+    parser.add_argument("--model-path", default="raflisbk/t5-posting-time-summarizer", help="Local model dir or Hub ID")
+    parser.add_argument("--subfolder", default="stage2", help="stage1 or stage2")
+    parser.add_argument("--iterations", type=int, default=5, help="Timed requests per backend and decoding mode")
+    parser.add_argument("--beams", default="1,4", help="Comma-separated num_beams values (1 = greedy)")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    loaders = {
+        "pytorch": SummarizationModelLoader(args.model_path, args.subfolder, device="cpu"),
+        "onnx": SummarizationModelLoader(args.model_path, args.subfolder, backend="onnx", onnx_path=args.onnx_path)
+    }
+    summarizers = {}
+    for name, loader in loaders.items():
+        loader.load()
+        summarizers[name] = Summarizer(loader)
+
+    results = {"threads": torch.get_num_threads(), "runs": []}
+    for num_beams in (int(b) for b in args.beams.split(",")):
+        outputs = {}
+        run = {"num_beams": num_beams}
+        for name, summarizer in summarizers.items():
+            def request(summarizer=summarizer):
+                return summarizer.generate_batch(HOURLY_SUMMARIES, num_beams=num_beams)
+
+            # Warm-up run doubles as the parity sample
+            outputs[name] = request()
+            run[name] = _measure(request, args.iterations)
+        run["speedup"] = round(run["pytorch"]["p50_s"] / run["onnx"]["p50_s"], 2)
+        run["outputs_match"] = outputs["pytorch"] == outputs["onnx"]
+        results["runs"].append(run)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
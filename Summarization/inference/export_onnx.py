@@ -0,0 +1,99 @@
+"""Export the merged summarization model to ONNX.
+
+Loads the model the same way production does (Stage 2 = Stage 1 base with
+the LoRA adapter merged), saves the merged weights, and exports them with
+optimum as separate encoder, decoder and decoder-with-past graphs
+(``text2text-generation-with-past``). The output directory can be loaded
+with ``SummarizationModelLoader(backend="onnx", onnx_path=...)``.
+
+Usage:
+    python export_onnx.py --output ../models/onnx-stage2
+    python export_onnx.py --model-path ../models/t5-posting-time-summarizer --output ../models/onnx-stage2
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+from typing import Optional
+
+from model_loader import SummarizationModelLoader
+
+logger = logging.getLogger(__name__)
+
+
+def export_onnx(
+    output_dir: str,
+    model_path: str = "raflisbk/t5-posting-time-summarizer",
+    subfolder: str = "stage2",
+    token: Optional[str] = None,
+    opset: Optional[int] = None
+) -> str:
+    """Export the merged model and tokenizer to ``output_dir``.
+
+    The export runs in float32 on CPU so the graphs reproduce the PyTorch
+    CPU outputs.
+
+    Args:
+        output_dir: Directory for the ONNX graphs, config and tokenizer
+        model_path: Local model directory or HuggingFace model ID
+        subfolder: "stage1" or "stage2"
+        token: HuggingFace token for private repos (optional)
+        opset: ONNX opset (default: optimum's choice for T5)
+
+    Returns:
+        The output directory
+
+    Raises:
+        ImportError: If optimum[exporters] is not installed
+    """
+    try:
+        from optimum.exporters.onnx import main_export
+    except ImportError as e:
+        raise ImportError(
+            "ONNX export requires optimum[exporters,onnxruntime] "
+            "(pip install -r requirements-onnx.txt)"
+        ) from e
+
+    loader = SummarizationModelLoader(
+        model_path=model_path,
+        subfolder=subfolder,
+        device="cpu",
+        token=token
+    )
+    loader.load()
+
+    with tempfile.TemporaryDirectory() as merged_dir:
+        # Merged (LoRA-free) weights, so the exporter sees a plain T5 model
+        loader.model.save_pretrained(merged_dir)
+        loader.tokenizer.save_pretrained(merged_dir)
+        logger.info(f"Merged model saved to {merged_dir}, exporting to ONNX...")
+
+        main_export(
+            merged_dir,
+            output=output_dir,
+            task="text2text-generation-with-past",
+            opset=opset,
+            device="cpu",
+            no_post_process=True  # keep decoder and decoder-with-past as separate graphs
+        )
+
+    logger.info(f"ONNX model exported to {output_dir}: {sorted(os.listdir(output_dir))}")
+    return output_dir
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the summarization model to ONNX")
+    parser.add_argument("--output", required=True, help="Output directory")
+    parser.add_argument("--model-path", default="raflisbk/t5-posting-time-summarizer", help="Local model dir or Hub ID")
+    parser.add_argument("--subfolder", default="stage2", help="stage1 or stage2")
+    parser.add_argument("--token", default=os.environ.get("HF_TOKEN"), help="HuggingFace token")
+    parser.add_argument("--opset", type=int, default=None, help="ONNX opset")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    export_onnx(args.output, args.model_path, args.subfolder, args.token, args.opset)
+
+
+if __name__ == "__main__":
+    main()
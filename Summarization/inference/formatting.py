@@ -0,0 +1,37 @@
+"""Model input formatting for the summarization model.
+
+Kept free of torch/transformers so the model input can be built and
+tested without loading the model stack.
+"""
+
+from typing import Any, Dict
+
+
+def format_input(hourly_summary: Dict[str, Any]) -> str:
+    """Format hourly_summary from aggregation into model input.
+    
+    Args:
+        hourly_summary: Dictionary containing:
+            - day (str): Day of week (e.g., "Monday")
+            - time_window (str): Time range (e.g., "17:00 - 20:00")
+            - score (float): Recommendation score (e.g., 85.2)
+            - daily_avg (float): Daily average score
+            - peak_hour (int): Peak hour within window
+            - peak_value (float): Score at peak hour
+            - hourly (str): Comma-separated hourly scores
+                           (e.g., "06(52), 07(58), ...")
+    
+    Returns:
+        Formatted input string ready for model tokenization
+    """
+    input_text = (
+        f"Day: {hourly_summary['day']}, "
+        f"Time: {hourly_summary['time_window']}, "
+        f"Score: {int(hourly_summary['score'])}\n"
+        f"Hourly: {hourly_summary['hourly']}\n"
+        f"Daily Avg: {hourly_summary['daily_avg']}, "
+        f"Peak: {hourly_summary['peak_hour']:02d}"
+        f"({hourly_summary['peak_value']})"
+    )
+    
+    return input_text
@@ -2,6 +2,11 @@
 
 This module provides a singleton loader for the fine-tuned T5 model
 used to generate time recommendation summaries with traceback analysis.
+
+Two backends are available: eager PyTorch (default) and ONNX Runtime,
+which runs the encoder/decoder-with-past graphs written by
+export_onnx.py through the same HuggingFace ``generate`` (greedy and
+beam search), so outputs match the PyTorch path.
 """
 
 import logging
@@ -24,17 +29,22 @@ class SummarizationModelLoader:
     Attributes:
         model_path: Path or identifier for the model
         device: Device to run inference on ('cuda' or 'cpu')
+        backend: Inference engine ('pytorch' or 'onnx')
+        onnx_path: Directory of the exported ONNX model (onnx backend)
         tokenizer: Loaded tokenizer instance
         model: Loaded model instance
     """
     
+    BACKENDS = ("pytorch", "onnx")
     
     def __init__(
         self,
         model_path: str = "raflisbk/t5-posting-time-summarizer",
         subfolder: str = "stage2",
         device: Optional[str] = None,
-        token: Optional[str] = None
+        token: Optional[str] = None,
+        backend: str = "pytorch",
+        onnx_path: Optional[str] = None
     ) -> None:
         """Initialize model loader.
         
@@ -44,12 +54,20 @@ class SummarizationModelLoader:
             subfolder: Subfolder within repo (for HuggingFace Hub)
                       Default: "stage2" for Stage 2 model with traceback
                       Use "stage1" for Stage 1 model (narrative only)
-            device: Device to load model on ('cuda', 'cpu', or None for auto)
+            device: Device to load model on ('cuda', 'cpu', or None for auto;
+                   the onnx backend defaults to 'cpu')
             token: HuggingFace token for private repos (optional)
+            backend: 'pytorch' (default) or 'onnx' (ONNX Runtime)
+            onnx_path: Directory written by export_onnx.py (onnx backend)
         """
         self.model_path = model_path
         self.subfolder = subfolder
-        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.backend = backend
+        self.onnx_path = onnx_path
+        if backend == "onnx":
+            self.device = device or "cpu"
+        else:
+            self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
         self.token = token
         
         self.tokenizer: Optional[AutoTokenizer] = None
@@ -57,7 +75,8 @@ class SummarizationModelLoader:
         
         logger.info(
             f"Initializing model loader - Path: {model_path}, "
-            f"Subfolder: {subfolder}, Device: {self.device}"
+            f"Subfolder: {subfolder}, Device: {self.device}, "
+            f"Backend: {backend}"
         )
     
     def load(self) -> None:
@@ -67,9 +86,14 @@ class SummarizationModelLoader:
         applies the LoRA adapter from stage2, then merges them for
         faster inference.
         
+        With the onnx backend, the exported graphs in ``onnx_path`` are
+        loaded into ONNX Runtime instead (the LoRA merge happened at
+        export time).
+        
         Raises:
             OSError: If model files cannot be loaded
-            ValueError: If subfolder is invalid
+            ValueError: If subfolder or backend is invalid
+            ImportError: If the onnx backend is used without optimum[onnxruntime]
         """
         logger.info(f"Loading model from: {self.model_path}/{self.subfolder}")
         
@@ -83,6 +107,15 @@ class SummarizationModelLoader:
                 "Must be 'stage1' or 'stage2'"
             )
         
+        # Validate backend
+        if self.backend not in self.BACKENDS:
+            raise ValueError(
+                f"Invalid backend '{self.backend}'. "
+                "Must be 'pytorch' or 'onnx'"
+            )
+        if self.backend == "onnx" and not self.onnx_path:
+            raise ValueError("onnx_path is required for the onnx backend")
+        
         # Load tokenizer (always from stage1 for consistency)
         tokenizer_subfolder = "stage1"
         if is_local:
@@ -101,6 +134,10 @@ class SummarizationModelLoader:
                 f"(subfolder: {tokenizer_subfolder})"
             )
         
+        if self.backend == "onnx":
+            self._load_onnx()
+            return
+        
         # Load model with appropriate dtype
         torch_dtype = torch.float16 if self.device == "cuda" else torch.float32
         
@@ -176,6 +213,32 @@ class SummarizationModelLoader:
             f"(Stage: {self.subfolder})"
         )
     
+    def _load_onnx(self) -> None:
+        """Load the exported encoder/decoder-with-past graphs into ONNX Runtime."""
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError as e:
+            raise ImportError(
+                "The onnx backend requires optimum[onnxruntime] "
+                "(pip install -r requirements-onnx.txt)"
+            ) from e
+        
+        provider = (
+            "CUDAExecutionProvider" if self.device == "cuda"
+            else "CPUExecutionProvider"
+        )
+        self.model = ORTModelForSeq2SeqLM.from_pretrained(
+            self.onnx_path,
+            use_cache=True,
+            use_merged=False,
+            provider=provider
+        )
+        
+        logger.info(
+            f"ONNX model loaded successfully from {self.onnx_path} "
+            f"(provider: {provider})"
+        )
+    
     def is_loaded(self) -> bool:
         """Check if model and tokenizer are loaded.
         
@@ -192,7 +255,9 @@ _model_loader: Optional[SummarizationModelLoader] = None
 def get_model_loader(
     model_path: Optional[str] = None,
     subfolder: str = "stage2",
-    token: Optional[str] = None
+    token: Optional[str] = None,
+    backend: str = "pytorch",
+    onnx_path: Optional[str] = None
 ) -> SummarizationModelLoader:
     """Get or create the global model loader instance.
     
@@ -206,6 +271,8 @@ def get_model_loader(
                   "stage1" = Narrative only
                   "stage2" = Narrative + Traceback (default)
         token: HuggingFace token for private repos (optional)
+        backend: 'pytorch' (default) or 'onnx' (only used on first call)
+        onnx_path: Directory written by export_onnx.py (onnx backend)
     
     Returns:
         SummarizationModelLoader instance
@@ -216,6 +283,9 @@ def get_model_loader(
         >>> 
         >>> # Or load Stage 1 (narrative only)
         >>> loader = get_model_loader(subfolder="stage1")
+        >>> 
+        >>> # ONNX Runtime on CPU (after python export_onnx.py --output onnx/)
+        >>> loader = get_model_loader(backend="onnx", onnx_path="onnx/")
     """
     global _model_loader
     
@@ -224,7 +294,9 @@ def get_model_loader(
         _model_loader = SummarizationModelLoader(
             model_path=model_path or default_path,
             subfolder=subfolder,
-            token=token
+            token=token,
+            backend=backend,
+            onnx_path=onnx_path
         )
         _model_loader.load()
     
@@ -10,7 +10,8 @@ from typing import Any, Dict, List, Tuple, Optional
 
 import torch
 
-from model_loader import get_model_loader
+from formatting import format_input
+from model_loader import SummarizationModelLoader, get_model_loader
 
 logger = logging.getLogger(__name__)
 
@@ -28,9 +29,17 @@ class Summarizer:
         device: Device for inference
     """
     
-    def __init__(self) -> None:
-        """Initialize summarizer with model loader."""
-        self.model_loader = get_model_loader()
+    def __init__(
+        self,
+        model_loader: Optional[SummarizationModelLoader] = None
+    ) -> None:
+        """Initialize summarizer with model loader.
+        
+        Args:
+            model_loader: Loaded model loader to use (default: the global
+                         one from get_model_loader)
+        """
+        self.model_loader = model_loader or get_model_loader()
         self.tokenizer = self.model_loader.tokenizer
         self.model = self.model_loader.model
         self.device = self.model_loader.device
@@ -66,17 +75,7 @@ class Summarizer:
             ... }
             >>> input_text = summarizer.format_input(summary)
         """
-        input_text = (
-            f"Day: {hourly_summary['day']}, "
-            f"Time: {hourly_summary['time_window']}, "
-            f"Score: {int(hourly_summary['score'])}\n"
-            f"Hourly: {hourly_summary['hourly']}\n"
-            f"Daily Avg: {hourly_summary['daily_avg']}, "
-            f"Peak: {hourly_summary['peak_hour']:02d}"
-            f"({hourly_summary['peak_value']})"
-        )
-        
-        return input_text
+        return format_input(hourly_summary)
     
     def _parse_hourly_data(self, hourly_str: str) -> List[Tuple[int, float]]:
         """Parse hourly string into list of (hour, value) tuples.
@@ -281,6 +280,26 @@ class Summarizer:
             
         return text.strip()
 
+    def _postprocess(
+        self,
+        generated_text: str,
+        hourly_summary: Dict[str, Any]
+    ) -> str:
+        """Apply calculation fixes and newline formatting to one output.
+        
+        Args:
+            generated_text: Decoded model output
+            hourly_summary: Original input data for this output
+        
+        Returns:
+            Final summary text
+        """
+        corrected_text = self._fix_traceback_calculations(
+            generated_text,
+            hourly_summary
+        )
+        return self._format_traceback_newlines(corrected_text)
+    
     def generate(
         self,
         hourly_summary: Dict[str, Any],
@@ -303,19 +322,59 @@ class Summarizer:
         Raises:
             RuntimeError: If model inference fails
         """
-        # Format input
-        input_text = self.format_input(hourly_summary)
-        logger.debug(f"Input (truncated): {input_text[:100]}...")
+        return self.generate_batch(
+            [hourly_summary],
+            max_length=max_length,
+            num_beams=num_beams
+        )[0]
+    
+    def generate_batch(
+        self,
+        hourly_summaries: List[Dict[str, Any]],
+        max_length: int = 512,
+        num_beams: int = 4
+    ) -> List[str]:
+        """Generate summaries for several hourly_summary entries at once.
+        
+        All inputs are tokenized together (padded to the longest one) and
+        decoded in a single batched ``model.generate`` call, so the three
+        recommendations from ``process_data`` cost one forward pass per
+        decoding step instead of three. Post-processing still runs per item
+        against its own input.
+        
+        Args:
+            hourly_summaries: List of aggregation outputs
+                             (see format_input for structure)
+            max_length: Maximum generation length in tokens
+            num_beams: Number of beams for beam search
+        
+        Returns:
+            Generated summaries, in the same order as ``hourly_summaries``
+        
+        Raises:
+            RuntimeError: If model inference fails
+        
+        Example:
+            >>> processed = process_data(timeline_data)
+            >>> summaries = summarizer.generate_batch(processed["hourly_summary"])
+        """
+        if not hourly_summaries:
+            return []
         
-        # Add T5 prefix
-        input_with_prefix = f"summarize: {input_text}"
+        # Format inputs and add T5 prefix
+        inputs_with_prefix = [
+            f"summarize: {self.format_input(hourly_summary)}"
+            for hourly_summary in hourly_summaries
+        ]
+        logger.debug(f"Input (truncated): {inputs_with_prefix[0][:100]}...")
         
-        # Tokenize
+        # Tokenize once; the attention mask keeps padding out of the encoder
         inputs = self.tokenizer(
-            input_with_prefix,
+            inputs_with_prefix,
             return_tensors="pt",
             max_length=256,
-            truncation=True
+            truncation=True,
+            padding=True
         )
         inputs = {k: v.to(self.device) for k, v in inputs.items()}
         
@@ -331,26 +390,23 @@ class Summarizer:
                 length_penalty=1.0
             )
         
-        # Decode output
-        generated_text = self.tokenizer.decode(
-            outputs[0],
+        # Decode outputs (one sequence per input)
+        generated_texts = self.tokenizer.batch_decode(
+            outputs,
             skip_special_tokens=True
         )
         
-        # Apply post-processing to fix calculations
-        corrected_text = self._fix_traceback_calculations(
-            generated_text,
-            hourly_summary
-        )
-        
-        # Apply formatting for newlines
-        final_text = self._format_traceback_newlines(corrected_text)
+        # Apply post-processing per item against its own input
+        final_texts = [
+            self._postprocess(generated_text, hourly_summary)
+            for generated_text, hourly_summary in zip(generated_texts, hourly_summaries)
+        ]
         
         logger.info(
-            f"Generated summary successfully "
-            f"({len(final_text)} characters)"
+            f"Generated {len(final_texts)} summaries successfully "
+            f"({sum(len(text) for text in final_texts)} characters)"
         )
-        return final_text
+        return final_texts
 
 
 # Global singleton instance
@@ -405,3 +461,21 @@ def generate_summary(hourly_summary: Dict[str, Any]) -> str:
     """
     summarizer = get_summarizer()
     return summarizer.generate(hourly_summary)
+
+
+def generate_summaries(hourly_summaries: List[Dict[str, Any]]) -> List[str]:
+    """Convenience function to generate summaries in one batch.
+    
+    Args:
+        hourly_summaries: List of aggregation output dictionaries,
+                         e.g. ``process_data(...)["hourly_summary"]``
+    
+    Returns:
+        Generated summary texts, in input order
+    
+    Example:
+        >>> processed = process_data(timeline_data)
+        >>> summaries = generate_summaries(processed["hourly_summary"])
+    """
+    summarizer = get_summarizer()
+    return summarizer.generate_batch(hourly_summaries)
@@ -0,0 +1,96 @@
+"""Parity test: ONNX Runtime backend vs PyTorch backend.
+
+Generates summaries for the same inputs with both backends, greedy and
+beam search, and checks that the generated token IDs (and therefore the
+final texts) are identical.
+
+Needs torch, transformers, peft and optimum[onnxruntime], plus an export
+from export_onnx.py. Skipped when any of them is missing.
+
+Usage:
+    ONNX_PATH=../models/onnx-stage2 MODEL_PATH=../models/t5-posting-time-summarizer \\
+        python -m pytest test_onnx_parity.py -q
+    python test_onnx_parity.py --onnx-path ../models/onnx-stage2
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("optimum.onnxruntime")
+
+from bench_generate_batch import HOURLY_SUMMARIES
+from model_loader import SummarizationModelLoader
+from summarizer import Summarizer
+
+ONNX_PATH = os.environ.get("ONNX_PATH")
+MODEL_PATH = os.environ.get("MODEL_PATH", "raflisbk/t5-posting-time-summarizer")
+
+
+def _summarizers(onnx_path: str, model_path: str = MODEL_PATH):
+    """PyTorch and ONNX Runtime summarizers for the same model, both on CPU."""
+    torch_loader = SummarizationModelLoader(model_path=model_path, device="cpu")
+    torch_loader.load()
+    onnx_loader = SummarizationModelLoader(
+        model_path=model_path,
+        backend="onnx",
+        onnx_path=onnx_path
+    )
+    onnx_loader.load()
+    return Summarizer(torch_loader), Summarizer(onnx_loader)
+
+
+@pytest.fixture(scope="module")
+def summarizers():
+    if not ONNX_PATH:
+        pytest.skip("Set ONNX_PATH to an export from export_onnx.py")
+    return _summarizers(ONNX_PATH)
+
+
+def _token_ids(summarizer: Summarizer, num_beams: int):
+    """Raw generate() output for the benchmark inputs."""
+    import torch
+
+    texts = [f"summarize: {summarizer.format_input(s)}" for s in HOURLY_SUMMARIES]
+    inputs = summarizer.tokenizer(texts, return_tensors="pt", max_length=256, truncation=True, padding=True)
+    with torch.no_grad():
+        outputs = summarizer.model.generate(
+            **inputs,
+            max_length=512,
+            num_beams=num_beams,
+            early_stopping=True,
+            do_sample=False,
+            no_repeat_ngram_size=3,
+            length_penalty=1.0
+        )
+    return outputs.tolist()
+
+
+@pytest.mark.parametrize("num_beams", [1, 4])
+def test_generated_tokens_match(summarizers, num_beams):
+    """Test that greedy and beam search produce the same token IDs on both backends."""
+    torch_summarizer, onnx_summarizer = summarizers
+
+    assert _token_ids(onnx_summarizer, num_beams) == _token_ids(torch_summarizer, num_beams)
+
+
+def test_final_summaries_match(summarizers):
+    """Test that post-processed batch outputs are identical."""
+    torch_summarizer, onnx_summarizer = summarizers
+
+    assert onnx_summarizer.generate_batch(HOURLY_SUMMARIES) == torch_summarizer.generate_batch(HOURLY_SUMMARIES)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="ONNX vs PyTorch parity check")
+    parser.add_argument("--onnx-path", required=True)
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    pair = _summarizers(args.onnx_path, args.model_path)
+    for beams in (1, 4):
+        match = _token_ids(pair[1], beams) == _token_ids(pair[0], beams)
+        print(f"num_beams={beams}: {'MATCH' if match else 'MISMATCH'}")